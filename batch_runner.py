@@ -0,0 +1,223 @@
+# Author: SupportDone.com
+# Headless batch runner: downloads and processes many logins from a manifest, without the GUI
+#
+# Usage: python batch_runner.py jobs.csv --concurrency 4 --download-root downloads --results results.json
+#
+# The manifest is a CSV (one job per row) or a JSON list of objects with the fields
+#   utility_provider, username, password (or password_env), start_date, end_date
+# and optionally url, download_path, sessions, excel (PG&E only; other providers are
+# reported with excel_status "not supported"). Passwords can be kept out of
+# the manifest by naming an environment variable in password_env instead.
+
+import os
+import re
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from portal_automation import PortalJob
+from gbd_processor import GBDProcessor, EXCEL_PROVIDERS
+from parse_cache import ParseCache
+
+DEFAULT_URLS = {
+    "SDGE": "https://myenergycenter.com/portal/PreLogin/Validate",
+    "PG&E": "https://www.pge.com/en/login",
+    "SCE": "https://www.sce.com/mysce/login",
+}
+REQUIRED_FIELDS = ("utility_provider", "username", "start_date", "end_date")
+TRUE_VALUES = ("1", "true", "yes", "y")
+
+
+def load_manifest(path):
+    """Read jobs from a CSV or JSON manifest."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".json"):
+            jobs = json.load(f)
+            if isinstance(jobs, dict):
+                jobs = jobs.get("jobs", [])
+        else:
+            jobs = [{k.strip(): (v or "").strip() for k, v in row.items() if k} for row in csv.DictReader(f)]
+    for number, job in enumerate(jobs, start=1):
+        missing = [field for field in REQUIRED_FIELDS if not job.get(field)]
+        if missing:
+            raise ValueError(f"Job {number} in {path} is missing: {', '.join(missing)}")
+        job.setdefault("id", str(number))
+    return jobs
+
+
+def flag(value, default=False):
+    if value in (None, ""):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+class BatchRunner:
+    """Run PortalJobs for many logins with a limit on how many run at once."""
+
+    def __init__(self, jobs, download_root, concurrency=2, sessions=1, profile="default", fast_path=False,
+                 sync=False, excel=False):
+        self.jobs = jobs
+        self.download_root = download_root
+        self.concurrency = max(1, int(concurrency))
+        self.sessions = sessions
+        self.profile = profile
+        self.fast_path = fast_path
+        self.sync = sync
+        self.excel = excel
+        # Shared so re-processing an unchanged export skips parsing across jobs
+        self.parse_cache = ParseCache()
+        self.results = []
+        self._lock = threading.Lock()
+
+    def download_path(self, job):
+        """Each job gets its own folder so parallel jobs never watch each other's downloads."""
+        if job.get("download_path"):
+            return job["download_path"]
+        safe_username = re.sub(r"[^A-Za-z0-9._-]+", "_", job["username"])
+        safe_provider = re.sub(r"[^A-Za-z0-9]+", "", job["utility_provider"])
+        return os.path.join(self.download_root, f"{safe_provider}_{safe_username}")
+
+    @staticmethod
+    def password(job):
+        if job.get("password_env"):
+            password = os.environ.get(job["password_env"])
+            if password is None:
+                raise ValueError(f"Environment variable {job['password_env']} is not set")
+            return password
+        if not job.get("password"):
+            raise ValueError("No password or password_env given")
+        return job["password"]
+
+    def process_files(self, downloads, download_path, utility_provider):
+        """Turn each downloaded GBD file into an Excel workbook; returns (outputs, errors)."""
+        outputs = []
+        errors = []
+        for entry in downloads:
+            gbd_file = os.path.join(download_path, entry["file"])
+            if not gbd_file.lower().endswith((".xml", ".csv", ".zip")):
+                continue
+            file_base = os.path.splitext(os.path.basename(gbd_file))[0]
+            excel_output = os.path.join(download_path, f"{file_base}_{utility_provider}_processed.xlsx")
+            processor = GBDProcessor(gbd_file, excel_output, utility_provider, parse_cache=self.parse_cache)
+            success, message = processor.process_gbd()
+            if success:
+                outputs.append(excel_output)
+            else:
+                errors.append(f"{entry['file']}: {message}")
+        return outputs, errors
+
+    def run_job(self, job):
+        """Run one manifest entry and return its summary; never raises."""
+        started = time.perf_counter()
+        provider = job["utility_provider"]
+        summary = {
+            "id": job["id"],
+            "utility_provider": provider,
+            "username": job["username"],
+            "start_date": job["start_date"],
+            "end_date": job["end_date"],
+            "status": "failed",
+            "downloads": [],
+            "excel": [],
+            "excel_status": "off",
+            "errors": [],
+        }
+        try:
+            download_path = self.download_path(job)
+            os.makedirs(download_path, exist_ok=True)
+            summary["download_path"] = download_path
+            portal_job = PortalJob(
+                provider, job.get("url") or DEFAULT_URLS.get(provider, ""), job["username"], self.password(job),
+                job["start_date"], job["end_date"], download_path,
+                session_count=int(job.get("sessions") or self.sessions), headless=True,
+                fast_path=self.fast_path, profile=self.profile, sync=self.sync,
+            )
+            results = portal_job.run()
+            summary["downloads"] = [entry["file"] for entry in portal_job.downloads]
+            summary["windows"] = len(results)
+            summary["errors"] = portal_job.failures()
+            if flag(job.get("excel"), self.excel):
+                if provider not in EXCEL_PROVIDERS:
+                    # Not a failure of the job: the downloads are all there
+                    summary["excel_status"] = "not supported"
+                    print(f"Excel output is not supported for {provider} yet; skipping it for {job['username']}")
+                elif portal_job.downloads:
+                    summary["excel"], excel_errors = self.process_files(portal_job.downloads, download_path, provider)
+                    summary["errors"].extend(excel_errors)
+                    summary["excel_status"] = "ok" if not excel_errors else "partial" if summary["excel"] else "failed"
+            if not summary["errors"]:
+                summary["status"] = "ok"
+            elif summary["downloads"]:
+                summary["status"] = "partial"
+        except Exception as e:
+            summary["errors"].append(str(e))
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        with self._lock:
+            self.results.append(summary)
+            done = len(self.results)
+        print(f"[{done}/{len(self.jobs)}] {provider} {job['username']}: {summary['status']} "
+              f"({len(summary['downloads'])} files, {summary['seconds']}s)")
+        return summary
+
+    def run(self):
+        """Run every job; returns the summaries in manifest order."""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            summaries = list(executor.map(self.run_job, self.jobs))
+        return summaries
+
+
+def write_results(path, summaries, seconds):
+    """Write the machine-readable run summary."""
+    report = {
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "seconds": seconds,
+        "jobs": len(summaries),
+        "ok": sum(1 for s in summaries if s["status"] == "ok"),
+        "partial": sum(1 for s in summaries if s["status"] == "partial"),
+        "failed": sum(1 for s in summaries if s["status"] == "failed"),
+        "results": summaries,
+    }
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(temp_path, path)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download Green Button data for many logins without the GUI.")
+    parser.add_argument("manifest", help="CSV or JSON file listing the jobs")
+    parser.add_argument("--download-root", default="downloads", help="Folder for per-job download folders")
+    parser.add_argument("--results", default="batch_results.json", help="Where to write the JSON summary")
+    parser.add_argument("--concurrency", type=int, default=2, help="Jobs (logins) to run at once")
+    parser.add_argument("--sessions", type=int, default=1, help="Browser sessions per job")
+    parser.add_argument("--lean", action="store_true", help="Use the lean browser profile")
+    parser.add_argument("--fast-path", action="store_true", help="Download over HTTP after login (SDGE)")
+    parser.add_argument("--sync", action="store_true", help="Only download dates missing from each folder")
+    parser.add_argument("--excel", action="store_true", help="Process downloads to Excel")
+    args = parser.parse_args(argv)
+
+    jobs = load_manifest(args.manifest)
+    print(f"Running {len(jobs)} jobs, {args.concurrency} at a time.")
+    started = time.perf_counter()
+    runner = BatchRunner(
+        jobs, args.download_root, concurrency=args.concurrency, sessions=args.sessions,
+        profile="lean" if args.lean else "default", fast_path=args.fast_path, sync=args.sync, excel=args.excel,
+    )
+    summaries = runner.run()
+    report = write_results(args.results, summaries, round(time.perf_counter() - started, 3))
+    if runner.parse_cache.hits or runner.parse_cache.misses:
+        print(f"Parse cache: {runner.parse_cache.stats()}")
+    print(f"Done: {report['ok']} ok, {report['partial']} partial, {report['failed']} failed. "
+          f"Summary written to {args.results}")
+    return 0 if report["ok"] == report["jobs"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
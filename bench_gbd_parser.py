@@ -0,0 +1,119 @@
+# Author: SupportDone.com
+# Benchmark: GBDXMLParser interval extraction against the previous per-reading dict path
+#
+# Usage: python bench_gbd_parser.py --days 365 --meters 1 --repeat 3 [--output bench_output.txt]
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+import pandas as pd
+from gbd_parser import GBDXMLParser
+
+FEED_START = 1577836800  # 2020-01-01 00:00 UTC
+
+
+def write_feed(path, days, meters=1, interval=900, multiplier=0):
+    """Write a synthetic ESPI feed with one IntervalBlock per meter per day."""
+    readings_per_day = 86400 // interval
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<feed xmlns="http://www.w3.org/2005/Atom" xmlns:espi="http://naesb.org/espi">\n')
+        f.write('<entry><content><espi:ReadingType><espi:accumulationBehaviour>4</espi:accumulationBehaviour>'
+                '<espi:commodity>1</espi:commodity><espi:uom>72</espi:uom>'
+                f'<espi:powerOfTenMultiplier>{multiplier}</espi:powerOfTenMultiplier></espi:ReadingType></content></entry>\n')
+        for meter in range(meters):
+            moment = FEED_START
+            for _ in range(days):
+                f.write(f'<entry><content><espi:IntervalBlock><espi:interval><espi:duration>86400</espi:duration>'
+                        f'<espi:start>{moment}</espi:start></espi:interval>')
+                for _ in range(readings_per_day):
+                    value = 200 + (moment // interval) % 700 + meter
+                    f.write(f'<espi:IntervalReading><espi:timePeriod><espi:duration>{interval}</espi:duration>'
+                            f'<espi:start>{moment}</espi:start></espi:timePeriod>'
+                            f'<espi:value>{value}</espi:value></espi:IntervalReading>')
+                    moment += interval
+                f.write('</espi:IntervalBlock></content></entry>\n')
+        f.write('</feed>\n')
+
+
+def legacy_extract(parser):
+    """The extraction as it was before typed arrays: three finds and a dict per reading."""
+    all_intervals = []
+    for block in parser.interval_blocks:
+        for reading in block.findall('.//espi:IntervalReading', parser.NS):
+            start_element = reading.find('./espi:timePeriod/espi:start', parser.NS)
+            if start_element is None:
+                continue
+            start_datetime = datetime(1970, 1, 1) + timedelta(seconds=int(start_element.text))
+            duration_element = reading.find('./espi:timePeriod/espi:duration', parser.NS)
+            duration = int(duration_element.text) if duration_element is not None else 0
+            value_element = reading.find('./espi:value', parser.NS)
+            value = int(value_element.text) if value_element is not None else 0
+            all_intervals.append({'timestamp': start_datetime, 'duration': duration, 'value': value / 1000.0})
+    return pd.DataFrame(all_intervals).sort_values('timestamp')
+
+
+def measure(label, func, repeat):
+    """Best wall time over repeat runs, plus peak traced memory of one run."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"label": label, "seconds": best, "peak_mb": peak / 1e6, "rows": len(result), "result": result}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Green Button XML interval extraction.")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--meters", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    # The feed is removed with its folder even if a run fails
+    with tempfile.TemporaryDirectory(prefix="bench_gbd_") as folder:
+        path = os.path.join(folder, "feed.xml")
+        write_feed(path, args.days, args.meters)
+        dom = GBDXMLParser(path)
+        dom.parse()  # build the DOM once; the extraction step is what is compared
+
+        runs = [
+            measure("legacy dict extraction", lambda: legacy_extract(dom), args.repeat),
+            measure("typed-array extraction", dom._extract_interval_data, args.repeat),
+            measure("full parse (DOM + typed arrays)", lambda: GBDXMLParser(path).parse(), args.repeat),
+            measure("streaming parse", lambda: GBDXMLParser(path).parse_streaming(), args.repeat),
+        ]
+
+        legacy, typed = runs[0]["result"].reset_index(drop=True), runs[1]["result"].reset_index(drop=True)
+        pd.testing.assert_frame_equal(legacy, typed, check_dtype=False)
+        size = os.path.getsize(path)
+
+    lines = [
+        f"Feed: {args.days} days x {args.meters} meters, {runs[0]['rows']} readings, "
+        f"{size / 1e6:.1f} MB",
+        f"{'path':34} {'best s':>8} {'peak MB':>8} {'speedup':>8}",
+    ]
+    for run in runs:
+        lines.append(f"{run['label']:34} {run['seconds']:8.3f} {run['peak_mb']:8.1f} "
+                     f"{runs[0]['seconds'] / run['seconds']:7.1f}x")
+    lines.append("Typed-array output matches the legacy output.")
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
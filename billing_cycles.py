@@ -0,0 +1,100 @@
+# Author: SupportDone.com
+# Splits interval data into billing cycles from meter-read dates and bills every cycle in one call
+
+import numpy as np
+import pandas as pd
+from interval_aggregate import bucket_edges
+from meter_split import meter_key_columns, meter_codes, meter_label
+from tou_billing import BillingEngine
+
+NS_PER_DAY = 86400 * 1000000000
+
+
+def generate_read_dates(first, last, read_day=None):
+    """Monthly meter-read dates covering first..last.
+
+    Reads fall on read_day of each month (the first reading's day by
+    default), moved to the month's last day in shorter months. The outer
+    dates are then pulled in to the data: the first cycle starts on first
+    and the last one ends on last, so no cycle is billed a baseline for
+    days after (or before) the readings.
+    """
+    first = pd.Timestamp(first).normalize()
+    last = pd.Timestamp(last).normalize()
+    read_day = read_day or first.day
+    start_month = np.datetime64(first.strftime("%Y-%m"), "M")
+    if first.day < read_day:
+        start_month -= 1
+    month_count = (np.datetime64(last.strftime("%Y-%m"), "M") - start_month).astype(np.int64) + 3
+    months = start_month + np.arange(month_count)
+    month_days = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+    dates = months.astype("datetime64[D]") + np.minimum(read_day, month_days) - 1
+    last_read = int(np.searchsorted(dates, np.datetime64(last.date(), "D"), side="right"))
+    dates = dates[:last_read + 1].copy()
+    dates[0] = max(dates[0], np.datetime64(first.date(), "D"))
+    # A cycle ends the day before the next read date
+    dates[-1] = min(dates[-1], np.datetime64(last.date(), "D") + 1)
+    return pd.DatetimeIndex(dates.astype("datetime64[ns]"))
+
+
+def cycle_table(read_dates):
+    """One row per billing cycle between consecutive read dates; a cycle ends the day before the next read."""
+    edges = bucket_edges("cycle", None, None, pd.DatetimeIndex(read_dates).normalize())
+    starts = edges[:-1].view("datetime64[ns]")
+    ends = (edges[1:] - NS_PER_DAY).view("datetime64[ns]")
+    return pd.DataFrame({
+        "cycle": np.arange(1, len(starts) + 1),
+        "cycle_start": starts,
+        "cycle_end": ends,
+        "days": np.diff(edges) // NS_PER_DAY,
+    })
+
+
+def assign_cycles(df, read_dates):
+    """Cycle index (0-based) per row, -1 for readings before the first or after the last read date."""
+    edges = bucket_edges("cycle", None, None, pd.DatetimeIndex(read_dates).normalize())
+    starts = df["timestamp"].to_numpy("datetime64[ns]").view(np.int64)
+    cycles = np.searchsorted(edges, starts, side="right") - 1
+    cycles[cycles >= len(edges) - 1] = -1
+    return cycles
+
+
+def cycle_bills(df, read_dates=None, read_day=None, engine=None, by_meter=False):
+    """Bill every billing cycle (per meter with by_meter) in a single BillingEngine.bills call.
+
+    Without read_dates, monthly cycles are generated from the readings (see
+    generate_read_dates). Rows are assigned to cycles with one searchsorted
+    against the read dates. Each cycle is billed for all its days, so
+    baseline and season proration follow the cycle, not just the readings in
+    it; 'coverage' shows how much of the cycle has data.
+    """
+    engine = engine or BillingEngine()
+    if read_dates is None:
+        read_dates = generate_read_dates(df["timestamp"].min(), df["timestamp"].max(), read_day)
+    cycles = cycle_table(read_dates)
+    row_cycles = assign_cycles(df, read_dates)
+    inside = row_cycles >= 0
+    data = df[inside]
+    row_cycles = row_cycles[inside]
+
+    columns = meter_key_columns(data) if by_meter else []
+    if columns and len(data):
+        meter_rows, meters = meter_codes(data, columns)
+    else:
+        meter_rows, meters = np.zeros(len(data), dtype=np.int64), [None]
+    bill_ids = meter_rows * len(cycles) + row_cycles
+    bills = engine.bills(data, bill_ids, cycles["cycle_start"].to_numpy()[row_cycles],
+                         cycles["cycle_end"].to_numpy()[row_cycles])
+
+    # bill id -> meter and cycle, plus how much of each cycle the readings cover
+    bill_meters = bills["bill"].to_numpy(np.int64) // len(cycles)
+    bill_cycles = bills["bill"].to_numpy(np.int64) % len(cycles)
+    codes = pd.factorize(bill_ids)[0]
+    hours = np.bincount(codes, weights=data["duration"].to_numpy("float64") / 3600.0, minlength=len(bills))
+    bills.insert(0, "readings", np.bincount(codes, minlength=len(bills)))
+    bills.insert(1, "coverage", hours / (bills["days"].to_numpy() * 24.0))
+    bills.insert(0, "cycle", cycles["cycle"].to_numpy()[bill_cycles])
+    if columns:
+        bills.insert(0, "meter", [meter_label(meters[code]) for code in bill_meters])
+    order = np.lexsort((bill_cycles, bill_meters))
+    return bills.drop(columns=["bill"]).iloc[order].reset_index(drop=True)
@@ -0,0 +1,177 @@
+# Author: SupportDone.com
+# Watches the Chrome download folder and ties each finished file to its account
+
+import os
+import json
+import time
+import shutil
+import threading
+from datetime import datetime
+
+PARTIAL_SUFFIXES = (".crdownload", ".tmp", ".part")
+MANIFEST_NAME = "youpower_downloads.json"
+
+
+class DownloadFailed(Exception):
+    """Raised when a browser download fails, stalls or never starts."""
+
+
+class DownloadManifest:
+    """JSON record of which account and date range produced each downloaded file."""
+
+    _lock = threading.Lock()
+
+    def __init__(self, download_dir):
+        self.download_dir = download_dir
+        self.path = os.path.join(download_dir, MANIFEST_NAME)
+
+    def entries(self):
+        """Return all recorded downloads, oldest first."""
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read download manifest {self.path}: {e}")
+            return []
+
+    def record(self, entry):
+        """Append one download entry and rewrite the manifest atomically."""
+        with self._lock:
+            entries = self.entries()
+            entries.append(entry)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2)
+            os.replace(temp_path, self.path)
+        return entry
+
+    def find(self, file_path):
+        """Return the most recent entry for a downloaded file, or None."""
+        name = os.path.basename(file_path)
+        for entry in reversed(self.entries()):
+            if entry["file"] == name:
+                return entry
+        return None
+
+
+class DownloadMonitor:
+    """Detect when the download started by the last click has finished."""
+
+    POLL_INTERVAL = 0.2
+    # How long a finished file may stay empty before it counts as an empty download
+    EMPTY_SETTLE = 2.0
+
+    def __init__(self, download_dir, start_timeout=30, stall_timeout=60, total_timeout=600, destination_dir=None):
+        self.download_dir = download_dir
+        # When set, finished files are moved here from the browser's folder
+        self.destination_dir = destination_dir or download_dir
+        self.start_timeout = start_timeout
+        self.stall_timeout = stall_timeout
+        self.total_timeout = total_timeout
+        self.manifest = DownloadManifest(self.destination_dir)
+        self._before = set()
+
+    def _listing(self):
+        try:
+            return set(os.listdir(self.download_dir))
+        except FileNotFoundError:
+            return set()
+
+    @staticmethod
+    def _is_partial(name):
+        return name.lower().endswith(PARTIAL_SUFFIXES)
+
+    def arm(self):
+        """Snapshot the folder. Call right before clicking the download button."""
+        self._before = self._listing()
+
+    def _move_to_destination(self, name):
+        """Move a finished file into the destination folder without overwriting."""
+        if os.path.abspath(self.destination_dir) == os.path.abspath(self.download_dir):
+            return name
+        with DownloadManifest._lock:
+            base, ext = os.path.splitext(name)
+            target = name
+            counter = 1
+            while os.path.exists(os.path.join(self.destination_dir, target)):
+                target = f"{base} ({counter}){ext}"
+                counter += 1
+            shutil.move(os.path.join(self.download_dir, name), os.path.join(self.destination_dir, target))
+        return target
+
+    def _size(self, names):
+        total = 0
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(self.download_dir, name))
+            except OSError:
+                pass
+        return total
+
+    def wait_for_download(self, account=None, start_date=None, end_date=None, utility_provider=None):
+        """Block until a new file is complete, then record it against the account.
+
+        Returns the manifest entry. Raises DownloadFailed when nothing starts
+        within start_timeout, a partial file stops growing for stall_timeout,
+        a partial file disappears without producing a finished file, the
+        finished file is still empty after EMPTY_SETTLE seconds, or more
+        than one new file appears.
+        """
+        started = time.perf_counter()
+        last_growth = started
+        last_size = -1
+        seen_partial = False
+        empty_since = None
+
+        while True:
+            now = time.perf_counter()
+            new_names = self._listing() - self._before - {MANIFEST_NAME, MANIFEST_NAME + ".tmp"}
+            partial = {n for n in new_names if self._is_partial(n)}
+            finished = sorted(new_names - partial)
+
+            if len(finished) > 1 and not partial:
+                # Can't tell which one this click produced, so don't guess which account it belongs to
+                raise DownloadFailed(f"Several new files appeared while downloading for {account}: "
+                                     f"{', '.join(finished)}")
+            if finished and not partial:
+                name = finished[0]
+                path = os.path.join(self.download_dir, name)
+                if os.path.getsize(path) > 0:
+                    elapsed = round(now - started, 3)
+                    name = self._move_to_destination(name)
+                    print(f"Download complete: {name} ({elapsed}s)")
+                    return self.manifest.record({
+                        "file": name,
+                        "account": account,
+                        "start_date": start_date,
+                        "end_date": end_date,
+                        "utility_provider": utility_provider,
+                        "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+                        "seconds": elapsed,
+                    })
+                # Give the browser a moment to fill the file, then fail instead of waiting out total_timeout
+                if empty_since is None:
+                    empty_since = now
+                elif now - empty_since > self.EMPTY_SETTLE:
+                    raise DownloadFailed(f"Download for {account} finished but {name} is empty (0 bytes)")
+            else:
+                empty_since = None
+
+            if partial:
+                seen_partial = True
+                size = self._size(partial)
+                if size != last_size:
+                    last_size = size
+                    last_growth = now
+                elif now - last_growth > self.stall_timeout:
+                    raise DownloadFailed(f"Download stalled for {account}: {', '.join(sorted(partial))}")
+            elif seen_partial and not finished:
+                raise DownloadFailed(f"Download for {account} was cancelled or failed in the browser")
+            elif not finished and now - started > self.start_timeout:
+                raise DownloadFailed(f"No download started for {account} within {self.start_timeout}s")
+
+            if now - started > self.total_timeout:
+                raise DownloadFailed(f"Download for {account} did not finish within {self.total_timeout}s")
+            time.sleep(self.POLL_INTERVAL)
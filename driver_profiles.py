@@ -0,0 +1,174 @@
+# Author: SupportDone.com
+# Chrome profiles for the portal automation and page-load timing per profile
+#
+# Compare profiles on real pages (optionally restoring a saved login):
+#   python driver_profiles.py https://myenergycenter.com/portal/Usage/Index --provider SDGE --username someone
+
+import sys
+import argparse
+import tempfile
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from driver_resolver import chromedriver_path
+
+PROFILES = ("default", "lean")
+
+# Requests the lean profile refuses. Stylesheets are kept on purpose: the
+# waits rely on element visibility, which needs the portal's CSS.
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.m4a", "*.ogg",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*newrelic.com*", "*nr-data.net*",
+    "*adobedtm.com*", "*demdex.net*", "*omtrdc.net*", "*quantserve.com*", "*clarity.ms*",
+    "*bat.bing.com*", "*px.ads.linkedin.com*", "*qualtrics.com*", "*crazyegg.com*",
+]
+
+NAVIGATION_TIMING_JS = """
+var nav = performance.getEntriesByType('navigation')[0];
+if (!nav) { return null; }
+return {
+    dom_content_loaded: nav.domContentLoadedEventEnd,
+    load: nav.loadEventEnd,
+    transfer_kb: (nav.transferSize || 0) / 1024,
+    resources: performance.getEntriesByType('resource').length,
+    resource_kb: performance.getEntriesByType('resource').reduce(function (t, r) { return t + (r.transferSize || 0); }, 0) / 1024
+};
+"""
+
+
+def chrome_options(download_dir, profile="default", headless=False):
+    """Build ChromeOptions for a profile. The lean profile always runs headless."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown browser profile: {profile}. Expected one of: {', '.join(PROFILES)}.")
+    options = webdriver.ChromeOptions()
+    prefs = {
+        "download.default_directory": download_dir,  # Set custom download folder
+        "download.prompt_for_download": False,  # Disable prompt
+        "directory_upgrade": True,
+    }
+    if profile == "lean":
+        prefs.update({
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        })
+        options.add_argument("--disable-extensions")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--mute-audio")
+        options.page_load_strategy = "eager"
+        headless = True
+    options.add_experimental_option("prefs", prefs)
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
+    return options
+
+
+def apply_request_blocking(driver, profile):
+    """Block fonts, media, images and trackers through DevTools for the lean profile."""
+    if profile != "lean":
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+    except Exception as e:
+        print(f"Request blocking unavailable, continuing without it: {e}")
+
+
+def ready_states(profile):
+    """Document states a profile treats as loaded. Eager loading stops at 'interactive'."""
+    return ("interactive", "complete") if profile == "lean" else ("complete",)
+
+
+class PageLoadTimer:
+    """Navigation Timing for each portal page visited, per browser profile."""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.loads = []
+
+    def record(self, driver, label):
+        """Read the browser's navigation timing for the page that is currently loaded."""
+        try:
+            timing = driver.execute_script(NAVIGATION_TIMING_JS)
+        except Exception:
+            timing = None
+        if timing:
+            timing["label"] = label
+            self.loads.append(timing)
+        return timing
+
+    def summary(self):
+        """Average DOMContentLoaded (ms), load (ms) and kB transferred per page."""
+        pages = {}
+        for load in self.loads:
+            entry = pages.setdefault(load["label"], {"count": 0, "dom_content_loaded": 0.0, "load": 0.0, "kb": 0.0})
+            entry["count"] += 1
+            entry["dom_content_loaded"] += load["dom_content_loaded"] or 0
+            entry["load"] += load["load"] or 0
+            entry["kb"] += (load["transfer_kb"] or 0) + (load["resource_kb"] or 0)
+        for entry in pages.values():
+            for key in ("dom_content_loaded", "load", "kb"):
+                entry[key] = round(entry[key] / entry["count"], 1)
+        return pages
+
+    def print_report(self):
+        print(f"Page loads ({self.profile} profile):")
+        for label, entry in self.summary().items():
+            print(f"  {label}: DOMContentLoaded {entry['dom_content_loaded']}ms, "
+                  f"load {entry['load']}ms, {entry['kb']} kB ({entry['count']}x)")
+
+
+def compare_profiles(urls, session_state=None, origin_url=None, runs=1):
+    """Load each URL under every profile and print the timings side by side."""
+    from session_cache import SessionCache
+
+    results = {}
+    for profile in PROFILES:
+        timer = PageLoadTimer(profile)
+        options = chrome_options(tempfile.mkdtemp(prefix="youpower_"), profile, headless=True)
+        driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
+        try:
+            apply_request_blocking(driver, profile)
+            if session_state:
+                SessionCache.restore(driver, session_state, origin_url or urls[0])
+            for _ in range(runs):
+                for url in urls:
+                    driver.get(url)
+                    driver.execute_script("return document.readyState")
+                    timer.record(driver, url)
+        finally:
+            driver.quit()
+        results[profile] = timer.summary()
+
+    print(f"{'Page':60} {'default ms':>11} {'lean ms':>9} {'default kB':>11} {'lean kB':>9}")
+    for url in urls:
+        default = results["default"].get(url, {})
+        lean = results["lean"].get(url, {})
+        print(f"{url[:60]:60} {default.get('dom_content_loaded', '-'):>11} {lean.get('dom_content_loaded', '-'):>9} "
+              f"{default.get('kb', '-'):>11} {lean.get('kb', '-'):>9}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare page-load times of the default and lean Chrome profiles.")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--provider", help="Restore the saved session for this provider before loading pages")
+    parser.add_argument("--username", help="Username whose saved session should be restored")
+    parser.add_argument("--runs", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    session_state = None
+    if args.provider and args.username:
+        from session_cache import SessionCache
+        session_state = SessionCache().load(args.provider, args.username)
+        if session_state is None:
+            print("No saved session found; loading pages logged out.")
+    compare_profiles(args.urls, session_state, runs=args.runs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# Author: SupportDone.com
+# Local ChromeDriver cache keyed by Chrome major version, resolved once per process
+
+import os
+import json
+import time
+import shutil
+import threading
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import OperationSystemManager, ChromeType
+
+DEFAULT_DRIVER_DIR = os.path.join(os.path.expanduser("~"), ".youpower", "drivers")
+# Point this at a chromedriver binary to skip detection and downloads entirely
+DRIVER_PATH_ENV = "YOUPOWER_CHROMEDRIVER"
+
+
+class ChromeDriverResolver:
+    """Find a chromedriver matching the installed Chrome without touching the network.
+
+    Binaries live in <cache_dir>/<major>/ with an index.json describing each
+    one. The network (via ChromeDriverManager) is only used the first time a
+    Chrome major version is seen.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or DEFAULT_DRIVER_DIR
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+
+    @staticmethod
+    def binary_name():
+        return "chromedriver.exe" if os.name == "nt" else "chromedriver"
+
+    @staticmethod
+    def chrome_major_version():
+        """Read the installed Chrome version from the OS (registry or --version); None if unknown."""
+        try:
+            version = OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+        except Exception:
+            version = None
+        return version.split(".")[0] if version else None
+
+    def _index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(temp_path, self.index_path)
+
+    def cached(self, major):
+        """Return the cached driver path for a Chrome major version, if present."""
+        entry = self._index().get(str(major))
+        if entry and os.path.exists(entry["path"]):
+            return entry["path"]
+        return None
+
+    def newest_cached(self):
+        """Fallback when Chrome's version can't be read: the newest cached driver."""
+        index = self._index()
+        for major in sorted(index, key=lambda m: int(m) if m.isdigit() else -1, reverse=True):
+            if os.path.exists(index[major]["path"]):
+                return index[major]["path"]
+        return None
+
+    def download(self, major):
+        """Fetch a driver with ChromeDriverManager and copy it into the cache."""
+        installed = ChromeDriverManager().install()
+        target_dir = os.path.join(self.cache_dir, str(major or "unknown"))
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, self.binary_name())
+        shutil.copy2(installed, target)
+        index = self._index()
+        index[str(major or "unknown")] = {"path": target, "source": installed, "cached_at": time.time()}
+        self._save_index(index)
+        return target
+
+    def resolve(self):
+        """Return (path, source), where source is 'env', 'cache', 'download' or 'stale cache'."""
+        override = os.environ.get(DRIVER_PATH_ENV)
+        if override and os.path.exists(override):
+            return override, "env"
+
+        major = self.chrome_major_version()
+        if major:
+            path = self.cached(major)
+            if path:
+                return path, "cache"
+        try:
+            return self.download(major), "download"
+        except Exception as e:
+            # Offline or locked down: an older driver may still work, Chrome will say if not
+            path = self.newest_cached()
+            if path:
+                print(f"Could not download ChromeDriver ({e}); using cached {path}")
+                return path, "stale cache"
+            raise
+
+
+_resolved = {}
+_resolve_lock = threading.Lock()
+
+
+def chromedriver_path():
+    """Resolve the chromedriver once per process and share it across all sessions."""
+    with _resolve_lock:
+        if "path" not in _resolved:
+            started = time.perf_counter()
+            path, source = ChromeDriverResolver().resolve()
+            _resolved.update({"path": path, "source": source, "seconds": round(time.perf_counter() - started, 3)})
+            print(f"ChromeDriver resolved from {source} in {_resolved['seconds']}s: {path}")
+        return _resolved["path"]
+
+
+def resolution_metrics():
+    """How the driver was resolved in this process: path, source and seconds."""
+    return dict(_resolved)
@@ -0,0 +1,172 @@
+# Author: SupportDone.com
+# Processes every unprocessed GBD file in a download folder on a process pool
+#
+# Usage: python folder_processor.py <download folder> --provider PG&E [--workers 4] [--force]
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from parse_cache import file_digest
+
+PROCESSED_STATE_NAME = "youpower_processed.json"
+GBD_EXTENSIONS = (".xml", ".csv", ".zip")
+
+
+def output_path(folder, gbd_file, utility_provider):
+    """Excel path for a GBD file, named the same way as the GUI does."""
+    file_base = os.path.splitext(os.path.basename(gbd_file))[0]
+    return os.path.join(folder, f"{file_base}_{utility_provider}_processed.xlsx")
+
+
+def process_file(gbd_file, excel_output, utility_provider):
+    """Process one file in a worker process; returns a result dict instead of raising."""
+    from gbd_processor import GBDProcessor
+
+    started = time.perf_counter()
+    try:
+        success, message = GBDProcessor(gbd_file, excel_output, utility_provider).process_gbd()
+    except Exception as e:
+        success, message = False, str(e)
+    return {
+        "file": os.path.basename(gbd_file),
+        "output": os.path.basename(excel_output) if success else None,
+        "ok": bool(success),
+        "message": message,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+class FolderProcessor:
+    """Run GBDProcessor over a folder's GBD files, one Excel output per input.
+
+    youpower_processed.json records each processed file with its content hash,
+    so later runs skip files that haven't changed and pick up new or
+    re-downloaded ones.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, folder, utility_provider="PG&E", workers=None):
+        self.folder = folder
+        self.utility_provider = utility_provider
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.state_path = os.path.join(folder, PROCESSED_STATE_NAME)
+
+    def load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def find_files(self):
+        """GBD files in the folder, oldest first."""
+        files = [
+            os.path.join(self.folder, name) for name in os.listdir(self.folder)
+            if name.lower().endswith(GBD_EXTENSIONS) and os.path.isfile(os.path.join(self.folder, name))
+        ]
+        return sorted(files, key=os.path.getmtime)
+
+    def pending(self, files=None, force=False):
+        """Return [(path, digest)] for files not yet processed with their current content."""
+        state = self.load_state()
+        pending = []
+        for path in (self.find_files() if files is None else files):
+            digest = file_digest(path)
+            entry = state.get(os.path.basename(path))
+            if force or not entry or entry.get("digest") != digest \
+                    or not os.path.exists(os.path.join(self.folder, entry.get("output") or "")):
+                pending.append((path, digest))
+        return pending
+
+    def record(self, result, digest):
+        """Mark a successfully processed file in the state file."""
+        with self._lock:
+            state = self.load_state()
+            state[result["file"]] = {
+                "digest": digest,
+                "output": result["output"],
+                "utility_provider": self.utility_provider,
+                "processed_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._save_state(state)
+
+    def run(self, files=None, force=False):
+        """Process pending files (all GBD files in the folder by default); returns a summary."""
+        started = time.perf_counter()
+        all_files = self.find_files() if files is None else list(files)
+        pending = self.pending(all_files, force)
+        results = []
+
+        if pending:
+            workers = min(self.workers, len(pending))
+            print(f"Processing {len(pending)} of {len(all_files)} GBD files on {workers} processes.")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(process_file, path, output_path(self.folder, path, self.utility_provider),
+                                    self.utility_provider): digest
+                    for path, digest in pending
+                }
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    if result["ok"]:
+                        self.record(result, futures[future])
+                    status = "OK" if result["ok"] else f"FAILED: {result['message']}"
+                    print(f"  {result['file']}: {status} ({result['seconds']}s)")
+
+        seconds = round(time.perf_counter() - started, 3)
+        input_bytes = sum(os.path.getsize(path) for path, _ in pending)
+        failures = [r for r in results if not r["ok"]]
+        return {
+            "found": len(all_files),
+            "skipped": len(all_files) - len(pending),
+            "processed": len(results) - len(failures),
+            "failed": len(failures),
+            "failures": [f"{r['file']}: {r['message']}" for r in failures],
+            "outputs": [r["output"] for r in results if r["ok"]],
+            "seconds": seconds,
+            "files_per_second": round(len(results) / seconds, 2) if seconds else None,
+            "mb_per_second": round(input_bytes / 1e6 / seconds, 2) if seconds else None,
+            "results": sorted(results, key=lambda r: r["file"]),
+        }
+
+
+def print_summary(summary):
+    print(f"Found {summary['found']} GBD files: {summary['processed']} processed, "
+          f"{summary['skipped']} already done, {summary['failed']} failed "
+          f"in {summary['seconds']}s ({summary['files_per_second']} files/s, {summary['mb_per_second']} MB/s).")
+    for failure in summary["failures"]:
+        print(f"  {failure}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process every unprocessed GBD file in a folder to Excel.")
+    parser.add_argument("folder")
+    parser.add_argument("--provider", default="PG&E", choices=["PG&E", "SDGE", "SCE"])
+    parser.add_argument("--workers", type=int, default=None, help="Processes to use (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Process files even if already processed")
+    parser.add_argument("--summary", help="Also write the summary as JSON to this file")
+    args = parser.parse_args(argv)
+
+    summary = FolderProcessor(args.folder, args.provider, args.workers).run(force=args.force)
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0 if not summary["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# Author: SupportDone.com
+# Identifies Green Button downloads by content rather than file extension
+
+import io
+import os
+import zipfile
+import pandas as pd
+from sdge_csv import HEADER_PREFIX as SDGE_HEADER_PREFIX
+from pge_csv import HEADER_PREFIX as PGE_HEADER_PREFIX
+from parse_cache import PARSERS
+
+# Enough to see an Atom feed's namespaces or a CSV export's header block
+SNIFF_BYTES = 8192
+ZIP_MAGIC = b"PK\x03\x04"
+ESPI_MARKERS = ("naesb.org/espi", "IntervalBlock", "UsagePoint")
+
+FORMAT_NAMES = {
+    "espi_xml": "Green Button XML",
+    "sdge_csv": "SDG&E CSV",
+    "pge_csv": "PG&E CSV",
+    "gbd_zip": "zipped Green Button",
+}
+
+
+def detect_bytes(head):
+    """Return the format name for the first bytes of a file, or None if unrecognized."""
+    if head.startswith(ZIP_MAGIC):
+        return "gbd_zip"
+    text = head.decode("utf-8", errors="replace").lstrip("\ufeff \t\r\n")
+    if text.startswith("<"):
+        return "espi_xml" if any(marker in text for marker in ESPI_MARKERS) else None
+    for line in text.splitlines():
+        if line.startswith(SDGE_HEADER_PREFIX):
+            return "sdge_csv"
+        if line.upper().startswith(PGE_HEADER_PREFIX):
+            return "pge_csv"
+    return None
+
+
+def detect_format(path):
+    """Read the first few KB of a file and return its format name, or None."""
+    with open(path, "rb") as f:
+        return detect_bytes(f.read(SNIFF_BYTES))
+
+
+def read_zip(path):
+    """Parse every recognized member of a zipped download, straight from the archive.
+
+    Returns (DataFrame, metadata). Rows carry the member they came from in a
+    'source' column; metadata lists each member's format and header details.
+    Members that aren't Green Button data (or are nested archives) are skipped.
+    """
+    frames = []
+    members = []
+    with zipfile.ZipFile(path) as bundle:
+        for info in bundle.infolist():
+            if info.is_dir():
+                continue
+            # One decompressing stream per member: sniff the buffered head, then parse from the start
+            with io.BufferedReader(bundle.open(info), buffer_size=SNIFF_BYTES) as member:
+                file_format = detect_bytes(member.peek(SNIFF_BYTES)[:SNIFF_BYTES])
+                if file_format not in PARSERS or file_format == "gbd_zip":
+                    continue
+                df, metadata = PARSERS[file_format](member)
+            frames.append(df.assign(source=os.path.basename(info.filename)))
+            members.append({"file": info.filename, "format": file_format, "metadata": metadata})
+    if not frames:
+        raise ValueError(f"{os.path.basename(path)} contains no Green Button data")
+    df = pd.concat(frames, ignore_index=True)
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+    return df, {"members": members}
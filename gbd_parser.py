@@ -0,0 +1,264 @@
+# GBD XML Parser module for YouPower PG&E Tool
+import xml.etree.ElementTree as ET
+from array import array
+import numpy as np
+import pandas as pd
+
+class GBDXMLParser:
+    """Parser for Green Button Data XML files."""
+    
+    # ESPI namespace for Green Button Data
+    NS = {
+        'espi': 'http://naesb.org/espi',
+        'atom': 'http://www.w3.org/2005/Atom'
+    }
+    
+    # Readings per batch yielded by iter_batches
+    BATCH_SIZE = 50000
+
+    def __init__(self, xml_file_path):
+        """Initialize with the path to a Green Button Data XML file."""
+        self.xml_file_path = xml_file_path
+        self.tree = None
+        self.root = None
+        self.usage_point = None
+        self.meter_readings = []
+        self.interval_blocks = []
+        # Metadata captured by the streaming parser, which keeps no DOM
+        self.account_info = {}
+        self.reading_type = {}
+        
+    def parse(self):
+        """Parse the XML file and extract all necessary data."""
+        try:
+            # Parse the XML file
+            self.tree = ET.parse(self.xml_file_path)
+            self.root = self.tree.getroot()
+            
+            # Get the usage point information
+            self.usage_point = self.root.find('.//espi:UsagePoint', self.NS)
+            
+            # Find all meter readings (could be multiple for different metrics)
+            self.meter_readings = self.root.findall('.//espi:MeterReading', self.NS)
+            
+            # Find all interval blocks containing the actual data
+            self.interval_blocks = self.root.findall('.//espi:IntervalBlock', self.NS)
+            
+            # Extract and process the interval readings
+            data = self._extract_interval_data()
+            
+            return data
+            
+        except Exception as e:
+            print(f"Error parsing XML file: {e}")
+            raise
+            
+    def _tag(self, prefix, name):
+        return '{%s}%s' % (self.NS[prefix], name)
+
+    def _capture_metadata(self, element):
+        """Record account and reading type details from an element the streaming parser finished."""
+        tag = element.tag
+        if tag == self._tag('espi', 'ServiceAccount'):
+            account_id = element.find('./espi:accountId', self.NS)
+            if account_id is not None:
+                self.account_info.setdefault('account_id', account_id.text)
+        elif tag == self._tag('espi', 'MeterReading'):
+            meter_number = element.find('./espi:MeterSerialNumber', self.NS)
+            if meter_number is not None:
+                self.account_info.setdefault('meter_number', meter_number.text)
+        elif tag == self._tag('espi', 'ServiceDeliveryPoint'):
+            service_address = element.find('./espi:serviceAddress', self.NS)
+            if service_address is not None:
+                self.account_info.setdefault('service_address', service_address.text)
+        elif tag == self._tag('espi', 'ReadingType') and not self.reading_type:
+            for field, name in (('accumulation_behavior', 'accumulationBehaviour'),
+                                ('commodity', 'commodity'), ('uom', 'uom'),
+                                ('power_of_ten_multiplier', 'powerOfTenMultiplier')):
+                child = element.find('./espi:%s' % name, self.NS)
+                if child is not None:
+                    self.reading_type[field] = child.text
+
+    def iter_batches(self, batch_size=None):
+        """Stream the file and yield DataFrames of at most batch_size readings, in file order.
+
+        Finished elements are cleared and detached as soon as they are read, so
+        memory stays flat however large the file is. Account and reading type
+        details are collected in the same pass (see get_account_info).
+        """
+        batch_size = batch_size or self.BATCH_SIZE
+        reading_tag = self._tag('espi', 'IntervalReading')
+        start_tag = self._tag('espi', 'start')
+        duration_tag = self._tag('espi', 'duration')
+        value_tag = self._tag('espi', 'value')
+        period_tag = self._tag('espi', 'timePeriod')
+        # Containers that are dropped once finished; everything else is kept
+        # only until its entry ends
+        detach_tags = (reading_tag, self._tag('espi', 'IntervalBlock'), self._tag('atom', 'entry'))
+
+        self.account_info = {}
+        self.reading_type = {}
+        starts, durations, values = self._new_columns()
+        stack = []
+        for event, element in ET.iterparse(self.xml_file_path, events=('start', 'end')):
+            if event == 'start':
+                stack.append(element)
+                continue
+            stack.pop()
+
+            if element.tag == reading_tag:
+                period = element.find(period_tag)
+                start = period.find(start_tag) if period is not None else None
+                if start is not None:
+                    duration = period.find(duration_tag)
+                    value = element.find(value_tag)
+                    starts.append(int(start.text))
+                    durations.append(int(duration.text) if duration is not None else 0)
+                    values.append(int(value.text) if value is not None else 0)
+                    if len(starts) >= batch_size:
+                        # ESPI feeds list ReadingType before the IntervalBlocks,
+                        # so the multiplier is known by the first batch
+                        yield self._interval_frame(starts, durations, values, self.value_scale(), sort=False)
+                        starts, durations, values = self._new_columns()
+            else:
+                self._capture_metadata(element)
+
+            if element.tag in detach_tags:
+                element.clear()
+                if stack:
+                    stack[-1].remove(element)
+
+        if starts:
+            yield self._interval_frame(starts, durations, values, self.value_scale(), sort=False)
+
+    @staticmethod
+    def _new_columns():
+        """Typed buffers for start (int64 epoch s), duration (int32 s) and raw value (int64)."""
+        return array('q'), array('i'), array('q')
+
+    def value_scale(self):
+        """Factor turning raw readings into kWh: 10^powerOfTenMultiplier, Wh to kWh."""
+        multiplier = self.get_reading_type().get('power_of_ten_multiplier') or 0
+        return (10.0 ** int(multiplier)) / 1000.0
+
+    @staticmethod
+    def _interval_frame(starts, durations, values, scale, sort=True):
+        """Build the interval DataFrame from typed buffers, converting all timestamps at once."""
+        if not len(starts):
+            return pd.DataFrame(columns=['timestamp', 'duration', 'value'])
+        df = pd.DataFrame({
+            'timestamp': pd.to_datetime(np.frombuffer(starts, dtype=np.int64), unit='s').astype('datetime64[ns]'),
+            'duration': np.frombuffer(durations, dtype=np.int32),
+            'value': np.frombuffer(values, dtype=np.int64) * scale,
+        })
+        if sort and not df['timestamp'].is_monotonic_increasing:
+            df = df.sort_values('timestamp', kind='stable')
+        return df
+
+    def parse_streaming(self, batch_size=None):
+        """Single-pass equivalent of parse() that never builds the full DOM."""
+        batches = list(self.iter_batches(batch_size))
+        if not batches:
+            return pd.DataFrame(columns=['timestamp', 'duration', 'value'])
+        df = pd.concat(batches, ignore_index=True)
+        if not df['timestamp'].is_monotonic_increasing:
+            df = df.sort_values('timestamp', kind='stable')
+        return df
+
+    def _extract_interval_data(self):
+        """Extract and format the interval data from the XML."""
+        starts, durations, values = self._new_columns()
+
+        for block in self.interval_blocks:
+            readings = block.findall('.//espi:IntervalReading', self.NS)
+            block_starts = block.findall('.//espi:IntervalReading/espi:timePeriod/espi:start', self.NS)
+            block_durations = block.findall('.//espi:IntervalReading/espi:timePeriod/espi:duration', self.NS)
+            block_values = block.findall('.//espi:IntervalReading/espi:value', self.NS)
+
+            if len(block_starts) == len(block_durations) == len(block_values) == len(readings):
+                # Every reading is complete: take each column in one sweep
+                starts.extend(map(int, (e.text for e in block_starts)))
+                durations.extend(map(int, (e.text for e in block_durations)))
+                values.extend(map(int, (e.text for e in block_values)))
+                continue
+
+            for reading in readings:
+                # Readings without a start are skipped; missing duration or value count as 0
+                start_element = reading.find('./espi:timePeriod/espi:start', self.NS)
+                if start_element is None:
+                    continue
+                duration_element = reading.find('./espi:timePeriod/espi:duration', self.NS)
+                value_element = reading.find('./espi:value', self.NS)
+                starts.append(int(start_element.text))
+                durations.append(int(duration_element.text) if duration_element is not None else 0)
+                values.append(int(value_element.text) if value_element is not None else 0)
+
+        return self._interval_frame(starts, durations, values, self.value_scale())
+            
+    def get_account_info(self):
+        """Extract account information from the XML if available."""
+        if self.root is None:
+            # Streaming mode: details were captured while the file was read
+            return dict(self.account_info)
+
+        account_info = {}
+        
+        try:
+            # Try to get account identifier
+            account_id = self.root.find('.//espi:ServiceAccount/espi:accountId', self.NS)
+            if account_id is not None:
+                account_info['account_id'] = account_id.text
+                
+            # Try to get meter number
+            meter_number = self.root.find('.//espi:MeterReading/espi:MeterSerialNumber', self.NS)
+            if meter_number is not None:
+                account_info['meter_number'] = meter_number.text
+                
+            # Try to get service address
+            service_address = self.root.find('.//espi:ServiceDeliveryPoint/espi:serviceAddress', self.NS)
+            if service_address is not None:
+                account_info['service_address'] = service_address.text
+            
+            return account_info
+            
+        except Exception as e:
+            print(f"Error extracting account info: {e}")
+            return {}
+            
+    def get_reading_type(self):
+        """Get the reading type (could be energy, demand, etc.)"""
+        if self.root is None:
+            return dict(self.reading_type)
+
+        reading_type = {}
+        
+        try:
+            # Find the ReadingType element
+            reading_type_element = self.root.find('.//espi:ReadingType', self.NS)
+            
+            if reading_type_element is not None:
+                # Get the accumulation behavior (e.g., incremental reading vs. absolute)
+                accum_element = reading_type_element.find('./espi:accumulationBehaviour', self.NS)
+                if accum_element is not None:
+                    reading_type['accumulation_behavior'] = accum_element.text
+                
+                # Get the commodity (e.g., electricity, gas)
+                commodity_element = reading_type_element.find('./espi:commodity', self.NS)
+                if commodity_element is not None:
+                    reading_type['commodity'] = commodity_element.text
+                
+                # Get the units of measurement
+                uom_element = reading_type_element.find('./espi:uom', self.NS)
+                if uom_element is not None:
+                    reading_type['uom'] = uom_element.text
+
+                # Readings are value * 10^powerOfTenMultiplier in the uom
+                multiplier_element = reading_type_element.find('./espi:powerOfTenMultiplier', self.NS)
+                if multiplier_element is not None:
+                    reading_type['power_of_ten_multiplier'] = multiplier_element.text
+            
+            return reading_type
+            
+        except Exception as e:
+            print(f"Error extracting reading type: {e}")
+            return {}
@@ -0,0 +1,499 @@
+# Author: SupportDone.com
+# Green Button Data to Excel processing, shared by the GUI and the batch runner
+
+import os
+import re
+import pandas as pd
+import openpyxl
+from openpyxl.styles import Font, PatternFill, Alignment
+from gbd_format import detect_format, FORMAT_NAMES
+from parse_cache import ParseCache
+from interval_timeline import canonical_intervals
+from interval_validation import DEFAULT_TIMEZONE, format_clock, validate_intervals, normalize_to_utc
+from meter_split import split_by_meter, process_meters, meter_label, rollup
+from interval_aggregate import aggregate
+from tou_billing import BillingEngine
+from billing_cycles import cycle_bills
+from tou_periods import WEEKDAY, WEEKEND_HOLIDAY, PERIOD_LABELS
+from tariff_registry import PROVIDER_TARIFFS, DEFAULT_TARIFF
+
+# Providers process_gbd can build workbooks for
+EXCEL_PROVIDERS = ("PG&E",)
+
+
+class GBDProcessor:
+    """Process Green Button Data into formatted Excel files."""
+    
+    def __init__(self, gbd_file_path, output_path, utility_provider="PG&E", parse_cache=None,
+                 timezone=DEFAULT_TIMEZONE, normalize_utc=True, tariff=None, climate_zone=None, read_dates=None):
+        self.gbd_file_path = gbd_file_path
+        self.output_path = output_path
+        self.utility_provider = utility_provider
+        # Share one ParseCache across processors to accumulate hit/miss counts
+        self.parse_cache = parse_cache or ParseCache()
+        self.metadata = None
+        # Local time zone of the meter, for wall-clock CSV times and DST checks
+        self.timezone = timezone
+        self.normalize_utc = normalize_utc
+        self.validation = None
+        # Per-meter duplicate, conflict and gap counts from the last parse
+        self.timelines = []
+        # Usage summary per meter and for the whole account from the last run
+        self.meter_summaries = []
+        self.account_summary = None
+        self.meter_outputs = []
+        # Bills computed in Python: one per meter and one for the account
+        self.tariff = tariff or PROVIDER_TARIFFS.get(utility_provider, DEFAULT_TARIFF)
+        self.billing_engine = BillingEngine(self.tariff, climate_zone)
+        self.meter_bills = None
+        self.account_bill = None
+        # Meter-read dates for the billing cycles; monthly cycles are generated without them
+        self.read_dates = read_dates
+        self.account_cycles = None
+        self.meter_cycles = None
+        
+    def process_pge_gbd(self):
+        """Process PG&E Green Button Data into formatted Excel."""
+        try:
+            # Identify the file by its content so mislabelled or zipped downloads still parse
+            file_format = detect_format(self.gbd_file_path)
+            if file_format:
+                print(f"Processing {FORMAT_NAMES[file_format]} file: {self.gbd_file_path}")
+                # Unchanged files come from the parse cache
+                df, self.metadata = self.parse_cache.load(self.gbd_file_path, file_format)
+                # Check for gaps, repeats and DST hours before anything is merged or priced
+                clock = format_clock(file_format, self.metadata, df)
+                self.validation = validate_intervals(df, clock, self.timezone)
+                if not self.validation.ok:
+                    print("\n".join(self.validation.lines()))
+                if self.normalize_utc:
+                    # Keeps both fall-back hours apart and puts ESPI (UTC) times on the local clock
+                    df = normalize_to_utc(df, self.validation)
+                # One sorted reading per interval per meter, even when a bundle overlaps itself
+                df, self.timelines = canonical_intervals(df)
+                for timeline in self.timelines:
+                    if timeline["duplicates"] or timeline["overlaps"] or timeline["gaps"]:
+                        print(f"Meter {timeline['meter']}: {timeline['duplicates']} duplicate, "
+                              f"{timeline['conflicts']} conflicting, {timeline['overlaps']} overlapping readings; "
+                              f"{timeline['gaps']} gaps")
+                
+            elif self.gbd_file_path.lower().endswith('.csv'):
+                # Read CSV (typical format for GBD)
+                print(f"Processing CSV file: {self.gbd_file_path}")
+                df = pd.read_csv(self.gbd_file_path)
+                
+                # Basic data cleaning
+                # Identify timestamp column - column names might vary
+                timestamp_cols = [col for col in df.columns if 'time' in col.lower() or 'date' in col.lower()]
+                if timestamp_cols:
+                    time_col = timestamp_cols[0]
+                    df[time_col] = pd.to_datetime(df[time_col])
+                    df = df.sort_values(by=time_col)
+                
+                # Identify usage column - column names might vary
+                usage_cols = [col for col in df.columns if 'usage' in col.lower() or 'value' in col.lower() or 'kwh' in col.lower()]
+                if usage_cols:
+                    usage_col = usage_cols[0]
+                else:
+                    # If no obvious column, assume it's the first numeric column
+                    numeric_cols = df.select_dtypes(include=['number']).columns
+                    if len(numeric_cols) > 0:
+                        usage_col = numeric_cols[0]
+                    else:
+                        raise ValueError("Could not identify usage data column in CSV")
+            else:
+                raise ValueError(f"Unsupported file format: {self.gbd_file_path}")
+                
+            if not {'timestamp', 'duration', 'value'}.issubset(df.columns):
+                # Unrecognized CSV layouts only get the template workbook
+                self.create_pge_excel_output(df)
+                return True, f"Successfully processed {self.gbd_file_path} to {self.output_path}"
+            
+            # Commercial accounts export several meters in one file: summarize
+            # each meter side by side, plus the account as a whole
+            meter_parts = split_by_meter(df)
+            meter_results, self.account_summary = process_meters(meter_parts, periods=self.billing_engine.periods)
+            self.meter_summaries = list(meter_results.values())
+            
+            # Create output Excel file using a template or from scratch
+            # For PG&E TOU-C calculations as per requirements
+            account_df = df if len(meter_parts) == 1 else rollup(df)
+            self.account_bill = self.billing_engine.bill(account_df)
+            self.meter_bills = self.billing_engine.bills(df, self.meter_ids(df, meter_parts))
+            self.account_cycles = cycle_bills(account_df, self.read_dates, engine=self.billing_engine)
+            self.create_pge_excel_output(df, meter_summaries=self.meter_summaries + [self.account_summary],
+                                         rollups=self.usage_rollups(account_df), bill=self.account_bill,
+                                         cycles=self.account_cycles)
+            
+            # One workbook per meter next to the account workbook
+            self.meter_outputs = []
+            if len(meter_parts) > 1:
+                # Every meter's cycles in one billing call
+                self.meter_cycles = cycle_bills(df, self.read_dates, engine=self.billing_engine, by_meter=True)
+                for code, (meter, part) in enumerate(meter_parts.items()):
+                    meter_output = self.meter_output_path(meter)
+                    meter_bill = self.meter_bills.iloc[code].to_dict()
+                    meter_cycles = self.meter_cycles[self.meter_cycles["meter"] == meter_label(meter)]
+                    if not self.create_pge_excel_output(part, meter_output, [meter_results[meter]],
+                                                        self.usage_rollups(part), meter_bill, meter_cycles):
+                        raise ValueError(f"Could not create the workbook for meter {meter_label(meter)}")
+                    self.meter_outputs.append(meter_output)
+                return True, (f"Successfully processed {self.gbd_file_path} to {self.output_path} "
+                              f"and {len(self.meter_outputs)} meter workbooks")
+            
+            return True, f"Successfully processed {self.gbd_file_path} to {self.output_path}"
+            
+        except Exception as e:
+            print(f"Error processing GBD file: {e}")
+            return False, str(e)
+    
+    def meter_output_path(self, meter):
+        """Workbook path for one meter of a multi-meter file."""
+        file_base, extension = os.path.splitext(self.output_path)
+        safe_meter = re.sub(r"[^A-Za-z0-9._-]+", "_", meter_label(meter)).strip("_")
+        return f"{file_base}_meter_{safe_meter}{extension}"
+    
+    @staticmethod
+    def meter_ids(df, meter_parts):
+        """Meter code per row, in meter_parts order, for billing every meter in one call."""
+        if len(meter_parts) == 1:
+            return None
+        ids = pd.Series(0, index=df.index)
+        for code, part in enumerate(meter_parts.values()):
+            ids.loc[part.index] = code
+        return ids
+    
+    def usage_rollups(self, df):
+        """Daily and monthly usage tables for the workbook."""
+        return {"Daily Usage": aggregate(df, "day"), "Monthly Usage": aggregate(df, "month")}
+    
+    def create_pge_excel_output(self, data_df, output_path=None, meter_summaries=None, rollups=None, bill=None,
+                                cycles=None):
+        """Create formatted Excel file with PG&E TOU-C calculations."""
+        output_path = output_path or self.output_path
+        try:
+            # The version of the tariff in effect at the start of the bill
+            tariff = self.billing_engine.registry.get(self.tariff, bill["billing_start"] if bill else None)
+            winter = tariff.season_multipliers["winter"]
+            
+            # Create a new workbook with sheets for data and calculations
+            wb = openpyxl.Workbook()
+            
+            # Get the active sheet (first sheet)
+            ws = wb.active
+            ws.title = "Data"
+            
+            # Create additional sheets for calculations
+            pricing_sheet = wb.create_sheet("Pricing Variables")
+            baseline_sheet = wb.create_sheet("Baseline Allowances")
+            weekday_time_sheet = wb.create_sheet("Weekday Time Table")
+            weekend_time_sheet = wb.create_sheet("Weekend & Holiday Time Table")
+            
+            # Set up header section in Data sheet
+            ws['A1'] = "Name"
+            ws['B1'] = "Value"
+            ws['K1'] = "Consumption"
+            ws['L1'] = "Solar"
+            ws['M1'] = "Delivery"
+            
+            # Address and account info
+            ws['A2'] = "Address"
+            ws['A3'] = "Account Number"
+            ws['A4'] = "Climate Zone"
+            ws['B4'] = "=VLOOKUP(LEFT(B2,1),'Baseline Allowances'!$A$1:$C$12,1,FALSE)"
+            
+            # Create On-Peak/Off-Peak summary
+            ws['J2'] = "On-Peak"
+            ws['J3'] = "Off-Peak"
+            ws['K2'] = "=SUMIF($J$15:$J$3086,1,$E$15:$E$3086)"
+            ws['K3'] = "=SUMIF($J$15:$J$3086,2,$E$15:$E$3086)"
+            ws['L2'] = "=SUMIF($J$15:$J$3086,1,$F$15:$F$3086)"
+            ws['L3'] = "=SUMIF($J$15:$J$3086,2,$F$15:$F$3086)"
+            
+            # Baseline calculation section
+            ws['A6'] = "Baseline Information"
+            ws['B6'] = "Value"
+            ws['A7'] = "Billing Start Date"
+            ws['A8'] = "Billing End Date"
+            ws['A9'] = "Days in Billing"
+            ws['B9'] = "=DATEDIF(B7,B8,\"D\")+1"
+            ws['A10'] = "Season"
+            summer_months = ",".join(str(month) for month in tariff.season_months["summer"])
+            ws['B10'] = f"=IF(OR(MONTH(B7)={{{summer_months}}}),\"Summer\",\"Winter\")"
+            ws['A11'] = "Daily Baseline"
+            ws['B11'] = "=VLOOKUP(B4,'Baseline Allowances'!$A$1:$C$12,IF(B10=\"Summer\",2,3),FALSE)"
+            ws['A12'] = "Total Baseline"
+            ws['B12'] = "=B11*B9"
+            
+            # Consumption and Tier Analysis
+            ws['A14'] = "Usage Analysis"
+            ws['B14'] = "Value"
+            ws['A15'] = "Total Consumption"
+            ws['B15'] = "=SUM(K2:K3)"
+            ws['A16'] = "Tier 1 Usage (0-100%)"
+            ws['B16'] = "=MIN(B15,B12)"
+            ws['A17'] = "Tier 2 Usage (101-130%)"
+            ws['B17'] = f"=MIN(MAX(0,B15-B16),B12*{tariff.tier_sizes[1]})"
+            ws['A18'] = "Tier 3 Usage (>130%)"
+            ws['B18'] = "=MAX(0,B15-B16-B17)"
+            
+            # Set up rate calculation section
+            ws['A29'] = "Time Period"
+            ws['B29'] = "Tier"
+            ws['C29'] = "Consumption"
+            ws['D29'] = "Rate"
+            ws['E29'] = "Cost"
+            
+            # On-Peak tiers
+            ws['A30'] = "On-Peak"
+            ws['B30'] = "1"
+            ws['C30'] = "=MIN(K2,B16)"
+            ws['D30'] = f"=INDEX('Pricing Variables'!$A$1:$E$6,MATCH(1,'Pricing Variables'!$A:$A,0),3) * IF(B10=\"Summer\",1,{winter})"
+            ws['E30'] = "=C30*D30"
+            
+            ws['A31'] = "On-Peak"
+            ws['B31'] = "2"
+            ws['C31'] = "=MIN(MAX(0,K2-C30),B17)"
+            ws['D31'] = f"=INDEX('Pricing Variables'!$A$1:$E$6,MATCH(1,'Pricing Variables'!$A:$A,0),4) * IF(B10=\"Summer\",1,{winter})"
+            ws['E31'] = "=C31*D31"
+            
+            ws['A32'] = "On-Peak"
+            ws['B32'] = "3"
+            ws['C32'] = "=MAX(0,K2-C30-C31)"
+            ws['D32'] = f"=INDEX('Pricing Variables'!$A$1:$E$6,MATCH(1,'Pricing Variables'!$A:$A,0),5) * IF(B10=\"Summer\",1,{winter})"
+            ws['E32'] = "=C32*D32"
+            
+            # Off-Peak tiers
+            ws['A33'] = "Off-Peak"
+            ws['B33'] = "1"
+            ws['C33'] = "=MIN(K3,MAX(0,B16-C30))"
+            ws['D33'] = f"=INDEX('Pricing Variables'!$A$1:$E$6,MATCH(2,'Pricing Variables'!$A:$A,0),3) * IF(B10=\"Summer\",1,{winter})"
+            ws['E33'] = "=C33*D33"
+            
+            ws['A34'] = "Off-Peak"
+            ws['B34'] = "2"
+            ws['C34'] = "=MIN(MAX(0,K3-C33),MAX(0,B17-C31))"
+            ws['D34'] = f"=INDEX('Pricing Variables'!$A$1:$E$6,MATCH(2,'Pricing Variables'!$A:$A,0),4) * IF(B10=\"Summer\",1,{winter})"
+            ws['E34'] = "=C34*D34"
+            
+            ws['A35'] = "Off-Peak"
+            ws['B35'] = "3"
+            ws['C35'] = "=MAX(0,K3-C33-C34)"
+            ws['D35'] = f"=INDEX('Pricing Variables'!$A$1:$E$6,MATCH(2,'Pricing Variables'!$A:$A,0),5) * IF(B10=\"Summer\",1,{winter})"
+            ws['E35'] = "=C35*D35"
+            
+            # Bill Summary section
+            ws['A39'] = "Bill Component"
+            ws['B39'] = "Amount"
+            ws['A40'] = "On-Peak Charges"
+            ws['B40'] = "=SUM(E30:E32)"
+            ws['A41'] = "Off-Peak Charges"
+            ws['B41'] = "=SUM(E33:E35)"
+            ws['A42'] = "Monthly Service Fee"
+            ws['B42'] = tariff.service_fee
+            ws['A43'] = "Total Bill"
+            ws['B43'] = "=SUM(B40:B42)"
+            
+            # Set up header for Green Button Data (starting row 15)
+            ws['A14'] = "Date"
+            ws['B14'] = "Timestamp"
+            ws['E14'] = "Usage"
+            ws['F14'] = "Solar"
+            ws['H14'] = "Hour"
+            ws['I14'] = "Day Type"
+            ws['J14'] = "Period Code"
+            ws['K14'] = "Tier"
+            ws['L14'] = "Rate"
+            ws['M14'] = "Cost"
+            
+            # Create formulas for GBD rows
+            # (These would be populated for each row of actual GBD data)
+            
+            # Set up Pricing Variables sheet
+            pricing_sheet['A1'] = "Period Code"
+            pricing_sheet['B1'] = "Description"
+            pricing_sheet['C1'] = "Tier 1 Rate"
+            pricing_sheet['D1'] = "Tier 2 Rate"
+            pricing_sheet['E1'] = "Tier 3 Rate"
+            
+            # Rates, baselines and the values in the Data sheet formulas come from the tariff registry
+            for row, (code, name) in enumerate(zip(tariff.period_order, tariff.period_names), start=2):
+                pricing_sheet[f'A{row}'] = code
+                pricing_sheet[f'B{row}'] = PERIOD_LABELS[code]
+                for col, rate in enumerate(tariff.base_rates[name], start=3):
+                    pricing_sheet.cell(row=row, column=col).value = rate
+            
+            # Set up Baseline Allowances sheet
+            baseline_sheet['A1'] = "Climate Zone"
+            baseline_sheet['B1'] = "Summer Baseline"
+            baseline_sheet['C1'] = "Winter Baseline"
+            
+            for row, (zone, (summer, winter)) in enumerate(tariff.baselines.items(), start=2):
+                baseline_sheet[f'A{row}'] = zone
+                baseline_sheet[f'B{row}'] = summer
+                baseline_sheet[f'C{row}'] = winter
+            
+            # Set up time tables
+            # Weekday time table
+            weekday_time_sheet['A1'] = "Hour"
+            for i in range(24):
+                weekday_time_sheet[f'A{i+2}'] = i
+                
+            for month in range(1, 13):
+                weekday_time_sheet[f'{chr(65+month)}1'] = month
+                
+            # Fill in the time periods (1=On-Peak, 2=Off-Peak)
+            # From the same period table the billing engine uses
+            for row, periods in enumerate(self.billing_engine.periods.grid(WEEKDAY), start=2):
+                for col, period in enumerate(periods, start=2):  # B-M for months 1-12
+                    weekday_time_sheet.cell(row=row, column=col).value = int(period)
+            
+            # Weekend time table
+            weekend_time_sheet['A1'] = "Hour"
+            for i in range(24):
+                weekend_time_sheet[f'A{i+2}'] = i
+                
+            for month in range(1, 13):
+                weekend_time_sheet[f'{chr(65+month)}1'] = month
+                
+            for row, periods in enumerate(self.billing_engine.periods.grid(WEEKEND_HOLIDAY), start=2):
+                for col, period in enumerate(periods, start=2):  # B-M for months 1-12
+                    weekend_time_sheet.cell(row=row, column=col).value = int(period)
+            
+            # The tariff's holidays in the data range, which are priced with the weekend table
+            weekend_time_sheet['O1'] = "Holiday"
+            weekend_time_sheet['P1'] = "Date"
+            if 'timestamp' in data_df and len(data_df):
+                holidays = self.billing_engine.periods.calendar().holidays(data_df['timestamp'].min(), data_df['timestamp'].max())
+                for row, holiday in enumerate(holidays.itertuples(index=False), start=2):
+                    weekend_time_sheet[f'O{row}'] = holiday.holiday
+                    weekend_time_sheet[f'P{row}'] = holiday.date.to_pydatetime()
+            
+            # Apply formatting
+            # Freeze panes
+            ws.freeze_panes = ws['A15']
+            
+            # Apply styles for headers, etc.
+            header_font = Font(bold=True)
+            header_fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
+            
+            for cell in ws[1]:
+                cell.font = header_font
+                cell.fill = header_fill
+                
+            for cell in ws[14]:
+                cell.font = header_font
+                cell.fill = header_fill
+                
+            if meter_summaries:
+                self.add_meter_sheet(wb, meter_summaries, header_font, header_fill)
+            if bill:
+                # Billing dates drive the Data sheet's baseline formulas
+                ws['B7'] = bill["billing_start"].to_pydatetime()
+                ws['B8'] = bill["billing_end"].to_pydatetime()
+                self.add_bill_sheet(wb, bill, header_font, header_fill)
+            if cycles is not None and len(cycles):
+                self.add_cycle_sheet(wb, cycles, header_font, header_fill)
+            for title, rollup_df in (rollups or {}).items():
+                self.add_rollup_sheet(wb, title, rollup_df, header_font, header_fill)
+                
+            # Save the workbook
+            wb.save(output_path)
+            
+            print(f"Excel file created at {output_path}")
+            return True
+            
+        except Exception as e:
+            print(f"Error creating Excel output: {e}")
+            return False
+    
+    def add_meter_sheet(self, wb, meter_summaries, header_font, header_fill):
+        """Add a Meters sheet with one usage summary row per meter (and the account total)."""
+        meter_sheet = wb.create_sheet("Meters")
+        columns = [
+            ("Meter", "meter"), ("Readings", "readings"), ("Start", "start"), ("End", "end"),
+            ("Consumption (kWh)", "consumption_kwh"), ("Generation (kWh)", "generation_kwh"),
+            ("Net (kWh)", "net_kwh"), ("On-Peak (kWh)", "on_peak_kwh"), ("Off-Peak (kWh)", "off_peak_kwh"),
+            ("Peak Demand (kW)", "peak_kw"), ("Peak At", "peak_at"), ("Load Factor", "load_factor"),
+        ]
+        meter_sheet.append([title for title, _ in columns])
+        for cell in meter_sheet[1]:
+            cell.font = header_font
+            cell.fill = header_fill
+        for summary in meter_summaries:
+            row = [summary.get(field) for _, field in columns]
+            row[0] = meter_label(row[0]) if row[0] is not None else "Meter"
+            meter_sheet.append(row)
+    
+    def add_bill_sheet(self, wb, bill, header_font, header_fill):
+        """Add a Bill sheet with the bill computed by BillingEngine."""
+        bill_sheet = wb.create_sheet("Bill")
+        bill_sheet.append(["Bill Component", "Value"])
+        for cell in bill_sheet[1]:
+            cell.font = header_font
+            cell.fill = header_fill
+        for field, value in bill.items():
+            if field == "bill":
+                continue
+            if isinstance(value, pd.Timestamp):
+                value = value.to_pydatetime()
+            elif hasattr(value, "item"):
+                value = value.item()
+            bill_sheet.append([field.replace("_", " ").title().replace("Kwh", "(kWh)"), value])
+        bill_sheet.column_dimensions['A'].width = 28
+    
+    def add_cycle_sheet(self, wb, cycles, header_font, header_fill):
+        """Add a Billing Cycles sheet with one bill per cycle from billing_cycles.cycle_bills."""
+        cycle_sheet = wb.create_sheet("Billing Cycles")
+        columns = [
+            ("Cycle", "cycle"), ("Start", "billing_start"), ("End", "billing_end"), ("Days", "days"),
+            ("Readings", "readings"), ("Coverage", "coverage"), ("Season", "season"),
+            ("Baseline (kWh)", "total_baseline"), ("Consumption (kWh)", "total_kwh"),
+        ]
+        columns += [(field[:-len("_charges")].replace("_", " ").title().replace("Off Peak", "Off-Peak")
+                     .replace("On Peak", "On-Peak") + " Charges", field)
+                    for field in cycles.columns if field.endswith("_charges")]
+        columns += [("Service Fee", "service_fee"), ("Total Bill", "total_bill")]
+        cycle_sheet.append([heading for heading, _ in columns])
+        for cell in cycle_sheet[1]:
+            cell.font = header_font
+            cell.fill = header_fill
+        values = cycles[[field for _, field in columns]].astype(object)
+        for row in values.where(values.notna(), None).itertuples(index=False):
+            cycle_sheet.append([value.to_pydatetime() if isinstance(value, pd.Timestamp) else value
+                                for value in row])
+        cycle_sheet.freeze_panes = cycle_sheet['A2']
+    
+    def add_rollup_sheet(self, wb, title, rollup_df, header_font, header_fill):
+        """Add a sheet with one row per period from interval_aggregate.aggregate."""
+        rollup_sheet = wb.create_sheet(title)
+        columns = [
+            ("Period Start", "period_start"), ("Period End", "period_end"), ("Readings", "readings"),
+            ("Coverage", "coverage"), ("Consumption (kWh)", "consumption_kwh"),
+            ("Generation (kWh)", "generation_kwh"), ("Net (kWh)", "net_kwh"), ("Peak Demand (kW)", "peak_kw"),
+            ("Peak At", "peak_at"), ("Average Demand (kW)", "average_kw"), ("Load Factor", "load_factor"),
+        ]
+        rollup_sheet.append([heading for heading, _ in columns])
+        for cell in rollup_sheet[1]:
+            cell.font = header_font
+            cell.fill = header_fill
+        values = rollup_df[[field for _, field in columns]].astype(object)
+        for row in values.where(values.notna(), None).itertuples(index=False):
+            rollup_sheet.append([value.to_pydatetime() if isinstance(value, pd.Timestamp) else value
+                                 for value in row])
+        rollup_sheet.freeze_panes = rollup_sheet['A2']
+    
+    def process_gbd(self):
+        """Process GBD file based on utility provider."""
+        if self.utility_provider == "PG&E":
+            return self.process_pge_gbd()
+        elif self.utility_provider == "SDGE":
+            # Placeholder for SDGE processing logic
+            print("SDGE processing not yet implemented")
+            return False, "SDGE processing not yet implemented"
+        elif self.utility_provider == "SCE":
+            # Placeholder for SCE processing logic
+            print("SCE processing not yet implemented")
+            return False, "SCE processing not yet implemented"
+        else:
+            return False, f"Unknown utility provider: {self.utility_provider}"
@@ -0,0 +1,199 @@
+# Author: SupportDone.com
+# Browser-free Green Button downloads using the cookies of a logged-in session
+
+import os
+import re
+import time
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from download_monitor import DownloadManifest
+
+# Export request the Usage page is ASSUMED to make when the Green Button
+# download button is clicked. It has not been checked against a recorded
+# request to the real portal, and portal_stub_server.py serves the same
+# guess, so the stub only shows the two agree. When the portal answers with
+# 404/405 or a web page, the client stops using it (ExportUnavailable) and
+# PortalJob downloads everything in the browser instead. Paths are relative
+# to the portal origin so the client can be pointed at the stub.
+GREEN_BUTTON_EXPORTS = {
+    "SDGE": {
+        "origin": "https://myenergycenter.com",
+        "path": "/portal/Usage/GreenButtonExport",
+        "method": "GET",
+    },
+}
+
+
+class ExportUnavailable(Exception):
+    """Raised when the export endpoint is missing or answers with a web page instead of a file."""
+
+
+class SessionExpired(ExportUnavailable):
+    """Raised when the portal answers an export with its login page."""
+
+
+class GreenButtonHttpClient:
+    """Download Green Button exports over a pooled HTTP session instead of the browser."""
+
+    def __init__(self, utility_provider, download_path, origin=None, max_workers=4, timeout=120, on_step=None):
+        if utility_provider not in GREEN_BUTTON_EXPORTS:
+            raise ValueError(f"No HTTP export endpoint known for {utility_provider}")
+        self.utility_provider = utility_provider
+        self.endpoint = GREEN_BUTTON_EXPORTS[utility_provider]
+        self.origin = (origin or self.endpoint["origin"]).rstrip("/")
+        self.download_path = download_path
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.on_step = on_step
+        self.manifest = DownloadManifest(download_path)
+        self._name_lock = threading.Lock()
+        # Set once the endpoint turns out not to exist; later exports are not attempted
+        self.unavailable = threading.Event()
+
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_driver(cls, driver, utility_provider, download_path, login_url=None, **kwargs):
+        """Build a client that shares the cookies and user agent of a logged-in WebDriver."""
+        origin = None
+        if login_url:
+            parts = urlsplit(login_url)
+            origin = f"{parts.scheme}://{parts.netloc}"
+        client = cls(utility_provider, download_path, origin=origin, **kwargs)
+        client.load_cookies(driver.get_cookies(), driver.execute_script("return navigator.userAgent;"))
+        return client
+
+    def load_cookies(self, cookies, user_agent=None):
+        """Copy browser cookies into the HTTP session."""
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain", ""), path=cookie.get("path", "/"),
+            )
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent
+
+    @staticmethod
+    def account_number(account):
+        """Pull the account number out of a dropdown label such as '2100... - 962 S MOLLISON AVE'."""
+        if not account:
+            return None
+        match = re.search(r"\d{8,}", account)
+        return match.group(0) if match else account.strip()
+
+    @staticmethod
+    def portal_date(date_string):
+        """Format a yyyy-mm-dd date the way the portal's date pickers submit it."""
+        return datetime.strptime(date_string, "%Y-%m-%d").strftime("%B %d, %Y")
+
+    def _filename(self, response, account_number, start_date, end_date):
+        disposition = response.headers.get("Content-Disposition", "")
+        match = re.search(r'filename="?([^";]+)"?', disposition)
+        if match:
+            return os.path.basename(match.group(1))
+        extension = ".xml" if "xml" in response.headers.get("Content-Type", "") else ".csv"
+        return f"GreenButton_{account_number or 'account'}_{start_date}_{end_date}{extension}"
+
+    def _unique_path(self, name):
+        base, ext = os.path.splitext(name)
+        target = name
+        counter = 1
+        while os.path.exists(os.path.join(self.download_path, target)):
+            target = f"{base} ({counter}){ext}"
+            counter += 1
+        return target
+
+    def export(self, account, start_date, end_date):
+        """Fetch one account's export and record it in the download manifest."""
+        started = time.perf_counter()
+        account_number = self.account_number(account)
+        params = {"fromDate": self.portal_date(start_date), "toDate": self.portal_date(end_date)}
+        if account_number:
+            params["accountNumber"] = account_number
+
+        url = self.origin + self.endpoint["path"]
+        if self.endpoint["method"] == "POST":
+            response = self.session.post(url, data=params, timeout=self.timeout, stream=True)
+        else:
+            response = self.session.get(url, params=params, timeout=self.timeout, stream=True)
+        if response.status_code in (404, 405):
+            self.unavailable.set()
+            raise ExportUnavailable(f"No export endpoint at {url} (HTTP {response.status_code})")
+        response.raise_for_status()
+        if "text/html" in response.headers.get("Content-Type", ""):
+            # A login page (expired session) or an error page: either way the browser has to do it
+            self.unavailable.set()
+            raise SessionExpired(f"Portal returned a web page instead of an export for {account}")
+
+        with self._name_lock:
+            name = self._unique_path(self._filename(response, account_number, start_date, end_date))
+            # Reserve the name so parallel exports never write the same file
+            open(os.path.join(self.download_path, name), "wb").close()
+        part_path = os.path.join(self.download_path, name + ".part")
+        try:
+            with open(part_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=65536):
+                    f.write(chunk)
+            os.replace(part_path, os.path.join(self.download_path, name))
+        except Exception:
+            for path in (part_path, os.path.join(self.download_path, name)):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+
+        elapsed = round(time.perf_counter() - started, 3)
+        print(f"Download complete: {name} ({elapsed}s, HTTP)")
+        if self.on_step:
+            self.on_step()
+        return self.manifest.record({
+            "file": name,
+            "account": account,
+            "start_date": start_date,
+            "end_date": end_date,
+            "utility_provider": self.utility_provider,
+            "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+            "seconds": elapsed,
+        })
+
+    def _export_result(self, index, account, start_date, end_date):
+        started = time.perf_counter()
+        try:
+            if self.unavailable.is_set():
+                raise ExportUnavailable("HTTP export unavailable, left for the browser")
+            entry = self.export(account, start_date, end_date)
+            return {"session": "http", "index": index, "account": account, "ok": True, "error": None,
+                    "download": entry, "seconds": round(time.perf_counter() - started, 3),
+                    "start_date": start_date, "end_date": end_date}
+        except Exception as e:
+            return {"session": "http", "index": index, "account": account, "ok": False, "error": str(e),
+                    "download": None, "seconds": round(time.perf_counter() - started, 3),
+                    "start_date": start_date, "end_date": end_date}
+
+    def export_all(self, accounts, start_date, end_date):
+        """Export every work item concurrently; one result per item, in order.
+
+        Items are (index, name) pairs or (index, name, start_date, end_date).
+        """
+        items = [tuple(item) if len(item) == 4 else (item[0], item[1], start_date, end_date) for item in accounts]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._export_result, index, account, item_start, item_end)
+                for index, account, item_start, item_end in items
+            ]
+            results = [future.result() for future in futures]
+        for result in results:
+            status = "OK" if result["ok"] else f"FAILED: {result['error']}"
+            print(f"[http] {result['account'] or 'current account'}: {status}")
+        return results
+
+    def close(self):
+        self.session.close()
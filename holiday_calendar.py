@@ -0,0 +1,128 @@
+# Author: SupportDone.com
+# Utility holiday calendar: a precomputed day-type index for pricing holidays like weekends
+
+import functools
+import numpy as np
+import pandas as pd
+from tou_periods import WEEKDAY, WEEKEND_HOLIDAY, EPOCH_WEEKDAY, MINUTES_PER_DAY, NS_PER_MINUTE
+
+FIRST_YEAR = 1970
+LAST_YEAR = 2069
+NS_PER_DAY = MINUTES_PER_DAY * NS_PER_MINUTE
+MONDAY = 0
+THURSDAY = 3
+# Holidays a tariff can list by name (see tariff_registry): (name, month, day) for fixed
+# dates, (name, month, weekday, n) for the nth weekday of the month (n = -1 is the last)
+UTILITY_HOLIDAYS = (
+    ("New Year's Day", 1, 1),
+    ("Presidents' Day", 2, MONDAY, 3),
+    ("Memorial Day", 5, MONDAY, -1),
+    ("Independence Day", 7, 4),
+    ("Labor Day", 9, MONDAY, 1),
+    ("Veterans Day", 11, 11),
+    ("Thanksgiving Day", 11, THURSDAY, 4),
+    ("Christmas Day", 12, 25),
+)
+HOLIDAY_RULES = {rule[0]: rule for rule in UTILITY_HOLIDAYS}
+
+
+def holiday_rules(names):
+    """The UTILITY_HOLIDAYS rules for a list of holiday names, as a tuple usable as a cache key."""
+    unknown = [name for name in names if name not in HOLIDAY_RULES]
+    if unknown:
+        raise ValueError(f"Unknown holidays {', '.join(unknown)}; use any of {', '.join(HOLIDAY_RULES)}")
+    return tuple(HOLIDAY_RULES[name] for name in names)
+
+
+def _weekdays(days):
+    return (days + EPOCH_WEEKDAY) % 7
+
+
+def _month_starts(years, month):
+    """Epoch day numbers of the first of month in each year."""
+    months = (years - 1970) * 12 + (month - 1)
+    return months.astype("datetime64[M]").astype("datetime64[D]").view(np.int64)
+
+
+def holiday_days(rule, years):
+    """Epoch day numbers a holiday rule is observed on, one per year.
+
+    Fixed-date holidays on a Saturday are observed the Friday before and on a
+    Sunday the Monday after, as the tariffs use the legally observed dates.
+    """
+    if len(rule) == 3:
+        _, month, day = rule
+        days = _month_starts(years, month) + day - 1
+        weekdays = _weekdays(days)
+        return days - (weekdays == 5) + (weekdays == 6)
+    _, month, weekday, n = rule
+    if n > 0:
+        first = _month_starts(years, month)
+        return first + (weekday - _weekdays(first)) % 7 + (n - 1) * 7
+    last = _month_starts(years, month + 1) - 1
+    return last - (_weekdays(last) - weekday) % 7
+
+
+class HolidayCalendar:
+    """Day type (weekday, or weekend & holiday) for every date in a range of years.
+
+    The index is an int8 array with one entry per day, built once; looking up
+    day types for any number of timestamps is one integer division and one
+    gather. Dates outside the range fall back to the day of the week.
+    """
+
+    def __init__(self, first_year=FIRST_YEAR, last_year=LAST_YEAR, rules=UTILITY_HOLIDAYS):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.rules = rules
+        self.first_day = int(_month_starts(np.array([first_year]), 1)[0])
+        self.end_day = int(_month_starts(np.array([last_year + 1]), 1)[0])
+        days = np.arange(self.first_day, self.end_day, dtype=np.int64)
+        self.index = np.where(_weekdays(days) >= 5, WEEKEND_HOLIDAY, WEEKDAY).astype(np.int8)
+
+        # Observed dates can move into the neighbouring year, so build one year either side
+        years = np.arange(first_year - 1, last_year + 2, dtype=np.int64)
+        names = []
+        holiday_list = []
+        for rule in rules:
+            holiday_list.append(holiday_days(rule, years))
+            names.extend([rule[0]] * len(years))
+        holidays = np.concatenate(holiday_list) if holiday_list else np.empty(0, dtype=np.int64)
+        inside = (holidays >= self.first_day) & (holidays < self.end_day)
+        order = np.argsort(holidays[inside], kind="stable")
+        self.holiday_days = holidays[inside][order]
+        self.holiday_names = np.asarray(names, dtype=object)[inside][order]
+        self.index[self.holiday_days - self.first_day] = WEEKEND_HOLIDAY
+
+    def day_types(self, timestamps):
+        """Day type code per timestamp (0 weekday, 1 weekend or holiday)."""
+        days = pd.DatetimeIndex(timestamps).astype("datetime64[ns]").asi8 // NS_PER_DAY
+        offsets = days - self.first_day
+        inside = (offsets >= 0) & (days < self.end_day)
+        if inside.all():
+            return self.index[offsets]
+        types = np.where(_weekdays(days) >= 5, WEEKEND_HOLIDAY, WEEKDAY).astype(np.int8)
+        types[inside] = self.index[offsets[inside]]
+        return types
+
+    def is_holiday(self, timestamps):
+        days = pd.DatetimeIndex(timestamps).astype("datetime64[ns]").asi8 // NS_PER_DAY
+        return np.isin(days, self.holiday_days)
+
+    def holidays(self, start=None, end=None):
+        """Observed holidays from start to end (inclusive) as a DataFrame of date and name."""
+        frame = pd.DataFrame({
+            "date": self.holiday_days.view("datetime64[D]").astype("datetime64[ns]"),
+            "holiday": self.holiday_names,
+        })
+        if start is not None:
+            frame = frame[frame["date"] >= pd.Timestamp(start).normalize()]
+        if end is not None:
+            frame = frame[frame["date"] <= pd.Timestamp(end).normalize()]
+        return frame.reset_index(drop=True)
+
+
+@functools.lru_cache(maxsize=None)
+def holiday_calendar(first_year=FIRST_YEAR, last_year=LAST_YEAR, rules=UTILITY_HOLIDAYS):
+    """The shared HolidayCalendar for a range of years and set of holiday rules, built on first use."""
+    return HolidayCalendar(first_year, last_year, rules)
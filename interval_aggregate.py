@@ -0,0 +1,131 @@
+# Author: SupportDone.com
+# Hourly, daily, monthly and billing-cycle rollups of interval data
+
+import numpy as np
+import pandas as pd
+
+NS_PER_SECOND = 1000000000
+# Fixed-length resolutions, in seconds
+FIXED_RESOLUTIONS = {"15min": 900, "hour": 3600, "day": 86400}
+RESOLUTIONS = tuple(FIXED_RESOLUTIONS) + ("month", "cycle")
+COLUMNS = ["period_start", "period_end", "readings", "hours", "coverage", "consumption_kwh", "generation_kwh",
+           "net_kwh", "peak_kw", "peak_at", "average_kw", "load_factor"]
+
+
+def bucket_edges(resolution, first, last, cycle_dates=None):
+    """Sorted bucket boundaries (int64 ns) covering [first, last).
+
+    For "cycle", the boundaries are the meter-read dates themselves: n dates
+    make n - 1 billing cycles, and readings outside them are left out.
+    """
+    if resolution in FIXED_RESOLUTIONS:
+        step = FIXED_RESOLUTIONS[resolution] * NS_PER_SECOND
+        return np.arange(first // step * step, last + step, step, dtype=np.int64)
+    if resolution == "month":
+        months = np.arange(np.datetime64(first, "ns").astype("datetime64[M]"),
+                           np.datetime64(last - 1, "ns").astype("datetime64[M]") + 2)
+        return months.astype("datetime64[ns]").view(np.int64)
+    if resolution == "cycle":
+        if cycle_dates is None or len(cycle_dates) < 2:
+            raise ValueError("Billing-cycle rollups need at least two meter-read dates")
+        edges = pd.to_datetime(pd.Series(cycle_dates)).astype("datetime64[ns]").to_numpy().view(np.int64)
+        return np.unique(edges)
+    raise ValueError(f"Unknown resolution {resolution!r}; use one of {', '.join(RESOLUTIONS)}")
+
+
+def energy_columns(df):
+    """Consumption, generation and net kWh arrays.
+
+    Rows without their own consumption or generation (XML readings merged
+    with CSV rows, for example) fall back to the signed value.
+    """
+    values = df["value"].to_numpy("float64")
+    consumption = np.clip(values, 0, None)
+    generation = np.clip(-values, 0, None)
+    if "consumption" in df:
+        given = df["consumption"].to_numpy("float64")
+        consumption = np.where(np.isnan(given), consumption, given)
+    if "generation" in df:
+        given = df["generation"].to_numpy("float64")
+        generation = np.where(np.isnan(given), generation, given)
+    return consumption, generation, values
+
+
+def aggregate(df, resolution="day", cycle_dates=None):
+    """Roll interval data up to a resolution in one vectorized pass.
+
+    Every reading is assigned to integer buckets with searchsorted against
+    the bucket boundaries and summed with bincount. A reading that crosses
+    a boundary (hourly data rolled up to 15 minutes, a daily gas read rolled
+    up to hours) is split across the buckets in proportion to time. Demand
+    is each reading's energy over its own duration, so mixed 15-minute and
+    hourly data give comparable kW. peak_kw is the highest reading demand in
+    the bucket. average_kw is consumption over the hours actually covered,
+    so missing data lowers coverage rather than the load factor.
+    """
+    if not len(df):
+        return pd.DataFrame(columns=COLUMNS)
+    starts = df["timestamp"].to_numpy("datetime64[ns]").view(np.int64)
+    durations = df["duration"].to_numpy(np.int64) * NS_PER_SECOND
+    ends = starts + np.maximum(durations, 1)
+    edges = bucket_edges(resolution, int(starts.min()), int(ends.max()), cycle_dates)
+    bucket_count = len(edges) - 1
+
+    first = np.searchsorted(edges, starts, side="right") - 1
+    last = np.searchsorted(edges, ends - 1, side="right") - 1
+    consumption, generation, net = energy_columns(df)
+    hours = durations / (3600.0 * NS_PER_SECOND)
+    demand = np.divide(consumption, hours, out=np.zeros_like(consumption), where=hours > 0)
+
+    # One piece per bucket each reading touches; most readings touch one
+    spans = last - first + 1
+    rows = np.repeat(np.arange(len(starts)), spans)
+    buckets = np.repeat(first, spans)
+    if len(rows) != len(starts):
+        buckets += np.arange(len(rows)) - np.repeat(np.cumsum(spans) - spans, spans)
+    inside = (buckets >= 0) & (buckets < bucket_count)
+    rows, buckets = rows[inside], buckets[inside]
+    piece_starts = np.maximum(starts[rows], edges[buckets])
+    piece_ends = np.minimum(ends[rows], edges[buckets + 1])
+    piece_ns = np.maximum(piece_ends - piece_starts, 0)
+    share = piece_ns / (ends[rows] - starts[rows])
+
+    def total(weights):
+        return np.bincount(buckets, weights=weights[rows] * share, minlength=bucket_count)
+
+    covered_hours = np.bincount(buckets, weights=piece_ns / (3600.0 * NS_PER_SECOND), minlength=bucket_count)
+    readings = np.bincount(buckets[starts[rows] >= edges[buckets]], minlength=bucket_count)
+    consumption_kwh = total(consumption)
+
+    # Peak per bucket: sort pieces by bucket (already sorted for time-ordered data) and reduce
+    if not np.all(buckets[1:] >= buckets[:-1]):
+        order = np.argsort(buckets, kind="stable")
+        rows, buckets = rows[order], buckets[order]
+    peak_kw = np.full(bucket_count, np.nan)
+    peak_at = np.full(bucket_count, np.datetime64("NaT"), dtype="datetime64[ns]")
+    if len(buckets):
+        group_starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        group_buckets = buckets[group_starts]
+        piece_demand = demand[rows]
+        peak_kw[group_buckets] = np.maximum.reduceat(piece_demand, group_starts)
+        at_peak = np.flatnonzero(piece_demand == peak_kw[buckets])
+        first_at_peak = at_peak[np.r_[True, buckets[at_peak][1:] != buckets[at_peak][:-1]]]
+        peak_at[buckets[first_at_peak]] = starts[rows[first_at_peak]].view("datetime64[ns]")
+
+    span_hours = np.diff(edges) / (3600.0 * NS_PER_SECOND)
+    average_kw = np.divide(consumption_kwh, covered_hours, out=np.full(bucket_count, np.nan), where=covered_hours > 0)
+    return pd.DataFrame({
+        "period_start": edges[:-1].view("datetime64[ns]"),
+        "period_end": edges[1:].view("datetime64[ns]"),
+        "readings": readings,
+        "hours": covered_hours,
+        "coverage": covered_hours / span_hours,
+        "consumption_kwh": consumption_kwh,
+        "generation_kwh": total(generation),
+        "net_kwh": total(net),
+        "peak_kw": peak_kw,
+        "peak_at": peak_at,
+        "average_kw": average_kw,
+        "load_factor": np.divide(average_kw, peak_kw, out=np.full(bucket_count, np.nan),
+                                 where=np.nan_to_num(peak_kw) > 0),
+    })
@@ -0,0 +1,182 @@
+# Author: SupportDone.com
+# Split long date ranges into portal-sized windows and stitch the window files back together
+
+import os
+import csv
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+ESPI_NS = "http://naesb.org/espi"
+ATOM = f"{{{ATOM_NS}}}"
+ESPI = f"{{{ESPI_NS}}}"
+
+# Longest span each portal reliably exports in one request
+MAX_WINDOW_DAYS = {
+    "SDGE": 90,
+    "PG&E": 90,
+}
+DEFAULT_WINDOW_DAYS = 90
+
+SDGE_HEADER = ["Meter Number", "Date", "Start Time"]
+
+
+def split_range(start_date, end_date, window_days):
+    """Split an inclusive yyyy-mm-dd range into consecutive windows of at most window_days."""
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    windows = []
+    while start <= end:
+        window_end = min(end, start + timedelta(days=max(1, window_days) - 1))
+        windows.append((start.isoformat(), window_end.isoformat()))
+        start = window_end + timedelta(days=1)
+    return windows
+
+
+def stitch_files(paths, output_path):
+    """Merge window downloads of one account into output_path, dropping duplicate readings.
+
+    Returns (readings kept, duplicates dropped).
+    """
+    extensions = {os.path.splitext(p)[1].lower() for p in paths}
+    if extensions == {".csv"}:
+        return stitch_sdge_csv(paths, output_path)
+    if extensions == {".xml"}:
+        return stitch_espi_xml(paths, output_path)
+    raise ValueError(f"Cannot stitch files of mixed or unknown type: {', '.join(sorted(extensions))}")
+
+
+def _read_sdge_csv(path):
+    """Return (metadata rows, header row, data rows) of an SDG&E interval CSV."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    for position, row in enumerate(rows):
+        if row[:3] == SDGE_HEADER:
+            return rows[:position], row, [r for r in rows[position + 1:] if len(r) > 3 and r[1]]
+    raise ValueError(f"{os.path.basename(path)} has no interval header row")
+
+
+def stitch_sdge_csv(paths, output_path):
+    """Stitch SDG&E interval CSVs: metadata from the first file, rows sorted and deduplicated.
+
+    Reading Start/End, Total Duration and Total Usage are recomputed for the
+    stitched rows; the per-window period summary (columns J-M) is left blank.
+    """
+    metadata, header, _ = _read_sdge_csv(paths[0])
+    readings = {}
+    duplicates = 0
+    for path in paths:
+        # The DST fall-back hour is listed twice in one file; both listings are real
+        # readings, so only the same occurrence repeated in another window is a duplicate
+        occurrences = {}
+        for row in _read_sdge_csv(path)[2]:
+            moment = datetime.strptime(f"{row[1]} {row[2]}", "%m/%d/%Y %I:%M %p")
+            meter = row[0].strip()
+            occurrence = occurrences.get((meter, moment), 0)
+            occurrences[(meter, moment)] = occurrence + 1
+            key = (meter, moment.replace(minute=0), occurrence, moment)
+            if key in readings:
+                duplicates += 1
+            else:
+                readings[key] = row
+
+    # Sorting on the hour before the occurrence keeps the repeated hour after the first one
+    keys = sorted(readings)
+    if keys:
+        first = min(k[3] for k in keys)
+        last = max(k[3] for k in keys)
+        totals = {
+            "Reading Start": f"{first.month}/{first.day}/{first.year} {first.hour}:{first.minute:02d}",
+            "Reading End": f"{last.month}/{last.day}/{last.year} {last.hour}:{last.minute:02d}",
+            "Total Duration": f"{(last.date() - first.date()).days + 1} Days",
+            # The portal's Total Usage is the Net column, so solar exports count against it
+            "Total Usage": f"{round(sum(float(readings[k][6] or 0) for k in keys), 4)}",
+        }
+        metadata = [[row[0], totals[row[0]]] + row[2:] if row and row[0] in totals else row for row in metadata]
+        if len(paths) > 1:
+            # The period summary in columns J-M covers one window; clear its values rather than mislabel it
+            metadata = [row[:10] + [""] * len(row[10:13]) + row[13:] if len(row) > 10 and row[9].strip() else row
+                        for row in metadata]
+
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerows(metadata)
+        writer.writerow(header)
+        writer.writerows(readings[k] for k in keys)
+    return len(keys), duplicates
+
+
+def _link(entry, rel):
+    for link in entry.findall(f"{ATOM}link"):
+        if link.get("rel") == rel:
+            return link.get("href")
+    return None
+
+
+def stitch_espi_xml(paths, output_path):
+    """Stitch ESPI feeds: IntervalReadings of the same MeterReading are merged by start time."""
+    ET.register_namespace("", ATOM_NS)
+    ET.register_namespace("espi", ESPI_NS)
+    tree = ET.parse(paths[0])
+    feed = tree.getroot()
+    seen_entries = set()
+    targets = {}  # MeterReading link -> (IntervalBlock, set of reading starts)
+    duplicates = 0
+
+    for number, path in enumerate(paths):
+        root = feed if number == 0 else ET.parse(path).getroot()
+        for entry in list(root.findall(f"{ATOM}entry")):
+            block = entry.find(f"{ATOM}content/{ESPI}IntervalBlock")
+            if block is None:
+                key = _link(entry, "self") or entry.findtext(f"{ATOM}id")
+                if key not in seen_entries:
+                    seen_entries.add(key)
+                    if number:
+                        feed.append(entry)
+                continue
+
+            reading_key = _link(entry, "up") or _link(entry, "self")
+            if reading_key not in targets:
+                if number:
+                    feed.append(entry)
+                starts = set()
+                for reading in list(block.findall(f"{ESPI}IntervalReading")):
+                    start = reading.findtext(f"{ESPI}timePeriod/{ESPI}start")
+                    if start in starts:
+                        block.remove(reading)
+                        duplicates += 1
+                    starts.add(start)
+                targets[reading_key] = (block, starts)
+                continue
+
+            target, starts = targets[reading_key]
+            for reading in block.findall(f"{ESPI}IntervalReading"):
+                start = reading.findtext(f"{ESPI}timePeriod/{ESPI}start")
+                if start in starts:
+                    duplicates += 1
+                else:
+                    starts.add(start)
+                    target.append(reading)
+            if number == 0:
+                feed.remove(entry)
+
+    kept = 0
+    for target, _ in targets.values():
+        readings = target.findall(f"{ESPI}IntervalReading")
+        for reading in readings:
+            target.remove(reading)
+        readings.sort(key=lambda r: int(r.findtext(f"{ESPI}timePeriod/{ESPI}start") or 0))
+        target.extend(readings)
+        kept += len(readings)
+        interval = target.find(f"{ESPI}interval")
+        if readings and interval is not None and interval.find(f"{ESPI}start") is not None \
+                and interval.find(f"{ESPI}duration") is not None:
+            first = int(readings[0].findtext(f"{ESPI}timePeriod/{ESPI}start"))
+            last = readings[-1]
+            last_end = int(last.findtext(f"{ESPI}timePeriod/{ESPI}start")) + int(
+                last.findtext(f"{ESPI}timePeriod/{ESPI}duration") or 0)
+            interval.find(f"{ESPI}start").text = str(first)
+            interval.find(f"{ESPI}duration").text = str(last_end - first)
+
+    tree.write(output_path, encoding="utf-8", xml_declaration=True)
+    return kept, duplicates
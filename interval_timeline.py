@@ -0,0 +1,216 @@
+# Author: SupportDone.com
+# Canonical per-meter interval timeline: merges overlapping downloads into one sorted series
+
+import numpy as np
+import pandas as pd
+from meter_split import split_by_meter
+
+NS_PER_SECOND = 1000000000
+PREFER = ("latest", "first")
+# Values closer than this are the same reading, not a conflict
+VALUE_TOLERANCE = 1e-9
+
+
+def _starts(frame):
+    # Normalized data (interval_validation.normalize_to_utc) is unique across DST changes in UTC
+    column = "timestamp_utc" if "timestamp_utc" in frame else "timestamp"
+    return frame[column].to_numpy("datetime64[ns]").view(np.int64)
+
+
+def _ends(frame, starts):
+    return starts + frame["duration"].to_numpy(np.int64) * NS_PER_SECOND
+
+
+class IntervalTimeline:
+    """One meter's readings from any number of sources as a single sorted series.
+
+    Sources are merged in the order they are added. Readings with the same
+    start are duplicates: prefer="latest" keeps the one from the source added
+    last (a newer download replaces estimated or revised reads), prefer="first"
+    keeps the original. Duplicates whose values differ are counted as
+    conflicts. A reading that starts inside an earlier kept reading, such as an
+    hourly read over 15-minute data, is dropped as an overlap. The 'gap' column
+    marks readings that start after the previous one ended.
+
+    Merging sorts the concatenated sources with a stable sort. The sources are
+    already sorted runs, so this is a run merge rather than a full sort. Data
+    that starts after the timeline ends is appended without sorting.
+    """
+
+    def __init__(self, meter=None, prefer="latest"):
+        if prefer not in PREFER:
+            raise ValueError(f"prefer must be one of {', '.join(PREFER)}")
+        self.meter = meter
+        self.prefer = prefer
+        self.frame = None
+        self.sources = []
+        self.duplicates = 0
+        self.conflicts = 0
+        self.overlaps = 0
+
+    @classmethod
+    def from_sources(cls, frames, names=None, meter=None, prefer="latest"):
+        timeline = cls(meter, prefer)
+        timeline.merge(frames, names)
+        return timeline
+
+    def __len__(self):
+        return 0 if self.frame is None else len(self.frame)
+
+    def _normalize(self, frame, name):
+        frame = frame.drop(columns=["gap"], errors="ignore").astype(
+            {"timestamp": "datetime64[ns]", "duration": np.int32, "value": "float64"})
+        if "source" not in frame:
+            # Zipped bundles already name the member each row came from
+            frame["source"] = name
+        return frame
+
+    def extend(self, frame, name=None):
+        """Merge one more source into the timeline."""
+        return self.merge([frame], None if name is None else [name])
+
+    def merge(self, frames, names=None):
+        """Merge sources into the timeline; returns the merged DataFrame."""
+        if names is None:
+            names = [f"source {len(self.sources) + number}" for number in range(1, len(frames) + 1)]
+        runs = [self._normalize(frame, name) for frame, name in zip(frames, names) if len(frame)]
+        self.sources.extend(names)
+        if not runs:
+            return self.frame
+        if self.frame is not None and len(self.frame) and len(runs) == 1 and self._append(runs[0]):
+            return self.frame
+        if self.frame is not None:
+            runs.insert(0, self.frame)
+
+        combined = pd.concat(runs, ignore_index=True)
+        starts = _starts(combined)
+        order = np.argsort(starts, kind="stable")
+        starts = starts[order]
+
+        # Ties keep source order, so a group's last row is from the latest source
+        new_group = np.empty(len(starts), dtype=bool)
+        new_group[0] = True
+        np.not_equal(starts[1:], starts[:-1], out=new_group[1:])
+        if self.prefer == "latest":
+            keep = np.append(new_group[1:], True)
+        else:
+            keep = new_group
+        duplicates = len(starts) - int(keep.sum())
+        if duplicates:
+            values = combined["value"].to_numpy()[order]
+            group_starts = np.flatnonzero(new_group)
+            spread = np.maximum.reduceat(values, group_starts) - np.minimum.reduceat(values, group_starts)
+            self.conflicts += int(np.count_nonzero(spread > VALUE_TOLERANCE))
+            self.duplicates += duplicates
+
+        kept = order[keep]
+        kept = kept[self._without_overlaps(starts[keep], _ends(combined.iloc[kept], starts[keep]))]
+        self.frame = self._flag_gaps(combined.iloc[kept].reset_index(drop=True))
+        return self.frame
+
+    def _append(self, run):
+        """Append a source that starts after the timeline ends; False if it can't be appended as is."""
+        starts = _starts(run)
+        ends = _ends(run, starts)
+        last = self.frame.iloc[-1]
+        timeline_end = last["timestamp"].value + int(last["duration"]) * NS_PER_SECOND
+        if starts[0] < timeline_end or np.any(starts[1:] < ends[:-1]):
+            return False
+        gap = np.empty(len(run), dtype=bool)
+        gap[0] = starts[0] > timeline_end
+        np.greater(starts[1:], ends[:-1], out=gap[1:])
+        run["gap"] = gap
+        self.frame = pd.concat([self.frame, run], ignore_index=True)
+        return True
+
+    def _without_overlaps(self, starts, ends):
+        """Mask of sorted readings to keep, dropping any that start inside an earlier kept reading."""
+        keep = np.ones(len(starts), dtype=bool)
+        if len(starts) < 2:
+            return keep
+        covered = np.maximum.accumulate(ends)
+        candidates = np.flatnonzero(starts[1:] < covered[:-1]) + 1
+        if not len(candidates):
+            return keep
+        # Rare: walk from the first overlap, tracking the end of what is kept
+        first = int(candidates[0])
+        kept_end = int(covered[first - 1])
+        start_list = starts[first:].tolist()
+        end_list = ends[first:].tolist()
+        for offset, (start, end) in enumerate(zip(start_list, end_list)):
+            if start < kept_end:
+                keep[first + offset] = False
+            else:
+                kept_end = max(kept_end, end)
+        self.overlaps += int(len(keep) - keep.sum())
+        return keep
+
+    @staticmethod
+    def _flag_gaps(frame):
+        """Set 'gap' on readings that start after the previous reading ended."""
+        starts = _starts(frame)
+        gap = np.zeros(len(frame), dtype=bool)
+        gap[1:] = starts[1:] > _ends(frame, starts)[:-1]
+        frame["gap"] = gap
+        return frame
+
+    def gaps(self):
+        """Missing spans as a DataFrame of start, end and seconds."""
+        if not len(self):
+            return pd.DataFrame(columns=["start", "end", "seconds"])
+        starts = _starts(self.frame)
+        ends = _ends(self.frame, starts)
+        rows = np.flatnonzero(self.frame["gap"].to_numpy())
+        gap_starts = ends[rows - 1]
+        gap_ends = starts[rows]
+        return pd.DataFrame({
+            "start": pd.to_datetime(gap_starts),
+            "end": pd.to_datetime(gap_ends),
+            "seconds": (gap_ends - gap_starts) // NS_PER_SECOND,
+        })
+
+    def summary(self):
+        gaps = self.gaps()
+        return {
+            "meter": self.meter,
+            "readings": len(self),
+            "start": None if not len(self) else self.frame["timestamp"].iloc[0].isoformat(),
+            "end": None if not len(self) else self.frame["timestamp"].iloc[-1].isoformat(),
+            "sources": len(self.sources),
+            "duplicates": self.duplicates,
+            "conflicts": self.conflicts,
+            "overlaps": self.overlaps,
+            "gaps": len(gaps),
+            "missing_seconds": int(gaps["seconds"].sum()) if len(gaps) else 0,
+        }
+
+
+def merge_by_meter(frames, names=None, prefer="latest"):
+    """Merge sources that may hold several meters into {meter: IntervalTimeline}.
+
+    The meter is the meter_number column (and the PG&E service type) where
+    present; data without either is one meter, keyed None.
+    """
+    if names is None:
+        names = [f"source {number}" for number in range(1, len(frames) + 1)]
+    parts = {}
+    for frame, name in zip(frames, names):
+        for meter, part in split_by_meter(frame).items():
+            parts.setdefault(meter, []).append((part, name))
+    return {
+        meter: IntervalTimeline.from_sources([part for part, _ in sources], [name for _, name in sources],
+                                             meter=meter, prefer=prefer)
+        for meter, sources in parts.items()
+    }
+
+
+def canonical_intervals(df, prefer="latest"):
+    """Deduplicate one parsed file per meter; returns (DataFrame, [timeline summaries])."""
+    if not len(df):
+        return df, []
+    timelines = merge_by_meter([df], prefer=prefer)
+    frames = [timeline.frame for timeline in timelines.values()]
+    merged = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    if "source" not in df:
+        merged = merged.drop(columns=["source"])
+    return merged, [timeline.summary() for timeline in timelines.values()]
@@ -0,0 +1,186 @@
+# Author: SupportDone.com
+# Finds gaps, repeats, DST fold/skip hours and odd durations in interval data, and normalizes to UTC
+
+import os
+import numpy as np
+import pandas as pd
+from meter_split import split_by_meter, meter_key_columns, meter_label
+from utility_timezone import DEFAULT_TIMEZONE
+
+NS_PER_SECOND = 1000000000
+# ESPI feeds give epoch seconds; the CSV exports give local wall-clock times
+CLOCKS = {"espi_xml": "utc", "sdge_csv": "local", "pge_csv": "local"}
+KINDS = ("gap", "duplicate", "overlap", "duration", "dst_fold", "dst_fold_unpaired", "dst_skip")
+ANOMALY_COLUMNS = ["meter", "kind", "start", "end", "readings", "detail"]
+
+
+def format_clock(file_format, metadata=None, df=None):
+    """'utc' or 'local' for a parsed file; a per-row array for zip bundles that mix both."""
+    if file_format != "gbd_zip":
+        return CLOCKS.get(file_format, "local")
+    member_clocks = {os.path.basename(member["file"]): CLOCKS.get(member["format"], "local")
+                     for member in metadata["members"]}
+    clocks = df["source"].map(member_clocks).fillna("local").to_numpy(dtype=object)
+    return clocks[0] if len(set(clocks)) == 1 else clocks
+
+
+def _runs(mask):
+    """(first, last) index pairs of each run of True in a boolean array."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return edges[0::2], edges[1::2] - 1
+
+
+class ValidationReport:
+    """Anomalies found in one pass over an interval series, plus its UTC start times.
+
+    'anomalies' has one row per gap, per repeated start, and per run of
+    overlapping, odd-duration, DST fold or DST skip readings. Times in it are
+    local wall-clock times.
+    """
+
+    def __init__(self, timezone, utc, expected_durations, anomalies):
+        self.timezone = timezone
+        # int64 ns since the epoch, UTC, per input row
+        self.utc = utc
+        self.expected_durations = expected_durations
+        self.anomalies = anomalies
+
+    @property
+    def counts(self):
+        """Readings involved, per kind (gaps count missing intervals instead)."""
+        totals = self.anomalies.groupby("kind")["readings"].sum() if len(self.anomalies) else {}
+        return {kind: int(totals.get(kind, 0)) for kind in KINDS}
+
+    @property
+    def ok(self):
+        return not len(self.anomalies)
+
+    def summary_line(self):
+        counts = self.counts
+        if self.ok:
+            return "Intervals OK: no gaps, repeats, DST issues or odd durations"
+        return "Interval anomalies: " + ", ".join(f"{counts[kind]} {kind.replace('_', ' ')}"
+                                                  for kind in KINDS if counts[kind])
+
+    def lines(self, limit=20):
+        lines = [self.summary_line()]
+        for row in self.anomalies.head(limit).itertuples(index=False):
+            meter = "" if row.meter is None else f"meter {row.meter}: "
+            lines.append(f"  {meter}{row.kind} {row.start} - {row.end} ({row.readings}) {row.detail}")
+        if len(self.anomalies) > limit:
+            lines.append(f"  ... {len(self.anomalies) - limit} more")
+        return lines
+
+
+def resolve_utc(df, clock="local", timezone=DEFAULT_TIMEZONE):
+    """UTC start times for naive timestamps, plus fold/skip masks.
+
+    Local wall-clock times are localized in one vectorized call. In the
+    fall-back hour each wall-clock time occurs twice: the first listing for a
+    meter is taken as daylight time and the repeat as standard time. Times
+    in the spring-forward hour don't exist; they are flagged and shifted
+    forward. Returns (utc int64 ns, fold, unpaired fold, skip).
+    """
+    naive = pd.DatetimeIndex(df["timestamp"]).astype("datetime64[ns]")
+    count = len(naive)
+    is_local = np.broadcast_to(np.asarray(clock) == "local", (count,))
+    fold = np.zeros(count, dtype=bool)
+    unpaired = np.zeros(count, dtype=bool)
+    skip = np.zeros(count, dtype=bool)
+    utc = naive.asi8.copy()
+    if not is_local.any():
+        return utc, fold, unpaired, skip
+
+    local = naive[is_local]
+    daylight = np.ones(len(local), dtype=bool)
+    skip_local = np.asarray(local.tz_localize(timezone, ambiguous=daylight, nonexistent="NaT").isna())
+    fold_local = np.asarray(local.tz_localize(timezone, ambiguous="NaT", nonexistent="NaT").isna()) & ~skip_local
+    unpaired_local = np.zeros(len(local), dtype=bool)
+    if fold_local.any():
+        rows = df[is_local][fold_local]
+        keys = meter_key_columns(rows) + ["timestamp"]
+        grouped = rows.groupby(keys, sort=False, dropna=False)
+        daylight[fold_local] = grouped.cumcount().to_numpy() == 0
+        unpaired_local[fold_local] = grouped["timestamp"].transform("size").to_numpy() == 1
+    resolved = local.tz_localize(timezone, ambiguous=daylight, nonexistent="shift_forward")
+    utc[is_local] = resolved.tz_convert("UTC").tz_localize(None).astype("datetime64[ns]").asi8
+    fold[is_local] = fold_local
+    unpaired[is_local] = unpaired_local
+    skip[is_local] = skip_local
+    return utc, fold, unpaired, skip
+
+
+def _meter_anomalies(meter, starts, durations, values, fold, unpaired, skip, timezone):
+    """Anomaly rows for one meter's readings sorted by UTC start."""
+    rows = []
+    label = None if meter is None else meter_label(meter)
+    wall = pd.DatetimeIndex(starts.view("datetime64[ns]")).tz_localize("UTC").tz_convert(timezone).tz_localize(None)
+    seconds = durations.astype(np.int64)
+    ends = starts + seconds * NS_PER_SECOND
+    expected = int(np.bincount(seconds[seconds > 0]).argmax()) if (seconds > 0).any() else 0
+
+    def add(kind, first, last, readings, detail):
+        rows.append((label, kind, wall[first], wall[last], int(readings), detail))
+
+    if len(starts) > 1:
+        covered = np.maximum.accumulate(ends)[:-1]
+        repeat = starts[1:] == starts[:-1]
+        gap = starts[1:] > covered
+        overlap = (starts[1:] < covered) & ~repeat
+        for row in np.flatnonzero(gap) + 1:
+            missing = int(starts[row] - covered[row - 1]) // NS_PER_SECOND
+            gap_start = pd.Timestamp(int(covered[row - 1])).tz_localize("UTC").tz_convert(timezone).tz_localize(None)
+            rows.append((label, "gap", gap_start, wall[row], -(-missing // expected) if expected else 0,
+                         f"{missing / 3600:g} h missing"))
+        for first, last in zip(*_runs(repeat)):
+            conflicting = int(np.count_nonzero(values[first + 1:last + 2] != values[first:last + 1]))
+            add("duplicate", first + 1, last + 1, last - first + 1,
+                f"{conflicting} with different values" if conflicting else "same values")
+        for first, last in zip(*_runs(overlap)):
+            add("overlap", first + 1, last + 1, last - first + 1, "starts inside an earlier reading")
+    for first, last in zip(*_runs(seconds != expected)):
+        found = sorted(set(seconds[first:last + 1].tolist()))
+        add("duration", first, last, last - first + 1,
+            f"{', '.join(str(value) for value in found)} s instead of {expected} s")
+    for first, last in zip(*_runs(fold & ~unpaired)):
+        add("dst_fold", first, last, last - first + 1, "repeated fall-back hour, read as daylight then standard time")
+    for first, last in zip(*_runs(unpaired)):
+        add("dst_fold_unpaired", first, last, last - first + 1, "fall-back hour listed once; read as daylight time")
+    for first, last in zip(*_runs(skip)):
+        add("dst_skip", first, last, last - first + 1, "wall-clock time skipped by spring-forward; shifted forward")
+    return rows, expected
+
+
+def validate_intervals(df, clock="local", timezone=DEFAULT_TIMEZONE):
+    """Check a parsed interval series, per meter, in one vectorized pass. Returns a ValidationReport."""
+    utc, fold, unpaired, skip = resolve_utc(df, clock, timezone)
+    if not len(df):
+        return ValidationReport(timezone, utc, {}, pd.DataFrame(columns=ANOMALY_COLUMNS))
+    rows = []
+    expected_durations = {}
+    for meter, part in split_by_meter(df.assign(_row=np.arange(len(df)))).items():
+        index = part["_row"].to_numpy()
+        order = index[np.argsort(utc[index], kind="stable")]
+        meter_rows, expected_durations[meter] = _meter_anomalies(
+            meter, utc[order], df["duration"].to_numpy()[order], df["value"].to_numpy("float64")[order],
+            fold[order], unpaired[order], skip[order], timezone)
+        rows.extend(meter_rows)
+    anomalies = pd.DataFrame(rows, columns=ANOMALY_COLUMNS)
+    if len(anomalies):
+        anomalies = anomalies.sort_values(["start", "kind"], kind="stable").reset_index(drop=True)
+    return ValidationReport(timezone, utc, expected_durations, anomalies)
+
+
+def normalize_to_utc(df, report):
+    """Copy of df with a tz-aware 'timestamp_utc' column and 'timestamp' as local wall-clock time.
+
+    Tariff periods follow the wall clock, so 'timestamp' stays naive local
+    time (ESPI feeds are converted from UTC). 'timestamp_utc' is unique per
+    reading across DST changes, and the timeline merge and gap checks use it
+    when it is present.
+    """
+    utc = pd.DatetimeIndex(report.utc.view("datetime64[ns]")).tz_localize("UTC")
+    normalized = df.copy()
+    normalized["timestamp"] = utc.tz_convert(report.timezone).tz_localize(None).astype("datetime64[ns]")
+    normalized["timestamp_utc"] = utc.astype("datetime64[ns, UTC]")
+    return normalized
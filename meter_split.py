@@ -0,0 +1,129 @@
+# Author: SupportDone.com
+# Splits interval data by meter in one pass and summarizes each meter in parallel
+
+import os
+import functools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from interval_aggregate import energy_columns
+from tou_periods import ON_PEAK
+from tariff_registry import tariff_registry, DEFAULT_TARIFF
+
+# Columns that tell meters (and PG&E services) in the same data apart
+METER_COLUMNS = ("meter_number", "type")
+ACCOUNT_TOTAL = "Account total"
+
+
+def meter_key_columns(frame):
+    return [column for column in METER_COLUMNS if column in frame]
+
+
+def meter_codes(frame, columns):
+    """Integer meter code per row and the meter key for each code, in first-seen order."""
+    codes, uniques = pd.factorize(frame[columns[0]], use_na_sentinel=False)
+    keys = [[value] for value in uniques]
+    for column in columns[1:]:
+        column_codes, column_uniques = pd.factorize(frame[column], use_na_sentinel=False)
+        codes, combined = pd.factorize(codes * len(column_uniques) + column_codes)
+        keys = [keys[code // len(column_uniques)] + [column_uniques[code % len(column_uniques)]]
+                for code in combined]
+    keys = [key[0] if len(key) == 1 else tuple(key) for key in keys]
+    return codes, keys
+
+
+def split_by_meter(df, columns=None):
+    """Partition rows by meter as {meter: DataFrame}, keeping each meter's row order.
+
+    One factorize and one counting sort over the meter codes, then a single
+    gather; each meter's rows are a slice of the result. Data without a meter
+    column is one meter, keyed None.
+    """
+    columns = meter_key_columns(df) if columns is None else list(columns)
+    if not columns or not len(df):
+        return {None: df}
+    codes, keys = meter_codes(df, columns)
+    if len(keys) == 1:
+        return {keys[0]: df}
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(keys)))))
+    ordered = df.take(order)
+    return {key: ordered.iloc[bounds[code]:bounds[code + 1]] for code, key in enumerate(keys)}
+
+
+def rollup(df):
+    """Sum all meters per interval, so the account total has its own coincident peak."""
+    consumption, generation, values = energy_columns(df)
+    energy = pd.DataFrame({"timestamp": df["timestamp"].to_numpy(), "duration": df["duration"].to_numpy(),
+                           "value": values, "consumption": consumption, "generation": generation})
+    keys = ["timestamp", "duration"]
+    if "timestamp_utc" in df:
+        # Both fall-back hours share local times; UTC keeps them apart
+        energy.insert(0, "timestamp_utc", df["timestamp_utc"].to_numpy())
+        keys.insert(0, "timestamp_utc")
+    return energy.groupby(keys, sort=True).sum().reset_index()
+
+
+def summarize(df, meter=None, periods=None):
+    """Usage summary for one meter's intervals.
+
+    periods is the PeriodTable that decides on-peak (the default tariff's by
+    default); pass the tariff the data is billed on.
+    """
+    periods = periods or tariff_registry().get(DEFAULT_TARIFF).periods
+    consumption, generation, values = energy_columns(df)
+    hours = df["duration"].to_numpy("float64") / 3600.0
+    timestamps = df["timestamp"]
+    on_peak = periods.classify(timestamps) == ON_PEAK
+
+    demand = np.divide(consumption, hours, out=np.zeros_like(consumption), where=hours > 0)
+    peak_row = int(np.nanargmax(demand)) if len(demand) and not np.isnan(demand).all() else None
+    peak_kw = float(demand[peak_row]) if peak_row is not None else 0.0
+    total_hours = float(hours.sum())
+    consumption_kwh = float(np.nansum(consumption))
+    return {
+        "meter": meter,
+        "readings": len(df),
+        "start": timestamps.min().isoformat() if len(df) else None,
+        "end": timestamps.max().isoformat() if len(df) else None,
+        "consumption_kwh": consumption_kwh,
+        "generation_kwh": float(np.nansum(generation)),
+        "net_kwh": float(np.nansum(values)),
+        "on_peak_kwh": float(np.nansum(consumption[on_peak])),
+        "off_peak_kwh": float(np.nansum(consumption[~on_peak])),
+        "peak_kw": peak_kw,
+        "peak_at": timestamps.iloc[peak_row].isoformat() if peak_row is not None else None,
+        # Average demand over peak demand
+        "load_factor": consumption_kwh / total_hours / peak_kw if peak_kw and total_hours else None,
+    }
+
+
+def process_meters(parts, calculate=summarize, workers=None, periods=None):
+    """Run calculate(df, meter) for every meter side by side.
+
+    With periods, calculate is called as calculate(df, meter, periods=periods).
+
+    Returns ({meter: result}, account result); the account result is
+    calculate run over all meters rolled up per interval. numpy releases the
+    GIL for the array work, so threads are used; this also runs inside
+    FolderProcessor's worker processes, where another process pool would
+    oversubscribe the machine.
+    """
+    if periods is not None:
+        calculate = functools.partial(calculate, periods=periods)
+    workers = max(1, min(len(parts), workers or os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {meter: executor.submit(calculate, part, meter) for meter, part in parts.items()}
+        results = {meter: future.result() for meter, future in futures.items()}
+    if len(parts) == 1:
+        account = dict(next(iter(results.values())), meter=ACCOUNT_TOTAL)
+    else:
+        account = calculate(rollup(pd.concat(list(parts.values()), ignore_index=True)), ACCOUNT_TOTAL)
+    return results, account
+
+
+def meter_label(meter):
+    if isinstance(meter, tuple):
+        return " ".join(meter_label(part) for part in meter)
+    # Rows without a meter number (XML readings in a zip of CSVs, for example)
+    return "unknown" if pd.isna(meter) else str(meter)
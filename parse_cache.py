@@ -0,0 +1,225 @@
+# Author: SupportDone.com
+# On-disk cache of parsed interval data, keyed by file content and parser version
+
+import os
+import json
+import hashlib
+import threading
+import pandas as pd
+
+DEFAULT_PARSE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".youpower", "parse_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Bump a parser's version whenever its output changes so stale entries are never served
+PARSER_VERSIONS = {
+    "espi_xml": "2",
+    "sdge_csv": "1",
+    "pge_csv": "1",
+    "gbd_zip": "1",
+}
+# Parsers whose output a zip's result is built from
+ZIP_MEMBER_PARSERS = ("espi_xml", "sdge_csv", "pge_csv")
+
+
+def parser_version(parser):
+    """Cache version of a parser's output; a zip's includes its member parsers' versions."""
+    if parser == "gbd_zip":
+        return ".".join([PARSER_VERSIONS[parser]] + [PARSER_VERSIONS[name] for name in ZIP_MEMBER_PARSERS])
+    return PARSER_VERSIONS[parser]
+
+
+def temp_path(path):
+    """A temp file name next to path that no other process or thread writing path will use."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """sha256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_espi_xml(path):
+    """Parse a Green Button XML feed (path or binary stream) into (interval DataFrame, metadata dict)."""
+    from gbd_parser import GBDXMLParser
+
+    parser = GBDXMLParser(path)
+    df = parser.parse_streaming()
+    return df, {"account_info": parser.get_account_info(), "reading_type": parser.get_reading_type()}
+
+
+def parse_sdge_csv(path):
+    """Parse an SDG&E interval CSV (path or binary stream) into (interval DataFrame, metadata dict)."""
+    from sdge_csv import read_sdge_csv
+
+    metadata, df = read_sdge_csv(path)
+    return df, metadata.to_dict()
+
+
+def parse_pge_csv(path):
+    """Parse a PG&E usage CSV (path or binary stream) into (interval DataFrame, metadata dict)."""
+    from pge_csv import read_pge_csv
+
+    metadata, df = read_pge_csv(path)
+    return df, metadata
+
+
+def parse_gbd_zip(path):
+    """Parse every Green Button file inside a zip into one (interval DataFrame, metadata dict)."""
+    from gbd_format import read_zip
+
+    return read_zip(path)
+
+
+PARSERS = {
+    "espi_xml": parse_espi_xml,
+    "sdge_csv": parse_sdge_csv,
+    "pge_csv": parse_pge_csv,
+    "gbd_zip": parse_gbd_zip,
+}
+
+
+class ParseCache:
+    """Normalized interval tables stored as Feather files, evicted least-recently-used.
+
+    Entries are keyed by the sha256 of the raw file plus the parser name and
+    version, so a renamed or re-downloaded copy of the same export is a hit
+    and a parser change is a miss. There is no shared index: each entry's
+    files give its size, and the metadata file's modification time is its
+    last use. FolderProcessor's worker processes can then share one cache
+    without a lock. A worker that loses an entry to another's eviction just
+    parses the file again.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or DEFAULT_PARSE_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, path, parser):
+        return f"{parser}-v{parser_version(parser)}-{file_digest(path)}"
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".feather", base + ".json"
+
+    def _entries(self):
+        """{key: (size, last used)} for every entry on disk."""
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".feather"):
+                continue
+            key = name[:-len(".feather")]
+            size = 0
+            last_used = 0
+            for path in self._paths(key):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                size += stat.st_size
+                last_used = max(last_used, stat.st_mtime)
+            entries[key] = (size, last_used)
+        return entries
+
+    def get(self, key):
+        """Return (DataFrame, metadata) for a key, or None."""
+        data_path, metadata_path = self._paths(key)
+        try:
+            df = pd.read_feather(data_path)
+            with open(metadata_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+            # Mark the entry used
+            os.utime(metadata_path)
+        except (OSError, ValueError, ImportError):
+            return None
+        return df, metadata
+
+    def put(self, key, df, metadata):
+        """Store a parsed table and evict old entries beyond max_bytes."""
+        data_path, metadata_path = self._paths(key)
+        data_temp = temp_path(data_path)
+        metadata_temp = temp_path(metadata_path)
+        try:
+            df.reset_index(drop=True).to_feather(data_temp)
+            with open(metadata_temp, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, default=str)
+            os.replace(data_temp, data_path)
+            os.replace(metadata_temp, metadata_path)
+        finally:
+            for path in (data_temp, metadata_temp):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._evict(keep=key)
+
+    def _evict(self, keep=None):
+        entries = self._entries()
+        total = sum(size for size, _ in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k][1]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Another process evicted it first
+                    pass
+            total -= entries[key][0]
+            self.evictions += 1
+
+    def load(self, path, parser=None):
+        """Return (DataFrame, metadata) for a file, parsing it only on a cache miss.
+
+        Without a parser name the format is detected from the file's content.
+        """
+        if parser is None:
+            from gbd_format import detect_format
+
+            parser = detect_format(path)
+            if parser is None:
+                raise ValueError(f"{os.path.basename(path)} is not a recognized Green Button file")
+        key = self.key(path, parser)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        df, metadata = PARSERS[parser](path)
+        try:
+            self.put(key, df, metadata)
+        except (OSError, ValueError, ImportError, NotImplementedError) as e:
+            # A full disk or an unstorable column shouldn't stop processing
+            print(f"Could not cache {os.path.basename(path)}: {e}")
+        return df, metadata
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for size, _ in entries.values()),
+        }
+
+    def clear(self):
+        """Remove every cached entry."""
+        for key in self._entries():
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        # Left by older versions, which kept a shared index
+        try:
+            os.remove(os.path.join(self.cache_dir, "index.json"))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,119 @@
+# Author: SupportDone.com
+# Reader for PG&E "Green Button Download My Data" CSV exports
+#
+# The export has a short header block followed by the usage table, e.g.
+#   Name,JANE DOE
+#   Account Number,1234567890
+#   Service,Service 1
+#
+#   TYPE,DATE,START TIME,END TIME,USAGE (kWh),COST,NOTES
+#   Electric usage,2024-01-01,00:00,00:14,0.15,$0.04,
+# Net-metered accounts have IMPORT (kWh) and EXPORT (kWh) instead of USAGE,
+# older exports a separate UNITS column, and daily gas exports no times.
+
+import re
+import csv
+import numpy as np
+import pandas as pd
+from sdge_csv import open_text, currency
+
+HEADER_PREFIX = "TYPE,DATE"
+HEADER_SCAN_LINES = 40
+DATE_FORMATS = ("%Y-%m-%d %H:%M", "%m/%d/%Y %H:%M", "%Y-%m-%d", "%m/%d/%Y")
+
+METADATA_FIELDS = {
+    "Name": "name",
+    "Address": "address",
+    "Account Number": "account_number",
+    "Service": "service",
+}
+
+
+def column_name(header):
+    """'USAGE (kWh)' -> ('usage', 'kWh'); 'START TIME' -> ('start_time', None)."""
+    match = re.match(r"\s*([^(]*?)\s*(?:\((.*)\))?\s*$", header)
+    return match.group(1).lower().replace(" ", "_"), match.group(2)
+
+
+def read_header(f):
+    """Read up to and including the table header.
+
+    Returns (metadata dict, header cells), or None if this isn't a PG&E export.
+    The stream is left at the first usage row.
+    """
+    metadata = {field: None for field in METADATA_FIELDS.values()}
+    for _ in range(HEADER_SCAN_LINES + 1):
+        line = f.readline()
+        if not line:
+            return None
+        if line.upper().startswith(HEADER_PREFIX):
+            return metadata, next(csv.reader([line]))
+        row = next(csv.reader([line]), [])
+        if len(row) > 1 and row[0].strip() in METADATA_FIELDS:
+            metadata[METADATA_FIELDS[row[0].strip()]] = row[1].strip()
+    return None
+
+
+def is_pge_csv(path):
+    """Cheap check for the PG&E export layout."""
+    try:
+        with open_text(path) as f:
+            return read_header(f) is not None
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def _times(text):
+    """Parse date/time strings, trying each export's format in turn."""
+    for date_format in DATE_FORMATS:
+        try:
+            return pd.to_datetime(text, format=date_format).astype("datetime64[ns]")
+        except ValueError:
+            continue
+    return pd.to_datetime(text, format="mixed").astype("datetime64[ns]")
+
+
+def read_pge_csv(source):
+    """Read a PG&E usage export from a path or binary stream. Returns (metadata dict, DataFrame).
+
+    The DataFrame has 'timestamp', 'duration' in seconds and 'value' (net
+    usage: import minus export) like GBDXMLParser output, plus 'type',
+    'consumption', 'generation', 'net' and 'cost'. END TIME is inclusive in
+    the export (00:00-00:14), so durations are rounded up to the minute.
+    """
+    with open_text(source) as f:
+        found = read_header(f)
+        if found is None:
+            raise ValueError(f"{getattr(source, 'name', source)} is not a PG&E Green Button CSV export")
+        metadata, header = found
+        names = []
+        for cell in header:
+            name, unit = column_name(cell)
+            names.append(name)
+            if unit and name in ("usage", "import", "export"):
+                metadata["unit"] = unit
+        df = pd.read_csv(f, header=None, names=names, dtype="string", engine="c", index_col=False)
+
+    df = df[df["date"].notna()].reset_index(drop=True)
+    if "units" in df and len(df):
+        metadata["unit"] = df["units"].iloc[0]
+
+    if "start_time" in df:
+        df["timestamp"] = _times(df["date"] + " " + df["start_time"])
+        end = _times(df["date"] + " " + df["end_time"])
+        seconds = (end - df["timestamp"]).dt.total_seconds().to_numpy() + 60
+        # A period ending after midnight wraps to the next day
+        df["duration"] = np.where(seconds <= 0, seconds + 86400, seconds).astype(np.int32)
+    else:
+        df["timestamp"] = _times(df["date"])
+        df["duration"] = np.int32(86400)
+
+    consumption = df["import"] if "import" in df else df["usage"]
+    df["consumption"] = pd.to_numeric(consumption, errors="coerce").astype("float64")
+    df["generation"] = pd.to_numeric(df["export"], errors="coerce").astype("float64") if "export" in df else 0.0
+    df["net"] = df["consumption"] - df["generation"]
+    df["value"] = df["net"]
+    df["cost"] = currency(df["cost"]).astype("float64") if "cost" in df else np.nan
+    df["type"] = df["type"].str.strip()
+    ordered = ["timestamp", "duration", "value", "type", "consumption", "generation", "net", "cost"]
+    return metadata, df[ordered]
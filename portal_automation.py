@@ -0,0 +1,696 @@
+# Author: SupportDone.com
+# Selenium steps for one browser session on a utility portal, independent of the GUI
+
+import os
+import time
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import TimeoutException
+from portal_waits import PortalWaiter
+from download_monitor import DownloadMonitor, DownloadManifest
+from session_pool import BrowserSessionPool
+from session_cache import SessionCache
+from green_button_http import GreenButtonHttpClient, GREEN_BUTTON_EXPORTS
+from driver_profiles import PageLoadTimer, chrome_options, apply_request_blocking, ready_states
+from driver_resolver import chromedriver_path, resolution_metrics
+from sync_state import SyncState
+from interval_stitch import MAX_WINDOW_DAYS, DEFAULT_WINDOW_DAYS, split_range, stitch_files
+
+LOGIN_URLS = {
+    "PG&E": "https://www.pge.com/en/login",
+    "SCE": "https://www.sce.com/mysce/login",
+}
+
+SDGE_ACCOUNT_BUTTON = (By.CSS_SELECTOR, "button[data-id='accountList']")
+SDGE_ACCOUNT_ITEMS = (By.CSS_SELECTOR, "ul.dropdown-menu > li")
+PGE_ACCOUNT_SELECT = (By.XPATH, "//select[contains(@id, 'account') or contains(@class, 'account')]")
+PGE_ACCOUNT_OPTIONS = (By.XPATH, "//select[contains(@id, 'account')]/option")
+
+DASHBOARD_URLS = {
+    "SDGE": "https://myenergycenter.com/portal/Dashboard/index",
+    "PG&E": "https://www.pge.com/myaccount/dashboard",
+}
+# Elements that only render for an authenticated user, used to probe saved sessions
+LOGGED_IN_MARKERS = {
+    "SDGE": SDGE_ACCOUNT_BUTTON,
+    "PG&E": (By.XPATH, "//a[contains(text(), 'Energy Usage')]"),
+}
+
+
+class PortalAutomation:
+    """One Chrome session logged in to a utility portal.
+
+    Progress is reported by calling on_step once per completed step, so the
+    same code can drive the Qt worker thread or run without a GUI.
+    """
+
+    STEPS_PER_ACCOUNT = {"SDGE": 3, "PG&E": 4, "SCE": 1}
+    PROBE_TIMEOUT = 5
+
+    def __init__(self, utility_provider, url, username, password, download_path,
+                 wait_timeouts=None, headless=False, staging_dir=None, on_step=None, name="session",
+                 session_cache=None, profile="default"):
+        self.utility_provider = utility_provider
+        self.url = url
+        self.username = username
+        self.password = password
+        self.download_path = download_path
+        self.wait_timeouts = wait_timeouts
+        self.headless = headless
+        # Parallel sessions download into their own staging folder so that
+        # each download monitor only ever sees its own files
+        self.staging_dir = staging_dir or download_path
+        self.on_step = on_step
+        self.name = name
+        self.session_cache = session_cache
+        # "lean" runs headless without images, fonts, media or trackers
+        self.profile = profile
+        self.page_loads = PageLoadTimer(profile)
+        self.authenticated = False
+        self.startup_seconds = None
+        self.driver = None
+        self.waiter = None
+        self.monitor = None
+        self.downloads = []
+
+    def step(self):
+        """Report one completed step."""
+        if self.on_step:
+            self.on_step()
+
+    def login_url(self):
+        """Return the login page for the selected utility provider."""
+        return LOGIN_URLS.get(self.utility_provider, self.url)
+
+    def portal_url(self, url):
+        """A portal page on the login URL's origin, so runs against a stub server stay on it."""
+        login = urlsplit(self.login_url())
+        if not login.scheme or not login.netloc:
+            return url
+        return urlsplit(url)._replace(scheme=login.scheme, netloc=login.netloc).geturl()
+
+    def dashboard_url(self):
+        return self.portal_url(DASHBOARD_URLS[self.utility_provider])
+
+    def steps_per_account(self):
+        return self.STEPS_PER_ACCOUNT.get(self.utility_provider, 1)
+
+    def configure_driver(self):
+        """Configure Chrome WebDriver with custom download folder."""
+        os.makedirs(self.staging_dir, exist_ok=True)
+        normalized_path = os.path.normpath(os.path.abspath(self.staging_dir))
+        options = chrome_options(normalized_path, self.profile, self.headless)
+        driver_path = chromedriver_path()
+        started = time.perf_counter()
+        driver = webdriver.Chrome(service=Service(driver_path), options=options)
+        self.startup_seconds = round(time.perf_counter() - started, 3)
+        print(f"[{self.name}] Chrome started in {self.startup_seconds}s "
+              f"(driver resolved in {resolution_metrics()['seconds']}s)")
+        apply_request_blocking(driver, self.profile)
+        return driver
+
+    def start(self):
+        """Open the browser and log in."""
+        self.driver = self.configure_driver()
+        self.waiter = PortalWaiter(self.driver, self.wait_timeouts, ready_states(self.profile))
+        self.monitor = DownloadMonitor(self.staging_dir, destination_dir=self.download_path)
+        if self.resume_session():
+            self.authenticated = True
+        else:
+            self.authenticated = self.login_to_portal(self.driver, self.login_url(), self.username, self.password)
+            self.save_session()
+        return self
+
+    def is_logged_in(self):
+        """Cheap probe: load the dashboard and look for an element only shown after login."""
+        self.driver.get(self.dashboard_url())
+        try:
+            self.waiter.present(LOGGED_IN_MARKERS[self.utility_provider], "session probe", timeout=self.PROBE_TIMEOUT)
+            return True
+        except TimeoutException:
+            return False
+
+    def resume_session(self):
+        """Restore a cached login and keep it if the portal still accepts it."""
+        if not self.session_cache or self.utility_provider not in DASHBOARD_URLS:
+            return False
+        state = self.session_cache.load(self.utility_provider, self.username)
+        if state is None:
+            return False
+
+        SessionCache.restore(self.driver, state, self.dashboard_url())
+        if self.is_logged_in():
+            print(f"[{self.name}] Reusing saved {self.utility_provider} session, login skipped.")
+            return True
+
+        print(f"[{self.name}] Saved session has expired, logging in again.")
+        self.session_cache.clear(self.utility_provider, self.username)
+        return False
+
+    def save_session(self):
+        """Store the current cookies and local storage for the next run."""
+        if not (self.session_cache and self.authenticated and self.driver):
+            return
+        try:
+            self.session_cache.save(self.utility_provider, self.username, self.driver)
+        except Exception as e:
+            print(f"[{self.name}] Could not save session: {e}")
+
+    def page_loaded(self, label):
+        """Record the browser's timing for the page just loaded."""
+        self.page_loads.record(self.driver, label)
+
+    def quit(self):
+        """Save the session, print the wait and page-load reports and close the browser."""
+        if self.waiter:
+            print(f"[{self.name}]")
+            self.waiter.print_report()
+            self.page_loads.print_report()
+        if self.driver:
+            self.save_session()
+            self.driver.quit()
+            self.driver = None
+        if self.staging_dir != self.download_path:
+            try:
+                os.rmdir(self.staging_dir)
+            except OSError:
+                pass
+
+    def login_to_portal(self, driver, url, username, password):
+        """Perform login actions for the selected utility provider."""
+        for attempt in range(3):
+            driver.get(url)
+            driver.refresh()
+            self.waiter.dom_ready("login page")
+            self.page_loaded("login page")
+
+            try:
+                print(f"Attempt {attempt + 1}: Logging in to {self.utility_provider}...")
+
+                if self.utility_provider == "PG&E":
+                    # PG&E login procedure
+                    try:
+                        # First try to find the username field
+                        username_field = self.waiter.present((By.ID, "username"), "login form", timeout=5)
+                        username_field.clear()
+                        username_field.send_keys(username)
+                        self.waiter.value_equals(username_field, username, "username typed")
+
+                        password_field = driver.find_element(By.ID, "password")
+                        password_field.clear()
+                        password_field.send_keys(password)
+                        self.waiter.value_equals(password_field, password, "password typed")
+
+                        login_button = driver.find_element(By.ID, "login")
+                        login_button.click()
+
+                        # Check for successful login
+                        # This depends on PG&E's specific dashboard elements
+                        dashboard_element = self.waiter.present(
+                            (By.XPATH, "//a[contains(text(), 'Energy Usage')]"), "dashboard after login", timeout=20
+                        )
+                        print("Login successful!")
+                        return True
+                    except Exception as e:
+                        print(f"PG&E login attempt failed: {e}")
+                        # Try alternative login selectors if needed
+
+                elif self.utility_provider == "SDGE":
+                    # SDGE login procedure (original code)
+                    login_form_present = self.waiter.present((By.ID, "usernamex"), "login form", timeout=5)
+
+                    if login_form_present:
+                        username_field = driver.find_element(By.ID, "usernamex")
+                        username_field.clear()
+                        username_field.send_keys(username)
+                        self.waiter.value_equals(username_field, username, "username typed")
+
+                        password_field = driver.find_element(By.ID, "passwordx")
+                        password_field.clear()
+                        password_field.send_keys(password)
+                        self.waiter.value_equals(password_field, password, "password typed")
+
+                        driver.find_element(By.ID, "btnlogin").click()
+                        try:
+                            self.waiter.reloaded(username_field, "login submit")
+                        except TimeoutException:
+                            pass
+                    else:
+                        print("Login form not found. Assuming login was successful.")
+                        return True
+
+                    form_still_present = driver.find_elements(By.ID, "usernamex")
+                    if not form_still_present:
+                        print("Login successful!")
+                        return True
+
+                elif self.utility_provider == "SCE":
+                    # SCE login procedure (to be implemented)
+                    print("SCE login functionality not yet implemented")
+                    # Placeholder for SCE login implementation
+                    return False
+
+            except Exception as e:
+                print(f"Login attempt {attempt + 1} failed: {e}")
+
+        return False
+
+    @staticmethod
+    def validate_and_format_date(date_string):
+        """Validate and format the date to MMM DD, YYYY."""
+        accepted_formats = ["%B %d, %Y", "%Y-%m-%d", "%d %B, %Y"]
+        for date_format in accepted_formats:
+            try:
+                date_obj = datetime.strptime(date_string, date_format)
+                return date_obj.strftime("%B %d, %Y")
+            except ValueError:
+                continue
+        raise ValueError(f"Invalid date format: {date_string}. Expected formats: {', '.join(accepted_formats)}.")
+
+    def download_pge_green_button_data(self, driver, start_date, end_date, account=None):
+        """Download Green Button data from PG&E portal."""
+        try:
+            # Navigate to the Energy Usage page
+            energy_usage_link = self.waiter.clickable(
+                (By.XPATH, "//a[contains(text(), 'Energy Usage')]"), "energy usage link"
+            )
+            energy_usage_link.click()
+            self.waiter.network_idle("energy usage page")
+            self.page_loaded("energy usage page")
+            self.step()
+
+            # Look for Energy Usage Details
+            usage_details_link = self.waiter.clickable(
+                (By.XPATH, "//a[contains(text(), 'Energy Usage Details')]"), "usage details link"
+            )
+            usage_details_link.click()
+            self.waiter.network_idle("usage details page")
+            self.page_loaded("usage details page")
+            self.step()
+
+            # Scroll down to find the Green Button
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+
+            # Click on the Green Button
+            green_button = self.waiter.clickable(
+                (By.XPATH, "//button[contains(@class, 'green-button') or contains(@id, 'green-button') or contains(text(), 'Green Button')]"),
+                "green button",
+            )
+            green_button.click()
+
+            # Select option to export usage for a range of days
+            export_range_option = self.waiter.clickable(
+                (By.XPATH, "//input[@type='radio' and @value='range']"), "export range option"
+            )
+            export_range_option.click()
+
+            # Format dates for PG&E's date pickers
+            from_date = self.validate_and_format_date(start_date)
+            to_date = self.validate_and_format_date(end_date)
+
+            # Enter date range
+            from_date_field = self.waiter.clickable((By.ID, "from-date"), "from date field")
+            from_date_field.clear()
+            from_date_field.send_keys(from_date)
+            self.waiter.value_equals(from_date_field, from_date, "from date typed")
+
+            to_date_field = self.waiter.clickable((By.ID, "to-date"), "to date field")
+            to_date_field.clear()
+            to_date_field.send_keys(to_date)
+            self.waiter.value_equals(to_date_field, to_date, "to date typed")
+
+            # Click download button
+            download_button = self.waiter.clickable(
+                (By.XPATH, "//button[contains(text(), 'Download') or contains(@class, 'download')]"), "download button"
+            )
+            self.monitor.arm()
+            download_button.click()
+            print("Download initiated.")
+            entry = self.monitor.wait_for_download(account, start_date, end_date, self.utility_provider)
+            self.downloads.append(entry)
+            self.step()
+
+            # Return to dashboard
+            driver.get(self.dashboard_url())
+            self.waiter.dom_ready("dashboard")
+            self.page_loaded("dashboard")
+            return entry
+
+        except Exception as e:
+            print(f"Error downloading PG&E Green Button data: {e}")
+            raise
+
+    def download_sdge_file(self, driver, start_date, end_date, account=None):
+        """Download file with custom date range from SDGE."""
+        driver.get(self.portal_url("https://myenergycenter.com/portal/Usage/Index"))
+        self.waiter.network_idle("usage page")
+        self.page_loaded("usage page")
+        self.step()
+
+        from_date = self.validate_and_format_date(start_date)
+        to_date = self.validate_and_format_date(end_date)
+
+        green_button_download = self.waiter.clickable((By.ID, "gbloadpopup"), "green button")
+        green_button_download.click()
+        from_date_picker = self.waiter.modal_open((By.ID, "gbfromdatepicker"), "download modal")
+        print("Modal opened.")
+
+        driver.execute_script("arguments[0].removeAttribute('readonly')", from_date_picker)
+        from_date_picker.clear()
+        from_date_picker.send_keys(from_date)
+        self.waiter.value_equals(from_date_picker, from_date, "start date typed")
+        print(f"Start date entered: {from_date}")
+        from_date_picker.send_keys(Keys.RETURN)
+
+        to_date_picker = self.waiter.present((By.ID, "gbtodatepicker"), "end date picker")
+        driver.execute_script("arguments[0].removeAttribute('readonly')", to_date_picker)
+        to_date_picker.clear()
+        to_date_picker.send_keys(to_date)
+        self.waiter.value_equals(to_date_picker, to_date, "end date typed")
+        print(f"End date entered: {to_date}")
+        to_date_picker.send_keys(Keys.RETURN)
+
+        download_button = self.waiter.clickable((By.ID, "btngbDataDownload"), "download button")
+        self.monitor.arm()
+        download_button.click()
+        print("Download initiated.")
+        entry = self.monitor.wait_for_download(account, start_date, end_date, self.utility_provider)
+        self.downloads.append(entry)
+        self.step()
+        driver.get(self.dashboard_url())
+        self.waiter.dom_ready("dashboard")
+        self.page_loaded("dashboard")
+        return entry
+
+    def list_sdge_accounts(self, driver):
+        """Open the SDGE account dropdown and return the account names in order."""
+        dropdown_button = self.waiter.clickable(SDGE_ACCOUNT_BUTTON, "account dropdown")
+        dropdown_button.click()
+
+        self.waiter.modal_open(SDGE_ACCOUNT_ITEMS, "account list open")
+        accounts = [item.text for item in self.waiter.all_present(SDGE_ACCOUNT_ITEMS, "account list items")]
+
+        dropdown_button.click()
+        self.waiter.modal_closed(SDGE_ACCOUNT_ITEMS, "account list closed")
+        return accounts
+
+    def select_sdge_account(self, driver, index):
+        """Pick an account from the SDGE dropdown and wait for the page to reload."""
+        dropdown_button = self.waiter.clickable(SDGE_ACCOUNT_BUTTON, "account dropdown")
+        dropdown_button.click()
+
+        self.waiter.modal_open(SDGE_ACCOUNT_ITEMS, "account list open")
+        clickable_item = self.waiter.all_present(SDGE_ACCOUNT_ITEMS, "account list items")[index]
+
+        account = clickable_item.text
+        print(f"[{self.name}] Selecting item {index + 1}: {account}")
+        driver.execute_script("arguments[0].scrollIntoView(true);", clickable_item)
+        clickable_item.click()
+
+        print("Waiting for page to reload...")
+        self.waiter.reloaded(dropdown_button, "account switch")
+        self.page_loaded("account switch")
+        print("Page reloaded successfully.")
+        self.step()
+        return account
+
+    def _pge_account_options(self):
+        """Return the PG&E account options, skipping the empty placeholder."""
+        options = self.waiter.all_present(PGE_ACCOUNT_OPTIONS, "account options")
+        if options and options[0].get_attribute("value") == "":
+            options = options[1:]
+        return options
+
+    def list_pge_accounts(self, driver):
+        """Return the PG&E account names, or an empty list when there is no selector."""
+        account_selectors = driver.find_elements(*PGE_ACCOUNT_SELECT)
+        if not account_selectors:
+            print("No account selector found. Downloading data for current account.")
+            return []
+        return [option.text for option in self._pge_account_options()]
+
+    def select_pge_account(self, driver, index):
+        """Pick a PG&E account from the account selector."""
+        account_selector = driver.find_elements(*PGE_ACCOUNT_SELECT)[0]
+        account_selector.click()
+
+        option = self._pge_account_options()[index]
+        account = option.text
+        print(f"[{self.name}] Selecting account {index + 1}: {account}")
+        option.click()
+        self.waiter.network_idle("account switch")
+        self.step()
+        return account
+
+    def list_accounts(self):
+        """Return the account names available to this login."""
+        if self.utility_provider == "SDGE":
+            return self.list_sdge_accounts(self.driver)
+        elif self.utility_provider == "PG&E":
+            return self.list_pge_accounts(self.driver)
+        return []
+
+    def download_account(self, index, start_date, end_date):
+        """Select an account (None keeps the current one) and download its Green Button data."""
+        if self.utility_provider == "SDGE":
+            account = self.select_sdge_account(self.driver, index) if index is not None else None
+            return self.download_sdge_file(self.driver, start_date, end_date, account)
+        elif self.utility_provider == "PG&E":
+            account = self.select_pge_account(self.driver, index) if index is not None else None
+            return self.download_pge_green_button_data(self.driver, start_date, end_date, account)
+        raise NotImplementedError(f"{self.utility_provider} downloads are not yet implemented")
+
+    def recover(self):
+        """Return to the dashboard after a failed account so the next one starts clean."""
+        if self.utility_provider in DASHBOARD_URLS:
+            self.driver.get(self.dashboard_url())
+            self.waiter.dom_ready("dashboard")
+
+
+class PortalJob:
+    """Download every account behind one login, over one or more browser sessions."""
+
+    def __init__(self, utility_provider, url, username, password, start_date, end_date, download_path,
+                 wait_timeouts=None, session_count=1, headless=False, on_progress=None, use_session_cache=True,
+                 fast_path=False, http_workers=4, profile="default", sync=False, window_days=None,
+                 window_retries=1):
+        self.utility_provider = utility_provider
+        self.url = url
+        self.username = username
+        self.password = password
+        self.start_date = start_date
+        self.end_date = end_date
+        self.download_path = download_path
+        self.wait_timeouts = wait_timeouts
+        self.session_count = max(1, int(session_count))
+        self.headless = headless
+        self.on_progress = on_progress
+        self.session_cache = SessionCache() if use_session_cache else None
+        # Fast path: log in with the browser, then fetch exports over plain HTTP
+        self.fast_path = fast_path
+        self.http_workers = http_workers
+        self.profile = profile
+        # Sync mode only fetches the dates the sync state says are missing
+        self.sync = sync
+        self.sync_state = SyncState(download_path)
+        # Long ranges are fetched as several windows and stitched per account
+        self.window_days = window_days or MAX_WINDOW_DAYS.get(utility_provider, DEFAULT_WINDOW_DAYS)
+        self.window_retries = window_retries
+        self.series = []
+        self.step_counter = 0
+        self.total_steps = 1
+        self.results = []
+        self._step_lock = threading.Lock()
+
+    def on_step(self):
+        """Advance the shared progress; called from every browser session."""
+        with self._step_lock:
+            self.step_counter += 1
+            percent = min(100, int((self.step_counter / self.total_steps) * 100))
+        if self.on_progress:
+            self.on_progress(percent)
+
+    def open_session(self, slot):
+        """Start one browser session and log it in."""
+        staging_dir = None
+        if self.session_count > 1:
+            staging_dir = os.path.join(self.download_path, f".session_{slot}")
+        session = PortalAutomation(
+            self.utility_provider, self.url, self.username, self.password, self.download_path,
+            wait_timeouts=self.wait_timeouts, headless=self.headless, staging_dir=staging_dir,
+            on_step=self.on_step, name=f"session {slot}", session_cache=self.session_cache, profile=self.profile,
+        )
+        try:
+            return session.start()
+        except Exception:
+            session.quit()
+            raise
+
+    def run(self):
+        """Log in, list the accounts and download each one. Returns one result per download window."""
+        primary = self.open_session(0)
+        if self.utility_provider == "SCE":
+            # SCE workflow implementation (placeholder)
+            primary.quit()
+            return []
+
+        try:
+            names = primary.list_accounts()
+            # Logins without an account selector download the current account only
+            accounts = list(enumerate(names)) or [(None, None)]
+            work = self.plan(accounts)
+            self.total_steps = max(1, len(work) * primary.steps_per_account())
+            print(f"Found {len(names)} accounts. Total steps: {self.total_steps}.")
+        except Exception:
+            primary.quit()
+            raise
+
+        if not work:
+            print("Every account is already up to date.")
+            primary.quit()
+            return []
+
+        if self.fast_path and self.utility_provider in GREEN_BUTTON_EXPORTS:
+            results = self.run_http(primary, work)
+        else:
+            pool = BrowserSessionPool(self.open_session, self.session_count)
+            results = pool.run(work, self.start_date, self.end_date, first_session=primary)
+        return self.finish(self.retry_failed(results))
+
+    def account_key(self, account):
+        """Stable sync-state key: the account number, or the login for single-account users."""
+        return GreenButtonHttpClient.account_number(account) or f"login:{self.username.lower()}"
+
+    def plan(self, accounts):
+        """Turn (index, name) accounts into (index, name, start, end) downloads.
+
+        Without sync every account gets the full range; with sync only the
+        gaps missing from the sync state are fetched.
+        """
+        work = []
+        for index, name in accounts:
+            if self.sync:
+                ranges = self.sync_state.missing(self.utility_provider, self.account_key(name),
+                                                 self.start_date, self.end_date)
+            else:
+                ranges = [(self.start_date, self.end_date)]
+            for start, end in ranges:
+                work.extend((index, name, window_start, window_end)
+                            for window_start, window_end in split_range(start, end, self.window_days))
+        if self.sync:
+            print(f"Sync: {len(work)} missing date windows across {len(accounts)} accounts.")
+        elif len(work) > len(accounts):
+            print(f"Splitting {self.start_date} to {self.end_date} into {self.window_days}-day windows: "
+                  f"{len(work)} downloads.")
+        return work
+
+    def retry_failed(self, results):
+        """Download failed windows again in fresh browser sessions, keeping the ones that worked."""
+        for attempt in range(self.window_retries):
+            failed = [(r["index"], r["account"], r["start_date"], r["end_date"]) for r in results if not r["ok"]]
+            if not failed:
+                break
+            print(f"Retrying {len(failed)} failed downloads (attempt {attempt + 1} of {self.window_retries}).")
+            self.total_steps += len(failed) * PortalAutomation.STEPS_PER_ACCOUNT.get(self.utility_provider, 1)
+            pool = BrowserSessionPool(self.open_session, self.session_count)
+            retried = pool.run(failed, self.start_date, self.end_date)
+            results = BrowserSessionPool.in_account_order([r for r in results if r["ok"]] + retried)
+        return results
+
+    def finish(self, results):
+        """Keep the results and record every downloaded file's dates in the sync state."""
+        self.results = results
+        for result in results:
+            entry = result["download"]
+            if not result["ok"] or not entry:
+                continue
+            try:
+                self.sync_state.record_file(
+                    self.utility_provider, self.account_key(result["account"]),
+                    os.path.join(self.download_path, entry["file"]), entry["start_date"], entry["end_date"],
+                )
+            except OSError as e:
+                print(f"Could not update sync state for {entry['file']}: {e}")
+        self.series = self.stitch(results)
+        return self.results
+
+    def stitch(self, results):
+        """Combine each account's window files into one deduplicated file; returns manifest entries."""
+        manifest = DownloadManifest(self.download_path)
+        accounts = {}
+        for result in results:
+            if result["ok"] and result["download"]:
+                accounts.setdefault(result["index"], []).append(result["download"])
+
+        series = []
+        for entries in accounts.values():
+            if len(entries) == 1:
+                series.append(entries[0])
+                continue
+            entries.sort(key=lambda e: e["start_date"])
+            paths = [os.path.join(self.download_path, e["file"]) for e in entries]
+            account = entries[0]["account"]
+            start_date, end_date = entries[0]["start_date"], entries[-1]["end_date"]
+            extension = os.path.splitext(paths[0])[1].lower()
+            name = f"GreenButton_{self.account_key(account).replace(':', '_')}_{start_date}_{end_date}{extension}"
+            try:
+                kept, duplicates = stitch_files(paths, os.path.join(self.download_path, name))
+            except (OSError, ValueError) as e:
+                print(f"Could not stitch {len(paths)} downloads for {account or 'current account'}: {e}")
+                series.extend(entries)
+                continue
+            print(f"Stitched {len(paths)} windows for {account or 'current account'} into {name} "
+                  f"({kept} readings, {duplicates} duplicates dropped).")
+            for path in paths:
+                os.remove(path)
+            series.append(manifest.record({
+                "file": name,
+                "account": account,
+                "start_date": start_date,
+                "end_date": end_date,
+                "utility_provider": self.utility_provider,
+                "downloaded_at": datetime.now().isoformat(timespec="seconds"),
+                "seconds": round(sum(e.get("seconds", 0) for e in entries), 3),
+                "parts": [e["file"] for e in entries],
+            }))
+        return series
+
+    def run_http(self, primary, work):
+        """Download over HTTP with the primary session's cookies; retry failures in the browser."""
+        self.total_steps = max(1, len(work))
+        client = GreenButtonHttpClient.from_driver(
+            primary.driver, self.utility_provider, self.download_path, login_url=primary.login_url(),
+            max_workers=self.http_workers, on_step=self.on_step,
+        )
+        try:
+            results = client.export_all(work, self.start_date, self.end_date)
+        finally:
+            client.close()
+
+        succeeded = [r for r in results if r["ok"]]
+        retry = [(r["index"], r["account"], r["start_date"], r["end_date"]) for r in results if not r["ok"]]
+        if not retry:
+            primary.quit()
+            return results
+
+        if client.unavailable.is_set():
+            print("The HTTP export endpoint is not available; downloading in the browser instead.")
+        else:
+            print(f"{len(retry)} downloads failed over HTTP, retrying them in the browser.")
+        self.total_steps += len(retry) * primary.steps_per_account()
+        pool = BrowserSessionPool(self.open_session, self.session_count)
+        browser_results = pool.run(retry, self.start_date, self.end_date, first_session=primary)
+        return BrowserSessionPool.in_account_order(succeeded + browser_results)
+
+    @property
+    def downloads(self):
+        """Manifest entries for the files downloaded, one per account once windows are stitched."""
+        return list(self.series)
+
+    def failures(self):
+        return BrowserSessionPool.failure_report(self.results)
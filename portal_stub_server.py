@@ -0,0 +1,164 @@
+# Author: SupportDone.com
+# Local stand-in for the SDGE portal, for exercising the automation without real credentials
+#
+# Usage: python portal_stub_server.py --port 8765 --accounts 5
+# Then use http://127.0.0.1:8765/portal/PreLogin/Validate as the portal URL
+# with any username and the password "secret".
+# The export endpoint is the one green_button_http assumes, not a recording of the
+# real portal, so passing against the stub doesn't show the real portal has it.
+
+import sys
+import time
+import secrets
+import argparse
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+PASSWORD = "secret"
+
+LOGIN_PAGE = """<html><body>
+<form method="post" action="/portal/PreLogin/Validate">
+<input id="usernamex" name="username"><input id="passwordx" name="password" type="password">
+<button id="btnlogin" type="submit">Log in</button>
+</form></body></html>"""
+
+DASHBOARD_PAGE = """<html><body>
+<button data-id="accountList" onclick="var m=document.getElementById('menu');m.style.display=m.style.display=='none'?'block':'none'">Accounts</button>
+<ul id="menu" class="dropdown-menu" style="display:none">{items}</ul>
+</body></html>"""
+
+
+def interval_csv(account_number, meter_number, start, end):
+    """Build an SDG&E 'CSV Export Electric Meter(s)' file with 15-minute rows."""
+    lines = [
+        "Name,STUB CUSTOMER,,,,,,,,,Consumption,Solar,Delivery",
+        "Address,1 TEST ST San Diego CA 92101,,,,,,,,Reduce Your Use Event,0,0,",
+        f"Account Number,{account_number},,,,,,,,On-Peak,0,0,",
+        "Disclaimer,Stand-in data for testing.,,,,,,,,Off Peak,0,0,",
+        "Title,CSV Export Electric Meter(s),,,,,,,,Super Off-Peak,0,0,",
+        "Resource,Electric,,,,,,,,,,,",
+        f"Meter Number,{meter_number},,,,,,,,,,,",
+        "Interval UOM,Minute(s),,,,,,,,,,,",
+        f"Reading Start,{start.month}/{start.day}/{start.year} 0:00,,,,,,,,,,,",
+        f"Reading End,{end.month}/{end.day}/{end.year} 23:45,,,,,,,,,,,",
+        f"Total Duration,{(end - start).days + 1} Days,,,,,,,,,,,",
+        "Total Usage,0,,,,,,,,,,,",
+        "UOM,kWh,,,,,,,,,,,",
+        "Meter Number,Date,Start Time,Duration,Consumption,Generation,Net,Hour ,Model,Price Type,Tier,Tier Price, Total (Net*Tier Price) ",
+    ]
+    moment = datetime(start.year, start.month, start.day)
+    stop = datetime(end.year, end.month, end.day) + timedelta(days=1)
+    while moment < stop:
+        consumption = round(0.05 + (moment.hour % 12) * 0.01, 3)
+        model = "Weekday" if moment.weekday() < 5 else "Weekend"
+        price_type = 1 if 16 <= moment.hour < 21 else 4
+        clock = moment.strftime("%I:%M %p").lstrip("0")
+        lines.append(
+            f"{meter_number},{moment.month}/{moment.day}/{moment.year},{clock},15,{consumption},0,{consumption},"
+            f"{moment.hour},{model},{price_type},1,0.13, ${consumption * 0.13:.4f} "
+        )
+        moment += timedelta(minutes=15)
+    return "\n".join(lines) + "\n"
+
+
+class StubPortalHandler(BaseHTTPRequestHandler):
+    """Serves login, dashboard and Green Button export pages."""
+
+    sessions = set()
+    accounts = []
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _authenticated(self):
+        cookie = self.headers.get("Cookie", "")
+        return any(part.strip().split("=", 1)[-1] in self.sessions for part in cookie.split(";") if "=" in part)
+
+    def _send(self, status, body, content_type="text/html", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location, headers=None):
+        self.send_response(303)
+        self.send_header("Location", location)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/portal/PreLogin/Validate":
+            return self._send(200, LOGIN_PAGE)
+        if not self._authenticated():
+            return self._redirect("/portal/PreLogin/Validate")
+
+        if url.path == "/portal/Dashboard/index":
+            items = "".join(f"<li><a>{number} - {i + 1} TEST ST</a></li>" for i, number in enumerate(self.accounts))
+            return self._send(200, DASHBOARD_PAGE.format(items=items))
+        if url.path == "/portal/Usage/GreenButtonExport":
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            try:
+                start = datetime.strptime(query["fromDate"], "%B %d, %Y")
+                end = datetime.strptime(query["toDate"], "%B %d, %Y")
+            except (KeyError, ValueError):
+                return self._send(400, "fromDate and toDate are required", "text/plain")
+            account_number = query.get("accountNumber", self.accounts[0])
+            if account_number not in self.accounts:
+                # Not 404, which the client takes to mean the endpoint doesn't exist
+                return self._send(400, f"Unknown account {account_number}", "text/plain")
+            time.sleep(self.latency)
+            meter_number = str(6330000 + self.accounts.index(account_number))
+            filename = f"Electric_15_Minute_{account_number}_{start:%m-%d-%Y}_{end:%m-%d-%Y}.csv"
+            return self._send(
+                200, interval_csv(account_number, meter_number, start, end), "text/csv",
+                {"Content-Disposition": f'attachment; filename="{filename}"'},
+            )
+        return self._send(404, "Not found", "text/plain")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/portal/PreLogin/Validate":
+            return self._send(404, "Not found", "text/plain")
+        length = int(self.headers.get("Content-Length", 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+        if form.get("password") != PASSWORD:
+            return self._send(200, LOGIN_PAGE)
+        token = secrets.token_hex(16)
+        self.sessions.add(token)
+        self._redirect("/portal/Dashboard/index", {"Set-Cookie": f"ASP.NET_SessionId={token}; Path=/"})
+
+
+def make_server(port=8765, account_count=3, latency=0.0):
+    """Create (but don't start) a stand-in portal server."""
+    StubPortalHandler.accounts = [str(210001213137 + i) for i in range(account_count)]
+    StubPortalHandler.latency = latency
+    return ThreadingHTTPServer(("127.0.0.1", port), StubPortalHandler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the SDGE Green Button portal.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--accounts", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to delay each export")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.port, args.accounts, args.latency)
+    print(f"Stub portal on http://127.0.0.1:{args.port}/portal/PreLogin/Validate (password: {PASSWORD})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# Author: SupportDone.com
+# Condition-based waits for the utility portal automation
+
+import time
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+
+class PortalWaiter:
+    """Wait for page conditions instead of sleeping, and time every wait."""
+
+    # Upper bounds in seconds per kind of step. A wait returns as soon as
+    # its condition holds, so these only matter when the portal is slow.
+    DEFAULT_TIMEOUTS = {
+        "page_load": 20,
+        "element": 10,
+        "modal": 10,
+        "reload": 20,
+        "network_idle": 15,
+        "input": 5,
+    }
+    POLL_FREQUENCY = 0.1
+    NETWORK_QUIET_PERIOD = 0.5
+
+    def __init__(self, driver, timeouts=None, ready_states=("complete",)):
+        self.driver = driver
+        self.timeouts = dict(self.DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        # Document states treated as loaded; an eager page-load strategy
+        # hands control back at "interactive"
+        self.ready_states = tuple(ready_states)
+        self.timings = []
+
+    def _wait(self, step, kind, condition, timeout=None):
+        """Run a WebDriverWait for one step and record how long it took."""
+        if timeout is None:
+            timeout = self.timeouts[kind]
+        started = time.perf_counter()
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=self.POLL_FREQUENCY).until(condition)
+        except TimeoutException:
+            self._record(step, kind, started, timed_out=True)
+            raise
+        self._record(step, kind, started, timed_out=False)
+        return result
+
+    def _record(self, step, kind, started, timed_out):
+        self.timings.append({
+            "step": step,
+            "kind": kind,
+            "seconds": round(time.perf_counter() - started, 3),
+            "timed_out": timed_out,
+        })
+
+    def dom_ready(self, step="dom ready", timeout=None):
+        """Wait until the document has finished loading."""
+        return self._wait(
+            step, "page_load",
+            lambda d: d.execute_script("return document.readyState") in self.ready_states,
+            timeout,
+        )
+
+    def present(self, locator, step=None, timeout=None):
+        """Wait for an element to be attached to the DOM."""
+        return self._wait(step or f"present {locator[1]}", "element", EC.presence_of_element_located(locator), timeout)
+
+    def all_present(self, locator, step=None, timeout=None):
+        """Wait for at least one element matching the locator."""
+        return self._wait(step or f"present {locator[1]}", "element", EC.presence_of_all_elements_located(locator), timeout)
+
+    def clickable(self, locator, step=None, timeout=None):
+        """Wait for an element to be visible and enabled."""
+        return self._wait(step or f"clickable {locator[1]}", "element", EC.element_to_be_clickable(locator), timeout)
+
+    def modal_open(self, locator, step=None, timeout=None):
+        """Wait for a modal (or an element inside it) to become visible."""
+        return self._wait(step or f"modal open {locator[1]}", "modal", EC.visibility_of_element_located(locator), timeout)
+
+    def modal_closed(self, locator, step=None, timeout=None):
+        """Wait for a modal to be hidden or removed."""
+        return self._wait(step or f"modal closed {locator[1]}", "modal", EC.invisibility_of_element_located(locator), timeout)
+
+    def value_equals(self, element, value, step="input value", timeout=None):
+        """Wait until an input field holds the text that was typed into it."""
+        return self._wait(step, "input", lambda d: element.get_attribute("value") == value, timeout)
+
+    def reloaded(self, old_element, step="page reload", timeout=None):
+        """Wait for an element from the previous page to go stale, then for the new DOM."""
+        self._wait(step, "reload", EC.staleness_of(old_element), timeout)
+        return self.dom_ready(f"{step} (dom ready)")
+
+    def network_idle(self, step="network idle", timeout=None, quiet_period=None):
+        """Wait until no jQuery requests are active and no new resources load for a quiet period.
+
+        Pages with constant background polling may never go quiet, so a
+        timeout here is recorded and returns False instead of raising.
+        """
+        if quiet_period is None:
+            quiet_period = self.NETWORK_QUIET_PERIOD
+        state = {"count": -1, "since": time.perf_counter()}
+
+        def settled(driver):
+            ready, active, count = driver.execute_script(
+                "return [document.readyState,"
+                " (window.jQuery && window.jQuery.active) || 0,"
+                " performance.getEntriesByType('resource').length];"
+            )
+            now = time.perf_counter()
+            if ready not in self.ready_states or active or count != state["count"]:
+                state["count"] = count
+                state["since"] = now
+                return False
+            return now - state["since"] >= quiet_period
+
+        try:
+            return self._wait(step, "network_idle", settled, timeout)
+        except TimeoutException:
+            print(f"Network did not go idle for '{step}', continuing.")
+            return False
+
+    def total_seconds(self):
+        """Total time spent waiting across all recorded steps."""
+        return round(sum(t["seconds"] for t in self.timings), 3)
+
+    def report(self):
+        """Summarise recorded waits per step: count, total, slowest and timeouts."""
+        summary = {}
+        for timing in self.timings:
+            entry = summary.setdefault(timing["step"], {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+            entry["count"] += 1
+            entry["total"] = round(entry["total"] + timing["seconds"], 3)
+            entry["max"] = max(entry["max"], timing["seconds"])
+            entry["timeouts"] += int(timing["timed_out"])
+        return summary
+
+    def print_report(self):
+        """Print how long each wait actually took."""
+        print(f"Wait report ({len(self.timings)} waits, {self.total_seconds()}s total):")
+        for step, entry in self.report().items():
+            line = f"  {step}: {entry['count']}x, total {entry['total']}s, max {entry['max']}s"
+            if entry["timeouts"]:
+                line += f", {entry['timeouts']} timed out"
+            print(line)
@@ -0,0 +1,193 @@
+# Author: SupportDone.com
+# Reader for SDG&E "CSV Export Electric Meter(s)" interval files
+
+import io
+import os
+import csv
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+HEADER_PREFIX = "Meter Number,Date,Start Time"
+HEADER_SCAN_LINES = 40
+
+COLUMNS = [
+    "meter_number", "date", "start_time", "duration", "consumption", "generation", "net",
+    "hour", "model", "price_type", "tier", "tier_price", "total",
+]
+DTYPES = {
+    "meter_number": "string",
+    "date": "string",
+    "start_time": "string",
+    "duration": "float64",
+    "consumption": "float64",
+    "generation": "float64",
+    "net": "float64",
+    "hour": "float64",
+    "model": "string",
+    "price_type": "float64",
+    "tier": "float64",
+    "tier_price": "float64",
+    "total": "string",
+}
+# Period summary in columns J-M of the header block
+SUMMARY_COLUMNS = ("consumption", "solar", "delivery")
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _datetime(value):
+    for date_format in ("%m/%d/%Y %H:%M", "%m/%d/%Y %I:%M %p", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(value.strip(), date_format)
+        except (AttributeError, ValueError):
+            continue
+    return None
+
+
+class SDGEMetadata:
+    """The header block of an SDG&E interval export."""
+
+    FIELDS = {
+        "Name": "name",
+        "Address": "address",
+        "Account Number": "account_number",
+        "Disclaimer": "disclaimer",
+        "Title": "title",
+        "Resource": "resource",
+        "Meter Number": "meter_number",
+        "Interval UOM": "interval_uom",
+        "Reading Start": "reading_start",
+        "Reading End": "reading_end",
+        "Total Duration": "total_duration",
+        "Total Usage": "total_usage",
+        "UOM": "uom",
+    }
+
+    def __init__(self):
+        for attribute in self.FIELDS.values():
+            setattr(self, attribute, None)
+        # {"On-Peak": {"consumption": 92.665, "solar": 46.5058, "delivery": None}, ...}
+        self.period_summary = {}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build metadata from the csv rows above the interval header."""
+        metadata = cls()
+        for row in rows:
+            if not row:
+                continue
+            attribute = cls.FIELDS.get(row[0].strip())
+            if attribute and len(row) > 1:
+                setattr(metadata, attribute, row[1].strip())
+            if len(row) > 9 and row[9].strip():
+                values = [_number(v) for v in row[10:13]] + [None] * (3 - len(row[10:13]))
+                metadata.period_summary[row[9].strip()] = dict(zip(SUMMARY_COLUMNS, values))
+        metadata.reading_start = _datetime(metadata.reading_start)
+        metadata.reading_end = _datetime(metadata.reading_end)
+        metadata.total_usage = _number(metadata.total_usage)
+        return metadata
+
+    @property
+    def interval_seconds_per_unit(self):
+        """Seconds per Duration unit (the export states minutes)."""
+        uom = (self.interval_uom or "").lower()
+        if uom.startswith("hour"):
+            return 3600
+        if uom.startswith("second"):
+            return 1
+        return 60
+
+    def to_dict(self):
+        result = {attribute: getattr(self, attribute) for attribute in self.FIELDS.values()}
+        for key in ("reading_start", "reading_end"):
+            if result[key] is not None:
+                result[key] = result[key].isoformat()
+        result["period_summary"] = self.period_summary
+        return result
+
+
+def open_text(source):
+    """Open a path, or wrap a binary stream such as a zip member, as text."""
+    if isinstance(source, (str, bytes, os.PathLike)):
+        return open(source, "r", encoding="utf-8-sig", newline="")
+    return io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+
+
+def read_header(f):
+    """Read lines up to and including the interval header.
+
+    Returns (metadata rows above it, header line number), or None if this
+    isn't an SDG&E export. The stream is left at the first interval row.
+    """
+    rows = []
+    for number in range(HEADER_SCAN_LINES + 1):
+        line = f.readline()
+        if not line:
+            return None
+        if line.startswith(HEADER_PREFIX):
+            return rows, number
+        rows.extend(csv.reader([line]))
+    return None
+
+
+def find_header(path):
+    """Return (metadata rows, header line number) or None if this isn't an SDG&E export."""
+    with open_text(path) as f:
+        return read_header(f)
+
+
+def is_sdge_csv(path):
+    """Cheap check for the SDG&E export layout."""
+    try:
+        return find_header(path) is not None
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def currency(series):
+    """Turn ' $0.0072 ', ' $(0.01) ' and ' $-   ' into floats (NaN for '-')."""
+    cleaned = series.str.strip().str.replace(r"[$,\s]", "", regex=True)
+    negative = cleaned.str.startswith("(") & cleaned.str.endswith(")")
+    cleaned = cleaned.str.strip("()")
+    values = pd.to_numeric(cleaned.where(cleaned != "-"), errors="coerce")
+    return values.where(~negative.fillna(False), -values)
+
+
+def read_sdge_csv(source):
+    """Read an SDG&E interval export from a path or binary stream. Returns (SDGEMetadata, DataFrame).
+
+    The DataFrame has the export's columns under snake_case names plus
+    'timestamp' (Date + Start Time), 'duration' in seconds and 'value' (Net
+    kWh), so it lines up with GBDXMLParser output. Filler rows without a
+    meter number at the end of the export are dropped. The file is read once:
+    the header block, then the interval rows from where it ended.
+    """
+    with open_text(source) as f:
+        found = read_header(f)
+        if found is None:
+            raise ValueError(f"{getattr(source, 'name', source)} is not an SDG&E 'CSV Export Electric Meter(s)' file")
+        metadata = SDGEMetadata.from_rows(found[0])
+        df = pd.read_csv(
+            f, header=None, names=COLUMNS, usecols=range(len(COLUMNS)),
+            dtype=DTYPES, engine="c", skipinitialspace=False,
+        )
+    df = df[df["meter_number"].notna() & df["date"].notna()].reset_index(drop=True)
+
+    df["timestamp"] = pd.to_datetime(
+        df["date"] + " " + df["start_time"], format="%m/%d/%Y %I:%M %p"
+    ).astype("datetime64[ns]")
+    df["duration"] = (df["duration"].fillna(0) * metadata.interval_seconds_per_unit).astype(np.int32)
+    df["total"] = currency(df["total"]).astype("float64")
+    for column in ("hour", "price_type", "tier"):
+        df[column] = df[column].astype("Int16")
+    df["value"] = df["net"]
+    df = df.drop(columns=["date", "start_time"])
+    ordered = ["timestamp", "duration", "value", "meter_number", "consumption", "generation", "net",
+               "hour", "model", "price_type", "tier", "tier_price", "total"]
+    return metadata, df[ordered]
@@ -0,0 +1,158 @@
+# Author: SupportDone.com
+# Encrypted on-disk cache of logged-in portal sessions (cookies + local storage)
+
+import os
+import json
+import time
+import tempfile
+import hashlib
+from cryptography.fernet import Fernet, InvalidToken
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".youpower", "sessions")
+# The encryption key lives outside the cache directory: in the OS keyring when the
+# keyring package is installed (Windows Credential Manager / DPAPI, macOS Keychain,
+# Secret Service), otherwise in a per-user key directory readable only by the user
+KEYRING_SERVICE = "YouPower session cache"
+if os.name == "nt":
+    DEFAULT_KEY_DIR = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "YouPower", "keys")
+else:
+    DEFAULT_KEY_DIR = os.path.join(os.environ.get("XDG_CONFIG_HOME", os.path.join(os.path.expanduser("~"), ".config")),
+                                   "youpower", "keys")
+
+
+class SessionCache:
+    """Save and restore authenticated browser state per provider and username.
+
+    Entries are encrypted with a Fernet key that is stored apart from the
+    cache (see KEYRING_SERVICE and DEFAULT_KEY_DIR), so a copy of the cache
+    directory alone (a backup, a synced folder) doesn't expose the cookies.
+    It does not protect against malware or anyone else able to act as the
+    same OS user, since they can read the key as well.
+    """
+
+    MAX_AGE = 12 * 60 * 60  # Portals expire idle sessions; don't try older ones
+
+    def __init__(self, cache_dir=None, max_age=None, key_dir=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.key_dir = key_dir or DEFAULT_KEY_DIR
+        self.max_age = self.MAX_AGE if max_age is None else max_age
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._fernet = Fernet(self._load_key())
+
+    def _key_name(self):
+        # One key per cache directory
+        return hashlib.sha256(os.path.abspath(self.cache_dir).encode("utf-8")).hexdigest()[:32]
+
+    def _load_key(self):
+        # Older versions kept the key inside the cache directory; move it out
+        legacy_path = os.path.join(self.cache_dir, "session.key")
+        legacy_key = None
+        if os.path.exists(legacy_path):
+            with open(legacy_path, "rb") as f:
+                legacy_key = f.read()
+
+        key = self._read_stored_key()
+        if key is None:
+            key = legacy_key or Fernet.generate_key()
+            self._store_key(key)
+        if legacy_key is not None:
+            os.remove(legacy_path)
+        return key
+
+    def _read_stored_key(self):
+        try:
+            import keyring
+            key = keyring.get_password(KEYRING_SERVICE, self._key_name())
+            if key:
+                return key.encode("ascii")
+        except Exception:
+            # No keyring package or no usable backend: fall back to the key directory
+            pass
+        key_path = os.path.join(self.key_dir, f"{self._key_name()}.key")
+        if os.path.exists(key_path):
+            with open(key_path, "rb") as f:
+                return f.read()
+        return None
+
+    def _store_key(self, key):
+        try:
+            import keyring
+            keyring.set_password(KEYRING_SERVICE, self._key_name(), key.decode("ascii"))
+            return
+        except Exception:
+            pass
+        os.makedirs(self.key_dir, mode=0o700, exist_ok=True)
+        key_path = os.path.join(self.key_dir, f"{self._key_name()}.key")
+        # Create the file with owner-only permissions rather than tightening them afterwards
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+
+    def _path(self, utility_provider, username):
+        # Hash the username so the store doesn't reveal who is cached
+        digest = hashlib.sha256(f"{utility_provider}:{username.lower()}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest[:32]}.session")
+
+    def load(self, utility_provider, username):
+        """Return the saved state for a login, or None if missing, expired or unreadable."""
+        path = self._path(utility_provider, username)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                state = json.loads(self._fernet.decrypt(f.read()))
+        except (OSError, ValueError, InvalidToken) as e:
+            print(f"Discarding unreadable saved session: {e}")
+            self.clear(utility_provider, username)
+            return None
+        if time.time() - state.get("saved_at", 0) > self.max_age:
+            self.clear(utility_provider, username)
+            return None
+        return state
+
+    def save(self, utility_provider, username, driver):
+        """Capture cookies and local storage from a logged-in driver."""
+        try:
+            local_storage = driver.execute_script(
+                "return Object.fromEntries(Object.entries(window.localStorage));"
+            ) or {}
+        except Exception:
+            local_storage = {}
+        state = {
+            "saved_at": time.time(),
+            "url": driver.current_url,
+            "cookies": driver.get_cookies(),
+            "local_storage": local_storage,
+        }
+        path = self._path(utility_provider, username)
+        # A temp file of its own, since parallel sessions of one login save at the same time
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._fernet.encrypt(json.dumps(state).encode("utf-8")))
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def restore(driver, state, origin_url):
+        """Load saved cookies and local storage into a driver that is on origin_url's site."""
+        driver.get(origin_url)
+        driver.delete_all_cookies()
+        for cookie in state.get("cookies", []):
+            try:
+                driver.add_cookie(cookie)
+            except Exception:
+                # Cookies for other domains (e.g. the SSO host) can't be set from here
+                pass
+        for key, value in state.get("local_storage", {}).items():
+            driver.execute_script("window.localStorage.setItem(arguments[0], arguments[1]);", key, value)
+
+    def clear(self, utility_provider, username):
+        """Forget the saved session for a login."""
+        try:
+            os.remove(self._path(utility_provider, username))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,112 @@
+# Author: SupportDone.com
+# Runs account downloads across several logged-in browser sessions at once
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BrowserSessionPool:
+    """Spread per-account work over a pool of logged-in browser sessions.
+
+    open_session(slot) must return a started, logged-in session exposing
+    download_account(index, start_date, end_date), recover() and quit().
+    Work items are (index, name) pairs, or (index, name, start_date,
+    end_date) when an item needs its own date range. Every session gets a
+    disjoint slice of the items.
+    """
+
+    def __init__(self, open_session, size=1, on_result=None):
+        self.open_session = open_session
+        self.size = max(1, int(size))
+        self.on_result = on_result
+        self.results = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def work_item(item, start_date, end_date):
+        """Expand an (index, name) pair to (index, name, start_date, end_date)."""
+        if len(item) == 4:
+            return tuple(item)
+        index, name = item
+        return index, name, start_date, end_date
+
+    @staticmethod
+    def partition(accounts, size):
+        """Split work items into interleaved, non-overlapping slices."""
+        return [accounts[slot::size] for slot in range(size) if accounts[slot::size]]
+
+    def _record(self, result):
+        with self._lock:
+            self.results.append(result)
+        status = "OK" if result["ok"] else f"FAILED: {result['error']}"
+        print(f"[session {result['session']}] {result['account'] or 'current account'}: {status}")
+        if self.on_result:
+            self.on_result(result)
+
+    def _run_slice(self, slot, items, session=None):
+        """Log in (unless a session is handed over) and download every item in the slice."""
+        try:
+            if session is None:
+                session = self.open_session(slot)
+        except Exception as e:
+            for index, name, start_date, end_date in items:
+                self._record({"session": slot, "index": index, "account": name, "ok": False,
+                              "error": f"Session failed to start: {e}", "download": None, "seconds": 0.0,
+                              "start_date": start_date, "end_date": end_date})
+            return
+
+        try:
+            for index, name, start_date, end_date in items:
+                started = time.perf_counter()
+                try:
+                    entry = session.download_account(index, start_date, end_date)
+                    self._record({"session": slot, "index": index, "account": name, "ok": True, "error": None,
+                                  "download": entry, "seconds": round(time.perf_counter() - started, 3),
+                                  "start_date": start_date, "end_date": end_date})
+                except Exception as e:
+                    self._record({"session": slot, "index": index, "account": name, "ok": False, "error": str(e),
+                                  "download": None, "seconds": round(time.perf_counter() - started, 3),
+                                  "start_date": start_date, "end_date": end_date})
+                    try:
+                        session.recover()
+                    except Exception as recover_error:
+                        print(f"[session {slot}] Could not recover after failure: {recover_error}")
+        finally:
+            session.quit()
+
+    def run(self, accounts, start_date, end_date, first_session=None):
+        """Download every work item and return one result per item, in account order.
+
+        first_session, if given, is an already logged-in session reused for slot 0.
+        """
+        items = [self.work_item(item, start_date, end_date) for item in accounts]
+        slices = self.partition(items, self.size)
+        if not slices:
+            if first_session is not None:
+                first_session.quit()
+            return []
+
+        if first_session is not None and len(slices) == 1:
+            self._run_slice(0, slices[0], first_session)
+        else:
+            print(f"Running {len(items)} downloads across {len(slices)} browser sessions.")
+            with ThreadPoolExecutor(max_workers=len(slices)) as executor:
+                futures = [
+                    executor.submit(self._run_slice, slot, account_slice, first_session if slot == 0 else None)
+                    for slot, account_slice in enumerate(slices)
+                ]
+                for future in futures:
+                    future.result()
+
+        return self.in_account_order(self.results)
+
+    @staticmethod
+    def in_account_order(results):
+        """Sort results by dropdown position, then by date range."""
+        return sorted(results, key=lambda r: (r["index"] is None, r["index"] or 0, r.get("start_date") or ""))
+
+    @staticmethod
+    def failure_report(results):
+        """Return one line per failed account."""
+        return [f"{r['account'] or 'current account'}: {r['error']}" for r in results if not r["ok"]]
@@ -0,0 +1,197 @@
+# Author: SupportDone.com
+# Index of interval date ranges already on disk, per utility, account and meter
+
+import os
+import csv
+import json
+import threading
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from utility_timezone import DEFAULT_TIMEZONE
+
+SYNC_STATE_NAME = "youpower_sync.json"
+ESPI_NS = "{http://naesb.org/espi}"
+# ESPI epoch times are converted to the utility's wall clock, as in interval_validation
+UTILITY_ZONE = ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def _day(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def merge_ranges(ranges):
+    """Merge inclusive (start, end) ISO date ranges that overlap or touch."""
+    merged = []
+    for start, end in sorted((_day(s), _day(e)) for s, e in ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(s.isoformat(), e.isoformat()) for s, e in merged]
+
+
+def intersect_ranges(a, b):
+    """Dates covered by both lists of merged ranges."""
+    result = []
+    for a_start, a_end in a:
+        for b_start, b_end in b:
+            start, end = max(a_start, b_start), min(a_end, b_end)
+            if start <= end:
+                result.append((start, end))
+    return merge_ranges(result)
+
+
+def missing_ranges(covered, start_date, end_date):
+    """Inclusive date ranges between start_date and end_date not in covered."""
+    gaps = []
+    cursor = _day(start_date)
+    last = _day(end_date)
+    for start, end in merge_ranges(covered):
+        start, end = _day(start), _day(end)
+        if end < cursor:
+            continue
+        if start > last:
+            break
+        if start > cursor:
+            gaps.append((cursor.isoformat(), (start - timedelta(days=1)).isoformat()))
+        cursor = max(cursor, end + timedelta(days=1))
+    if cursor <= last:
+        gaps.append((cursor.isoformat(), last.isoformat()))
+    return gaps
+
+
+def _full_days(first, last_start, last_end):
+    """(first, last) dates, dropping the last day if its readings stop before midnight."""
+    last = last_start.date()
+    if last_end.date() == last and last_end.time() != datetime.min.time():
+        last -= timedelta(days=1)
+    if last < first.date():
+        return None
+    return first.date().isoformat(), last.isoformat()
+
+
+def file_coverage(path):
+    """Return {meter: (first_date, last_date)} of complete days in a Green Button file.
+
+    Returns None when the file isn't a format we can read.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == ".csv":
+            return _csv_coverage(path)
+        if extension == ".xml":
+            return _xml_coverage(path)
+    except (OSError, ValueError, ET.ParseError) as e:
+        print(f"Could not read coverage from {os.path.basename(path)}: {e}")
+    return None
+
+
+def _csv_coverage(path):
+    meters = {}
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = csv.reader(f)
+        for row in rows:
+            if row[:2] == ["Meter Number", "Date"]:
+                break
+        else:
+            return None
+        for row in rows:
+            if len(row) < 4 or not row[1]:
+                continue
+            moment = datetime.strptime(f"{row[1]} {row[2]}", "%m/%d/%Y %I:%M %p")
+            end = moment + timedelta(minutes=int(float(row[3] or 15)))
+            span = meters.setdefault(row[0].strip(), [moment, moment, end])
+            if moment < span[0]:
+                span[0] = moment
+            if moment > span[1]:
+                span[1], span[2] = moment, end
+    return {meter: days for meter, days in ((m, _full_days(*s)) for m, s in meters.items()) if days} or None
+
+
+def _xml_coverage(path):
+    first = last_start = last_end = None
+    for _, element in ET.iterparse(path):
+        if element.tag == f"{ESPI_NS}IntervalReading":
+            start = element.find(f"{ESPI_NS}timePeriod/{ESPI_NS}start")
+            duration = element.find(f"{ESPI_NS}timePeriod/{ESPI_NS}duration")
+            if start is not None:
+                # ESPI times are epoch seconds; coverage days are the utility's local days
+                utc = datetime.fromtimestamp(int(start.text), timezone.utc)
+                end_utc = utc + timedelta(seconds=int(duration.text) if duration is not None else 900)
+                moment = utc.astimezone(UTILITY_ZONE).replace(tzinfo=None)
+                end = end_utc.astimezone(UTILITY_ZONE).replace(tzinfo=None)
+                if first is None or moment < first:
+                    first = moment
+                if last_start is None or moment > last_start:
+                    last_start, last_end = moment, end
+            element.clear()
+    if first is None:
+        return None
+    days = _full_days(first, last_start, last_end)
+    return {"": days} if days else None
+
+
+class SyncState:
+    """Which date ranges are stored for each utility / account / meter.
+
+    Stored as JSON in the download folder next to the download manifest:
+    {utility: {account: {meter: [[start, end], ...]}}} with inclusive ISO dates.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, download_dir):
+        self.path = os.path.join(download_dir, SYNC_STATE_NAME)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, state):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def record(self, utility_provider, account, meter, start_date, end_date):
+        """Mark a date range as stored for one meter."""
+        with self._lock:
+            state = self.load()
+            meters = state.setdefault(utility_provider, {}).setdefault(account, {})
+            meters[meter] = [list(r) for r in merge_ranges(meters.get(meter, []) + [(start_date, end_date)])]
+            self._save(state)
+
+    def record_file(self, utility_provider, account, path, start_date, end_date):
+        """Record the days a downloaded file actually contains.
+
+        Returns the coverage, or None when it can't be read from the file
+        (a PG&E CSV, or an error page saved as .csv); nothing is recorded
+        then, so the next sync asks for those dates again.
+        """
+        coverage = file_coverage(path)
+        if coverage is None:
+            print(f"No readings found in {os.path.basename(path)}; {start_date} to {end_date} not marked as stored")
+            return None
+        for meter, (first, last) in coverage.items():
+            # Only credit days that were asked for; portals sometimes pad the range
+            first, last = max(first, start_date), min(last, end_date)
+            if first <= last:
+                self.record(utility_provider, account, meter, first, last)
+        return coverage
+
+    def covered(self, utility_provider, account):
+        """Ranges stored for every known meter of an account."""
+        meters = self.load().get(utility_provider, {}).get(account, {})
+        ranges = None
+        for meter_ranges in meters.values():
+            meter_ranges = [tuple(r) for r in meter_ranges]
+            ranges = meter_ranges if ranges is None else intersect_ranges(ranges, meter_ranges)
+        return ranges or []
+
+    def missing(self, utility_provider, account, start_date, end_date):
+        """Date ranges still to fetch for an account."""
+        return missing_ranges(self.covered(utility_provider, account), start_date, end_date)
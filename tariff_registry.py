@@ -0,0 +1,239 @@
+# Author: SupportDone.com
+# Tariff registry: rate schedules loaded from versioned JSON files in tariffs/, compiled once per process
+#
+# Usage: python tariff_registry.py [tariff --check <SDG&E export with Price Type columns>]
+
+import os
+import sys
+import glob
+import json
+import argparse
+import functools
+import numpy as np
+import pandas as pd
+from holiday_calendar import holiday_rules
+from tou_periods import (PeriodTable, ON_PEAK, OFF_PEAK, SUPER_OFF_PEAK, PART_PEAK, WEEKDAY, WEEKEND_HOLIDAY,
+                         ALL_MONTHS, DAY_TYPES)
+
+# Frozen (PyInstaller) builds unpack the tariffs folder next to the modules in _MEIPASS
+TARIFF_DIR = os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))), "tariffs")
+PERIOD_CODES = {"on_peak": ON_PEAK, "off_peak": OFF_PEAK, "super_off_peak": SUPER_OFF_PEAK, "part_peak": PART_PEAK}
+DAY_TYPE_CODES = {"weekday": WEEKDAY, "weekend_holiday": WEEKEND_HOLIDAY}
+# Tariff used for each utility provider when none is given
+PROVIDER_TARIFFS = {"PG&E": "pge_tou_c", "SDGE": "sdge_tou_dr1"}
+DEFAULT_TARIFF = "pge_tou_c"
+# Versions without an effective date apply from the start
+EARLIEST = pd.Timestamp.min
+
+
+class Tariff:
+    """One version of a rate schedule, compiled to arrays for the billing engine.
+
+    - periods: PeriodTable for TOU classification, with the version's holidays;
+    - period_order: period codes in the order they fill the tiers;
+    - month_seasons: season index for each month (index 0 unused);
+    - tier_bounds: cumulative tier limits as fractions of baseline (inf for the last tier);
+    - rates: array [season, period position, tier] with the season multiplier applied;
+    - baselines: {climate zone: daily kWh per season}.
+    """
+
+    def __init__(self, name, spec, title=None, provider=None):
+        self.name = name
+        self.title = title or name
+        self.provider = provider
+        self.version = spec.get("version")
+        self.source = spec.get("source")
+        self.effective = pd.Timestamp(spec["effective"]) if spec.get("effective") else EARLIEST
+        label = f"{self.title} {self.version}"
+
+        periods = spec["periods"]
+        rules = []
+        for rule in periods.get("rules", []):
+            day_types = tuple(DAY_TYPE_CODES[day] for day in rule["day_types"]) if "day_types" in rule else DAY_TYPES
+            rules.append((PERIOD_CODES[rule["period"]], rule["start"], rule["end"],
+                          tuple(rule.get("months", ALL_MONTHS)), day_types))
+        # Holidays priced like weekends; a version without a list has none
+        self.holiday_names = list(spec.get("holidays", []))
+        self.periods = PeriodTable.from_rules(rules, default=PERIOD_CODES[periods.get("default", "off_peak")],
+                                              name=label, holidays=holiday_rules(self.holiday_names))
+        # The utility export's Price Type codes, for checking a schedule against the export it came from
+        self.price_types = {int(code): PERIOD_CODES[period] for code, period in spec.get("price_types", {}).items()}
+        self.period_names = list(spec["period_order"])
+        self.period_order = [PERIOD_CODES[period] for period in self.period_names]
+        missing = set(self.periods.periods) - set(self.period_order)
+        if missing:
+            raise ValueError(f"{label}: periods {sorted(missing)} are used but not in period_order")
+
+        self.season_names = list(spec["seasons"])
+        self.season_months = {season: list(months) for season, months in spec["seasons"].items()}
+        self.month_seasons = np.full(13, -1, dtype=np.int64)
+        for season, months in enumerate(spec["seasons"].values()):
+            self.month_seasons[list(months)] = season
+        if (self.month_seasons[1:] < 0).any():
+            raise ValueError(f"{label}: every month needs a season")
+
+        tiers = spec["tiers"]
+        self.tier_sizes = list(tiers)
+        self.tier_bounds = np.cumsum([np.inf if size is None else size for size in tiers])
+        multipliers = spec.get("season_multipliers", {})
+        self.rates = np.empty((len(self.season_names), len(self.period_order), len(tiers)))
+        for position, period in enumerate(self.period_names):
+            period_rates = spec["rates"][period]
+            if len(period_rates) != len(tiers):
+                raise ValueError(f"{label}: {period} needs {len(tiers)} tier rates")
+            for season, season_name in enumerate(self.season_names):
+                self.rates[season, position] = np.asarray(period_rates, float) * multipliers.get(season_name, 1.0)
+        self.base_rates = {period: list(spec["rates"][period]) for period in self.period_names}
+        self.season_multipliers = {season: multipliers.get(season, 1.0) for season in self.season_names}
+        self.service_fee = float(spec.get("service_fee", 0.0))
+        self.default_climate_zone = spec.get("default_climate_zone")
+        self.baselines = {zone: np.array([values.get(season, 0.0) for season in self.season_names], dtype=float)
+                          for zone, values in spec.get("baselines", {}).items()}
+
+    def __repr__(self):
+        return f"<Tariff {self.name} {self.version} from {self.effective_label}>"
+
+    @property
+    def effective_label(self):
+        return "the start" if self.effective == EARLIEST else self.effective.date().isoformat()
+
+    def baseline(self, climate_zone=None):
+        """Daily baseline kWh per season for a climate zone (zeros for tariffs without baselines)."""
+        if not self.baselines:
+            return np.zeros(len(self.season_names))
+        climate_zone = climate_zone or self.default_climate_zone
+        if climate_zone not in self.baselines:
+            raise ValueError(f"Unknown climate zone {climate_zone!r} for {self.title}; "
+                             f"use one of {', '.join(self.baselines)}")
+        return self.baselines[climate_zone]
+
+    def seasons(self, timestamps):
+        """Season index for each timestamp."""
+        ns = pd.DatetimeIndex(timestamps).astype("datetime64[ns]").to_numpy()
+        return self.month_seasons[ns.astype("datetime64[M]").view(np.int64) % 12 + 1]
+
+    def season_days(self, starts, days):
+        """Days in each season for spans of whole days, as an array [span, season]."""
+        start_days = pd.DatetimeIndex(starts).astype("datetime64[ns]").to_numpy().astype("datetime64[D]").view(np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        spans = np.repeat(np.arange(len(days)), days)
+        offsets = np.arange(len(spans)) - np.repeat(np.cumsum(days) - days, days)
+        dates = (np.repeat(start_days, days) + offsets).view("datetime64[D]")
+        seasons = self.month_seasons[dates.astype("datetime64[M]").view(np.int64) % 12 + 1]
+        count = len(self.season_names)
+        return np.bincount(spans * count + seasons, minlength=len(days) * count).reshape(len(days), count)
+
+    def compare_export(self, df):
+        """Rows of a parsed SDG&E export whose Price Type or Tier Price this version disagrees with.
+
+        Each reading is classified and priced as the billing engine would;
+        the result has the export's price type and tier price next to the
+        period and rate this version gives.
+        """
+        if not self.price_types:
+            raise ValueError(f"{self.title} {self.version} has no price_types to compare with")
+        data = df[df["price_type"].notna()]
+        periods = self.periods.classify(data["timestamp"])
+        expected = data["price_type"].astype(np.int64).map(self.price_types).to_numpy()
+        positions = np.zeros(max(self.period_order) + 1, dtype=np.int64)
+        positions[self.period_order] = np.arange(len(self.period_order))
+        positions = positions[periods]
+        tiers = data["tier"].fillna(1).astype(np.int64).to_numpy() - 1
+        rates = self.rates[self.seasons(data["timestamp"]), positions, tiers]
+        wrong = (periods != expected) | ~np.isclose(rates, data["tier_price"].to_numpy("float64"))
+        return pd.DataFrame({
+            "timestamp": data["timestamp"].to_numpy()[wrong],
+            "model": data["model"].to_numpy()[wrong],
+            "price_type": data["price_type"].to_numpy()[wrong],
+            "tier_price": data["tier_price"].to_numpy()[wrong],
+            "period": periods[wrong],
+            "rate": rates[wrong],
+        })
+
+
+class TariffRegistry:
+    """All tariff schedules in a directory of JSON files, each with dated versions.
+
+    Every version is compiled once when the registry loads. Use
+    tariff_registry() to share one registry per process, so a batch of files
+    (or a FolderProcessor worker) compiles the schedules only once.
+    """
+
+    def __init__(self, directory=TARIFF_DIR):
+        self.directory = directory
+        self.schedules = {}
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            name = data.get("name") or os.path.splitext(os.path.basename(path))[0]
+            versions = [Tariff(name, spec, data.get("title"), data.get("provider")) for spec in data["versions"]]
+            versions.sort(key=lambda tariff: tariff.effective)
+            self.schedules[name] = versions
+
+    def names(self):
+        return sorted(self.schedules)
+
+    def versions(self, name):
+        if name not in self.schedules:
+            raise ValueError(f"Unknown tariff {name!r}; available: {', '.join(self.names()) or 'none'}")
+        return self.schedules[name]
+
+    def version_index(self, name, dates):
+        """Index into versions(name) of the version in effect on each date (-1 before the first)."""
+        effective = np.array([tariff.effective.value for tariff in self.versions(name)], dtype=np.int64)
+        days = pd.DatetimeIndex(dates).astype("datetime64[ns]").asi8
+        return np.searchsorted(effective, days, side="right") - 1
+
+    def get(self, name, date=None):
+        """The version of a tariff in effect on a date (the latest version by default)."""
+        versions = self.versions(name)
+        if date is None:
+            return versions[-1]
+        index = int(self.version_index(name, [pd.Timestamp(date)])[0])
+        if index < 0:
+            raise ValueError(f"No {name} rates in effect on {pd.Timestamp(date).date()}; "
+                             f"the first version starts {versions[0].effective_label}")
+        return versions[index]
+
+    def for_provider(self, provider, date=None):
+        if provider not in PROVIDER_TARIFFS:
+            raise ValueError(f"No tariff registered for {provider}")
+        return self.get(PROVIDER_TARIFFS[provider], date)
+
+
+@functools.lru_cache(maxsize=None)
+def tariff_registry(directory=TARIFF_DIR):
+    """The shared TariffRegistry for a directory, loaded and compiled on first use."""
+    return TariffRegistry(directory)
+
+
+def main(argv=None):
+    registry = tariff_registry()
+    parser = argparse.ArgumentParser(description="List the tariff schedules or check one against a utility export.")
+    parser.add_argument("tariff", nargs="?", choices=registry.names())
+    parser.add_argument("--check", help="SDG&E CSV export whose Price Type and Tier Price columns must match")
+    args = parser.parse_args(argv)
+
+    if not args.tariff:
+        for name in registry.names():
+            for tariff in registry.versions(name):
+                print(f"{name}: {tariff.title} {tariff.version} from {tariff.effective_label}")
+        return 0
+    if not args.check:
+        parser.error("--check is required with a tariff")
+
+    from sdge_csv import read_sdge_csv
+    _, df = read_sdge_csv(args.check)
+    tariff = registry.get(args.tariff, df["timestamp"].min())
+    wrong = tariff.compare_export(df)
+    checked = int(df["price_type"].notna().sum())
+    print(f"{tariff.title} {tariff.version}: {checked - len(wrong)} of {checked} readings match "
+          f"{os.path.basename(args.check)}")
+    if len(wrong):
+        print(wrong.to_string(index=False, max_rows=40))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
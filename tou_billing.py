@@ -0,0 +1,213 @@
+# Author: SupportDone.com
+# TOU bills computed from interval data, without Excel, using the tariff registry
+#
+# Usage: python tou_billing.py <GBD files...> [--tariff pge_tou_c] [--climate-zone X] [--by-meter]
+#        [--cycles | --read-dates 2024-01-05,2024-02-04,...] [--output bills.csv]
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from interval_aggregate import energy_columns
+from tariff_registry import tariff_registry, DEFAULT_TARIFF
+
+
+class BillingEngine:
+    """Computes TOU bills for any number of bills at once, for one tariff.
+
+    For PG&E TOU-C the numbers follow the workbook's Data sheet formulas:
+    - days from first to last reading date, or the given billing periods;
+    - baseline = daily allowance x days, prorated by the days in each season;
+    - tiers are fractions of baseline (100%, another 30%, the rest);
+    - periods fill the tiers in the tariff's period order, on-peak first;
+    - winter rates are the summer rates times the season multiplier, and
+      bills crossing a season change pay each season's rates for its share
+      of the days;
+    - the service fee is added to every bill.
+    Each bill is priced with the tariff version in effect on its start date.
+    Usage is summed per bill and period with bincount and every step after
+    that is an array operation over all bills.
+    """
+
+    def __init__(self, tariff=DEFAULT_TARIFF, climate_zone=None, registry=None):
+        self.registry = registry or tariff_registry()
+        self.tariff = tariff
+        self.versions = self.registry.versions(tariff)
+        latest = self.versions[-1]
+        self.climate_zone = climate_zone or latest.default_climate_zone
+        for version in self.versions:
+            # Fail early on a zone the tariff doesn't have
+            version.baseline(self.climate_zone)
+        self.periods = latest.periods
+
+    def classify(self, timestamps, day_types=None):
+        """TOU period code for each local wall-clock timestamp, with the latest tariff version."""
+        return self.periods.classify(timestamps, day_types)
+
+    def bills(self, df, bill_ids=None, period_starts=None, period_ends=None):
+        """One bill per distinct bill id (the whole frame is one bill by default).
+
+        period_starts and period_ends give each row's billing period (first
+        and last day); by default a bill runs from its first reading's date
+        to its last.
+        """
+        if bill_ids is None:
+            codes = np.zeros(len(df), dtype=np.int64)
+            keys = np.array([None], dtype=object)
+        else:
+            codes, keys = pd.factorize(pd.Series(bill_ids, index=df.index), use_na_sentinel=False)
+            keys = np.asarray(keys, dtype=object)
+        count = len(keys)
+        consumption = energy_columns(df)[0]
+        timestamps = df["timestamp"].to_numpy("datetime64[ns]")
+
+        if period_starts is None:
+            dates = pd.Series(timestamps).dt.normalize()
+            span = dates.groupby(codes).agg(["min", "max"]).reindex(range(count))
+            starts = span["min"].to_numpy("datetime64[ns]")
+            ends = span["max"].to_numpy("datetime64[ns]")
+        else:
+            span = pd.DataFrame({"start": np.asarray(period_starts, dtype="datetime64[ns]"),
+                                 "end": np.asarray(period_ends, dtype="datetime64[ns]")})
+            span = span.groupby(codes).agg({"start": "min", "end": "max"}).reindex(range(count))
+            starts = span["start"].to_numpy("datetime64[ns]")
+            ends = span["end"].to_numpy("datetime64[ns]")
+        days = (ends - starts).astype("timedelta64[D]").astype(np.int64) + 1
+
+        bill_versions = self.registry.version_index(self.tariff, starts)
+        if (bill_versions < 0).any():
+            first = self.versions[0]
+            raise ValueError(f"No {first.title} rates before {first.effective_label}")
+        row_versions = bill_versions[codes]
+        frames = []
+        for version in np.unique(bill_versions):
+            tariff = self.versions[version]
+            bills = np.flatnonzero(bill_versions == version)
+            rows = slice(None) if len(bills) == count else row_versions == version
+            period = tariff.periods.classify(timestamps[rows])
+            usage = [np.bincount(codes[rows], weights=np.where(period == code, consumption[rows], 0.0),
+                                 minlength=count)[bills] for code in tariff.period_order]
+            frame = self.price(tariff, usage, starts[bills], ends[bills], days[bills])
+            frame.insert(0, "bill", keys[bills])
+            frame.index = bills
+            frames.append(frame)
+        result = frames[0] if len(frames) == 1 else pd.concat(frames).sort_index()
+        return result.reset_index(drop=True)
+
+    def price(self, tariff, usage, starts, ends, days):
+        """Bills for one tariff version from per-period kWh arrays (in the tariff's period order)."""
+        # Baseline and rates are prorated by the days in each season
+        season_days = tariff.season_days(starts, days)
+        weights = season_days / np.maximum(days, 1)[:, None]
+        total_baseline = season_days @ tariff.baseline(self.climate_zone)
+        daily_baseline = total_baseline / np.maximum(days, 1)
+        rates = np.einsum("bs,spt->bpt", weights, tariff.rates)
+        season_labels = np.array(["/".join(name.title() for name, used in zip(tariff.season_names, row) if used)
+                                  for row in season_days > 0], dtype=object)
+        total = np.sum(usage, axis=0)
+
+        # Tier edges in kWh per bill: [0, tier 1 end, tier 2 end, ..., inf]
+        finite = np.isfinite(tariff.tier_bounds)
+        uppers = np.full((len(total), len(finite)), np.inf)
+        uppers[:, finite] = total_baseline[:, None] * tariff.tier_bounds[finite]
+        lowers = np.concatenate([np.zeros((len(total), 1)), uppers[:, :-1]], axis=1)
+
+        result = {
+            "tariff": tariff.title,
+            "tariff_version": tariff.version,
+            "billing_start": starts,
+            "billing_end": ends,
+            "days": days,
+            "season": season_labels,
+            "climate_zone": self.climate_zone,
+            "daily_baseline": daily_baseline,
+            "total_baseline": total_baseline,
+        }
+        for position, name in enumerate(tariff.season_names):
+            result[f"{name}_days"] = season_days[:, position]
+        for name, kwh in zip(tariff.period_names, usage):
+            result[f"{name}_kwh"] = kwh
+        result["total_kwh"] = total
+        for tier in range(uppers.shape[1]):
+            result[f"tier{tier + 1}_kwh"] = np.clip(total - lowers[:, tier], 0, uppers[:, tier] - lowers[:, tier])
+
+        # Each period fills the tiers after the periods before it
+        charges = {}
+        before = np.zeros(len(total))
+        for position, (name, kwh) in enumerate(zip(tariff.period_names, usage)):
+            after = before + kwh
+            tier_kwh = np.maximum(0, np.minimum(after[:, None], uppers) - np.maximum(before[:, None], lowers))
+            tier_cost = tier_kwh * rates[:, position]
+            for tier in range(uppers.shape[1]):
+                result[f"{name}_tier{tier + 1}_kwh"] = tier_kwh[:, tier]
+                result[f"{name}_tier{tier + 1}_rate"] = rates[:, position, tier]
+                result[f"{name}_tier{tier + 1}_cost"] = tier_cost[:, tier]
+            charges[name] = tier_cost.sum(axis=1)
+            before = after
+        for name in tariff.period_names:
+            result[f"{name}_charges"] = charges[name]
+        result["service_fee"] = tariff.service_fee
+        result["total_bill"] = np.sum(list(charges.values()), axis=0) + tariff.service_fee
+        return pd.DataFrame(result)
+
+    def bill(self, df):
+        """The bill for a whole frame, as a dict."""
+        return self.bills(df).iloc[0].to_dict()
+
+
+def main(argv=None):
+    from parse_cache import ParseCache
+    from meter_split import meter_key_columns, meter_label
+
+    registry = tariff_registry()
+    parser = argparse.ArgumentParser(description="Compute TOU bills from GBD files without Excel.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--tariff", default=DEFAULT_TARIFF, choices=registry.names())
+    parser.add_argument("--climate-zone", help="Baseline climate zone (default: the tariff's)")
+    parser.add_argument("--by-meter", action="store_true", help="One bill per meter instead of per file")
+    parser.add_argument("--cycles", action="store_true", help="One bill per monthly billing cycle")
+    parser.add_argument("--read-dates", help="Comma-separated meter-read dates for the billing cycles")
+    parser.add_argument("--output", help="Write the bills to this CSV file")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    engine = BillingEngine(args.tariff, args.climate_zone, registry)
+    cache = ParseCache()
+    frames = []
+    for path in args.files:
+        df, _ = cache.load(path)
+        bill_ids = os.path.basename(path)
+        if args.by_meter and meter_key_columns(df):
+            columns = meter_key_columns(df)
+            meters = df[columns].apply(tuple, axis=1) if len(columns) > 1 else df[columns[0]]
+            bill_ids = bill_ids + " " + meters.map(meter_label)
+        frames.append(df.assign(bill=bill_ids)[["timestamp", "duration", "value", "bill"] +
+                                               [c for c in ("consumption", "generation") if c in df]])
+    parsed = time.perf_counter()
+    data = pd.concat(frames, ignore_index=True)
+    if args.cycles or args.read_dates:
+        from billing_cycles import cycle_bills
+        read_dates = pd.to_datetime(args.read_dates.split(",")) if args.read_dates else None
+        # Files stand in for meters, so each file gets its own cycles
+        bills = cycle_bills(data.rename(columns={"bill": "meter_number"}), read_dates, engine=engine, by_meter=True)
+        bills = bills.rename(columns={"meter": "bill"})
+        leading = ["bill", "cycle", "coverage"]
+    else:
+        bills = engine.bills(data, data["bill"])
+        leading = ["bill"]
+    billed = time.perf_counter()
+
+    columns = leading + ["billing_start", "billing_end", "days", "season", "total_kwh"]
+    columns += [f"{name}_charges" for name in engine.versions[-1].period_names] + ["total_bill"]
+    print(bills[[column for column in columns if column in bills]].to_string(index=False))
+    print(f"{len(bills)} bills from {len(data)} readings: parsing {parsed - started:.3f}s, "
+          f"billing {billed - parsed:.3f}s")
+    if args.output:
+        bills.to_csv(args.output, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# Author: SupportDone.com
+# TOU period lookup tables: day type x month x quarter-hour slot, compiled once from period rules
+
+import numpy as np
+import pandas as pd
+
+# Period codes; 1 and 2 are the workbook time tables' codes
+ON_PEAK = 1
+OFF_PEAK = 2
+SUPER_OFF_PEAK = 3
+PART_PEAK = 4
+PERIOD_LABELS = {ON_PEAK: "On-Peak", OFF_PEAK: "Off-Peak", SUPER_OFF_PEAK: "Super Off-Peak", PART_PEAK: "Part-Peak"}
+
+WEEKDAY = 0
+WEEKEND_HOLIDAY = 1
+DAY_TYPE_LABELS = {WEEKDAY: "Weekday", WEEKEND_HOLIDAY: "Weekend & Holiday"}
+DAY_TYPES = (WEEKDAY, WEEKEND_HOLIDAY)
+ALL_MONTHS = tuple(range(1, 13))
+SLOTS_PER_HOUR = 4
+
+NS_PER_MINUTE = 60 * 1000000000
+MINUTES_PER_DAY = 24 * 60
+# 1970-01-01 was a Thursday (Monday is 0)
+EPOCH_WEEKDAY = 3
+
+# Rules are (period, start hour, end hour, months, day types), applied in order over
+# the default period; later rules win. Hours may be fractional (15.5 is 3:30 PM).
+# Tariff schedules are defined in tariffs/*.json and compiled by tariff_registry.
+
+
+class PeriodTable:
+    """A TOU schedule compiled to an int8 array indexed [day type, month - 1, slot].
+
+    Slots are quarter hours by default. Classifying timestamps works out each
+    one's flat table index with integer arithmetic on the nanosecond values
+    and takes the periods in a single gather, so a year of 15-minute data is
+    classified in a few milliseconds.
+
+    holidays are the holiday rules (see holiday_calendar) whose dates take
+    the weekend & holiday periods; a schedule without any uses the day of
+    the week alone.
+    """
+
+    def __init__(self, table, name=None, holidays=()):
+        self.table = np.ascontiguousarray(table, dtype=np.int8)
+        self.name = name
+        self.holidays = tuple(holidays)
+        self.slots_per_hour = self.table.shape[2] // 24
+        self.flat = self.table.ravel()
+
+    @classmethod
+    def from_rules(cls, rules, default=OFF_PEAK, name=None, slots_per_hour=SLOTS_PER_HOUR, holidays=()):
+        table = np.full((len(DAY_TYPES), 12, 24 * slots_per_hour), default, dtype=np.int8)
+        for period, start_hour, end_hour, months, day_types in rules:
+            first = int(round(start_hour * slots_per_hour))
+            last = int(round(end_hour * slots_per_hour))
+            if not 0 <= first < last <= table.shape[2]:
+                raise ValueError(f"Bad period hours {start_hour}-{end_hour} in {name or 'period rules'}")
+            month_rows = np.asarray(months, dtype=np.int64) - 1
+            table[np.ix_(np.asarray(day_types), month_rows, np.arange(first, last))] = period
+        return cls(table, name, holidays)
+
+    @property
+    def periods(self):
+        return tuple(int(code) for code in np.unique(self.table))
+
+    def classify(self, timestamps, day_types=None):
+        """Period code per local wall-clock timestamp.
+
+        day_types defaults to the holiday calendar for this schedule's
+        holidays, so they are priced like weekends.
+        """
+        ns = pd.DatetimeIndex(timestamps).astype("datetime64[ns]").asi8
+        minutes = ns // NS_PER_MINUTE
+        days = minutes // MINUTES_PER_DAY
+        slots = (minutes - days * MINUTES_PER_DAY) * self.slots_per_hour // 60
+        months = ns.view("datetime64[ns]").astype("datetime64[M]").view(np.int64) % 12
+        if day_types is None:
+            day_types = self.calendar().day_types(ns)
+        index = (np.asarray(day_types, dtype=np.int64) * 12 + months) * self.table.shape[2] + slots
+        return self.flat[index]
+
+    def calendar(self):
+        """The shared HolidayCalendar for this schedule's holidays."""
+        from holiday_calendar import holiday_calendar
+        return holiday_calendar(rules=self.holidays)
+
+    def grid(self, day_type):
+        """24 x 12 array of the period at the start of each hour, by month, like the workbook time tables."""
+        return self.table[day_type, :, ::self.slots_per_hour].T
+
+    def labels(self, codes):
+        return pd.Series(codes).map(PERIOD_LABELS).to_numpy(dtype=object)
+
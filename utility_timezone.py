@@ -0,0 +1,4 @@
+# Author: SupportDone.com
+# The utilities' local timezone, kept apart so download-only modules can use it without pandas
+
+DEFAULT_TIMEZONE = "America/Los_Angeles"
@@ -2,207 +2,43 @@
 
 import sys
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QLabel, QLineEdit, QPushButton, QVBoxLayout, QWidget, QDateEdit, QMessageBox, QDesktopWidget, QProgressBar, QFileDialog, QHBoxLayout
+    QApplication, QMainWindow, QLabel, QLineEdit, QPushButton, QVBoxLayout, QWidget, QDateEdit, QMessageBox, QDesktopWidget, QProgressBar, QFileDialog, QHBoxLayout, QSpinBox, QCheckBox
 )
 from PyQt5.QtCore import QDate, QThread, pyqtSignal, Qt
 from PyQt5.QtGui import QPixmap, QIcon
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-import json
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
-from datetime import datetime
-from selenium.webdriver.common.keys import Keys
+from portal_automation import PortalJob
 
 class AutomationWorker(QThread):
     """Worker thread to run Selenium automation."""
     progress = pyqtSignal(int)
-    step_counter = 0
     finished = pyqtSignal(bool, str)
-    driver = None
 
-    def __init__(self, url, username, password, start_date, end_date, download_path):
+    def __init__(self, url, username, password, start_date, end_date, download_path,
+                 wait_timeouts=None, session_count=1, headless=False, fast_path=False,
+                 profile="default", sync=False):
         super().__init__()
-        self.url = url
-        self.username = username
-        self.password = password
-        self.start_date = start_date
-        self.end_date = end_date
-        self.download_path = download_path
-
-    def login_to_portal(self, driver, url, username, password):
-        """Perform login actions."""
-        for attempt in range(3):
-            driver.get(url)
-            time.sleep(2)
-            driver.refresh()
-
-            try:
-                print(f"Attempt {attempt + 1}: Logging in...")
-                login_form_present = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.ID, "usernamex"))
-                )
-
-                if login_form_present:
-                    username_field = driver.find_element(By.ID, "usernamex")
-                    username_field.clear()
-                    username_field.send_keys(username)
-                    time.sleep(1)
-
-                    password_field = driver.find_element(By.ID, "passwordx")
-                    password_field.clear()
-                    password_field.send_keys(password)
-                    time.sleep(2)
-
-                    driver.find_element(By.ID, "btnlogin").click()
-                    time.sleep(3)
-                else:
-                    print("Login form not found. Assuming login was successful.")
-                    return
-
-                form_still_present = driver.find_elements(By.ID, "usernamex")
-                if not form_still_present:
-                    print("Login successful!")
-                    return
-
-            except Exception as e:
-                print(f"Login attempt {attempt + 1} failed: {e}")
-
-    @staticmethod
-    def validate_and_format_date(date_string):
-        """Validate and format the date to MMM DD, YYYY."""
-        accepted_formats = ["%B %d, %Y", "%Y-%m-%d", "%d %B, %Y"]
-        for date_format in accepted_formats:
-            try:
-                date_obj = datetime.strptime(date_string, date_format)
-                return date_obj.strftime("%B %d, %Y")
-            except ValueError:
-                continue
-        raise ValueError(f"Invalid date format: {date_string}. Expected formats: {', '.join(accepted_formats)}.")
-
-    def download_file(self, driver, start_date, end_date, total_steps):
-        """Download file with custom date range."""
-        time.sleep(2)
-        driver.get("https://myenergycenter.com/portal/Usage/Index")
-        time.sleep(2)
-        self.step_counter += 1
-        self.progress.emit(int((self.step_counter / total_steps) * 100))
-
-        start_date = self.validate_and_format_date(start_date)
-        end_date = self.validate_and_format_date(end_date)
-
-        green_button_download = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.ID, "gbloadpopup"))
+        self.job = PortalJob(
+            "SDGE", url, username, password, start_date, end_date, download_path,
+            wait_timeouts=wait_timeouts, session_count=session_count, headless=headless,
+            on_progress=self.progress.emit, fast_path=fast_path, profile=profile,
+            sync=sync,
         )
-        green_button_download.click()
-        print("Modal opened.")
-        time.sleep(4)
-
-        from_date_picker = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.ID, "gbfromdatepicker"))
-        )
-        driver.execute_script("arguments[0].removeAttribute('readonly')", from_date_picker)
-        from_date_picker.clear()
-        from_date_picker.send_keys(start_date)
-        print(f"Start date entered: {start_date}")
-        time.sleep(2)
-        from_date_picker.send_keys(Keys.RETURN)
-
-        to_date_picker = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.ID, "gbtodatepicker"))
-        )
-        driver.execute_script("arguments[0].removeAttribute('readonly')", to_date_picker)
-        to_date_picker.clear()
-        to_date_picker.send_keys(end_date)
-        print(f"End date entered: {end_date}")
-        time.sleep(2)
-        to_date_picker.send_keys(Keys.RETURN)
-
-        download_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.ID, "btngbDataDownload"))
-        )
-        time.sleep(2)
-        download_button.click()
-        print("Download initiated.")
-        time.sleep(5)
-        self.step_counter += 1
-        self.progress.emit(int((self.step_counter / total_steps) * 100))
-        driver.get("https://myenergycenter.com/portal/Dashboard/index")
-        time.sleep(2)
-
-    def interact_with_dropdown(self, driver, start_date, end_date):
-        """Interact with dropdown and handle progress."""
-        dropdown_button = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "button[data-id='accountList']"))
-        )
-        dropdown_button.click()
-        time.sleep(2)
-
-        dropdown_items = WebDriverWait(driver, 10).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "ul.dropdown-menu > li"))
-        )
-        total_items = len(dropdown_items)
-        steps_per_cycle = 3
-        total_steps = total_items * steps_per_cycle
-        print(f"Found {total_items} items in the dropdown. Total steps: {total_steps}.")
-
-        dropdown_button.click()
-        time.sleep(2)
-
-        for index in range(total_items):
-            dropdown_button = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "button[data-id='accountList']"))
-            )
-            dropdown_button.click()
-            time.sleep(2)
-
-            clickable_item = WebDriverWait(driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "ul.dropdown-menu > li"))
-            )[index]
-
-            print(f"Selecting item {index + 1}: {clickable_item.text}")
-            driver.execute_script("arguments[0].scrollIntoView(true);", clickable_item)
-            clickable_item.click()
-            self.step_counter += 1
-            self.progress.emit(int((self.step_counter / total_steps) * 100))
-
-            print("Waiting for page to reload...")
-            try:
-                WebDriverWait(driver, 20).until(EC.staleness_of(dropdown_button))
-                print("Page reloaded successfully.")
-
-                self.download_file(driver, start_date, end_date, total_steps)
-            except Exception as e:
-                print(f"Error waiting for page reload: {e}")
-                raise
-    def configure_driver(self):
-        """Configure Chrome WebDriver with custom download folder."""
-        
-        normalized_path = self.download_path.replace("/", "\\")
-        options = webdriver.ChromeOptions()
-        prefs = {
-            "download.default_directory": normalized_path,  # Set custom download folder
-            "download.prompt_for_download": False,  # Disable prompt
-            "directory_upgrade": True,
-        }
-        options.add_experimental_option("prefs", prefs)
-        return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        self.downloads = []
 
     def run(self):
         """Run the Selenium script."""
         try:
-            self.driver = self.configure_driver()  # Use configured driver
-            self.login_to_portal(self.driver, self.url, self.username, self.password)
-            self.interact_with_dropdown(self.driver, self.start_date, self.end_date)
-            self.finished.emit(True, "Automation completed successfully!")
+            results = self.job.run()
+            self.downloads = self.job.downloads
+            failures = self.job.failures()
+            if failures:
+                self.finished.emit(False, f"{len(failures)} of {len(results)} downloads failed:\n" + "\n".join(failures))
+            elif not results and self.job.sync:
+                self.finished.emit(True, "Every account is already up to date.")
+            else:
+                self.finished.emit(True, "Automation completed successfully!")
         except Exception as e:
             self.finished.emit(False, f"An error occurred: {e}")
-        finally:
-            if self.driver:
-                self.driver.quit()
 
 class AutomationApp(QMainWindow):
     def __init__(self):
@@ -254,6 +90,16 @@ class AutomationApp(QMainWindow):
         self.download_layout.addWidget(self.download_input)
         self.download_layout.addWidget(self.browse_button)
 
+        # Parallel browser sessions for logins with many accounts
+        self.sessions_label = QLabel("Browser Sessions:")
+        self.sessions_input = QSpinBox()
+        self.sessions_input.setRange(1, 8)
+        self.sessions_input.setValue(1)
+        self.headless_checkbox = QCheckBox("Run browsers in the background (headless)")
+        self.fast_path_checkbox = QCheckBox("Fast downloads over HTTP after login (SDGE)")
+        self.lean_checkbox = QCheckBox("Lean browser (headless, skip images, fonts and trackers)")
+        self.sync_checkbox = QCheckBox("Sync: only download dates not already in the folder")
+
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
         self.progress_bar.setAlignment(Qt.AlignCenter)
@@ -278,6 +124,12 @@ class AutomationApp(QMainWindow):
         layout.addWidget(self.end_date_input)
         layout.addWidget(self.download_label)
         layout.addLayout(self.download_layout)
+        layout.addWidget(self.sessions_label)
+        layout.addWidget(self.sessions_input)
+        layout.addWidget(self.headless_checkbox)
+        layout.addWidget(self.fast_path_checkbox)
+        layout.addWidget(self.lean_checkbox)
+        layout.addWidget(self.sync_checkbox)
         layout.addWidget(self.progress_bar)
         layout.addWidget(self.start_button)
         layout.addWidget(self.stop_button)
@@ -310,13 +162,20 @@ class AutomationApp(QMainWindow):
         start_date = self.start_date_input.date().toString("yyyy-MM-dd")
         end_date = self.end_date_input.date().toString("yyyy-MM-dd")
         download_path = self.download_input.text()
+        session_count = self.sessions_input.value()
+        headless = self.headless_checkbox.isChecked()
+        fast_path = self.fast_path_checkbox.isChecked()
+        profile = "lean" if self.lean_checkbox.isChecked() else "default"
+        sync = self.sync_checkbox.isChecked()
 
         if not url or not username or not password or not download_path:
             QMessageBox.warning(self, "Input Error", "Please fill all fields and select a download folder!")
             return
 
         self.set_form_enabled(False)
-        self.worker = AutomationWorker(url, username, password, start_date, end_date, download_path)
+        self.worker = AutomationWorker(url, username, password, start_date, end_date, download_path,
+                                       session_count=session_count, headless=headless, fast_path=fast_path,
+                                       profile=profile, sync=sync)
         self.worker.progress.connect(self.update_progress)
         self.worker.finished.connect(self.on_automation_finished)
         self.worker.start()
@@ -355,6 +214,11 @@ class AutomationApp(QMainWindow):
         self.end_date_input.setEnabled(enabled)
         self.download_input.setEnabled(enabled)
         self.browse_button.setEnabled(enabled)
+        self.sessions_input.setEnabled(enabled)
+        self.headless_checkbox.setEnabled(enabled)
+        self.fast_path_checkbox.setEnabled(enabled)
+        self.lean_checkbox.setEnabled(enabled)
+        self.sync_checkbox.setEnabled(enabled)
         self.start_button.setEnabled(enabled)
         self.stop_button.setEnabled(not enabled)
 